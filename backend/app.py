@@ -1,16 +1,25 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 import os
-from dotenv import load_dotenv
-from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
+import threading
+import time
+from concurrent.futures import as_completed
+# Loads backend/.env; must come before the service imports, which read their settings at import time
+import config  # noqa: F401
 from services.stock_service import StockService
 from services.ai_service import AIService
-from database.db import init_db, get_starred_stocks, add_starred_stock, remove_starred_stock
-
-# Load .env file from the backend directory
-env_path = Path(__file__).parent / '.env'
-load_dotenv(dotenv_path=env_path)
+from services.metrics import registry as metrics_registry, REQUEST_LATENCY, track_submit
+from services.analysis import build_analysis, parse_fields, timed_stage, symbol_executor
+from services.price_stream import QuotePoller
+from services.screener import FundamentalsScreener, ScreenError, parse_predicate
+from services.precompute import RecommendationPrecomputer
+from services.chat_memory import ChatMemory
+from services import tracing
+from services.admission import Overloaded, enter_queue
+from services.rate_limit import rate_limiter, PER_SYMBOL_ENDPOINTS
+from services.market_calendar import market_calendar
+from services.content_hash import analysis_hashes, content_hash, make_etag, parse_etag, etag_matches, delta_payload
+from database.db import init_db, get_starred_stocks, add_starred_stock, remove_starred_stock, delete_recommendation
 
 app = Flask(__name__)
 
@@ -18,7 +27,24 @@ app = Flask(__name__)
 # Update ALLOWED_ORIGINS in Render environment variables with your Netlify URL
 allowed_origins_str = os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000,http://localhost:5000,http://127.0.0.1:5000,http://localhost:5001')
 allowed_origins = [origin.strip() for origin in allowed_origins_str.split(',') if origin.strip()]
-CORS(app, resources={r"/api/*": {"origins": allowed_origins}}, supports_credentials=True)
+CORS(app, resources={r"/api/*": {"origins": allowed_origins}}, supports_credentials=True,
+     expose_headers=['Server-Timing', 'X-Trace-Id', 'ETag', 'Retry-After',
+                     'RateLimit-Limit', 'RateLimit-Remaining', 'RateLimit-Reset', 'RateLimit-Policy'])
+
+# Endpoints that get a per-request span tree (Server-Timing header, optional _timings field)
+TRACED_ENDPOINTS = {'analyze_stock', 'analyze_section', 'refresh_stock', 'chatbot'}
+
+# Per-stage wait for /api/analyze; slower stages fall back to empty data
+ANALYZE_STAGE_TIMEOUT = float(os.getenv('ANALYZE_STAGE_TIMEOUT', '5'))
+# Upper bound on symbols in one POST /api/refresh or price stream
+MAX_BATCH_SYMBOLS = int(os.getenv('MAX_BATCH_SYMBOLS', '50'))
+# Upper bound on symbols in one POST /api/metrics/batch
+MAX_METRICS_SYMBOLS = int(os.getenv('MAX_METRICS_SYMBOLS', '500'))
+# Symbols per POST /api/metrics/batch whose price history may be downloaded during the request;
+# the rest are served from the local store and reported as stale or missing
+METRICS_SYNC_LIMIT = int(os.getenv('METRICS_SYNC_LIMIT', '5'))
+# Seconds between SSE comments that keep idle price streams open through proxies
+PRICE_STREAM_KEEPALIVE = float(os.getenv('PRICE_STREAM_KEEPALIVE', '20'))
 
 # Initialize database
 init_db()
@@ -26,10 +52,112 @@ init_db()
 # Initialize services
 stock_service = StockService()
 ai_service = AIService()
+# One quote poller per process, shared by every /api/stream/prices client
+price_poller = QuotePoller(stock_service.get_quote)
+# Materialized fundamentals for the screener universe, rebuilt in the background
+screener = FundamentalsScreener(stock_service)
+# Starred symbols get their AI recommendation regenerated in the background and served from the database
+recommendations = RecommendationPrecomputer(ai_service)
+# Chatbot conversations (recent turns plus a summary of older ones), kept in SQLite
+chat_memory = ChatMemory()
+
+# Heavy imports (anthropic, openai, yfinance/pandas) are deferred until first use;
+# this thread pulls them in right after startup so /api/health answers immediately
+warmup_done = threading.Event()
+
+def warm_up():
+    """Load LLM clients and yfinance in the background"""
+    started = time.perf_counter()
+    try:
+        ai_service.warm_up()
+        import yfinance  # noqa: F401 (imports pandas)
+        print(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        print(f"Warm-up error: {e}")
+    finally:
+        warmup_done.set()
+
+if os.getenv('STARTUP_WARMUP', '1') not in ('0', 'false'):
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    limited = apply_rate_limit()
+    if limited is not None:
+        return limited
+    # LLM calls made for this request wait in (or are shed from) its endpoint's admission queue
+    enter_queue(request.endpoint)
+    if request.endpoint in TRACED_ENDPOINTS:
+        # Honour a caller-supplied trace ID so client and server logs can be joined
+        tracing.start_trace(request.endpoint, request.headers.get('X-Trace-Id'))
+
+def apply_rate_limit():
+    """Charge the request to its client's token bucket; a 429 response when the bucket is short"""
+    if request.method == 'OPTIONS':
+        return None
+    symbols = 0
+    if request.endpoint in PER_SYMBOL_ENDPOINTS:
+        requested = (request.get_json(silent=True) or {}).get('symbols')
+        symbols = len(requested) if isinstance(requested, list) else 0
+    client = rate_limiter.client(request.headers.get('X-API-Key'), request.remote_addr,
+                                 request.headers.get('X-Forwarded-For'))
+    decision = rate_limiter.check(client, request.endpoint, symbols)
+    g.rate_limit = decision
+    if decision is None or decision.allowed:
+        return None
+    payload = decision.to_dict()
+    payload['error'] = (f"Rate limit exceeded: this request costs {decision.cost:g} tokens and "
+                        f"{decision.remaining:.1f} are left. Your bucket holds {decision.burst:g} tokens and "
+                        f"refills at {decision.rate:g} per second; retry in {decision.retry_after}s.")
+    return jsonify(payload), 429
+
+@app.after_request
+def record_request_latency(response):
+    start = getattr(g, 'request_start', None)
+    if start is not None:
+        # Label by route pattern (e.g. /api/refresh/<symbol>) to keep cardinality bounded
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint,
+                                method=request.method, status=str(response.status_code))
+    
+    decision = getattr(g, 'rate_limit', None)
+    if decision is not None:
+        response.headers.update(decision.headers())
+    
+    trace = tracing.end_trace()
+    if trace is not None:
+        response.headers['X-Trace-Id'] = trace.trace_id
+        response.headers['Server-Timing'] = trace.server_timing()
+        origin = request.headers.get('Origin')
+        if origin and origin in allowed_origins:
+            # Lets the browser expose Server-Timing to cross-origin PerformanceResourceTiming
+            response.headers['Timing-Allow-Origin'] = origin
+        if request.args.get('timings') in ('1', 'true') and response.is_json:
+            payload = response.get_json(silent=True)
+            if isinstance(payload, dict):
+                payload['_timings'] = trace.to_dict()
+                response.set_data(app.json.dumps(payload))
+    return response
+
+def conditional_json(payload, etag):
+    """JSON response carrying an ETag; 304 with no body when the client already has it"""
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(payload)
+    response.headers['ETag'] = etag
+    # Always revalidate, so browsers send If-None-Match instead of reusing stale data
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/api/analyze', methods=['POST'])
 def analyze_stock():
-    """Main analysis endpoint - optimized for speed"""
+    """Main analysis endpoint - optimized for speed.
+    
+    An optional fields selector (?fields=company,news or "fields" in the body)
+    limits the response, and the upstream work, to those sections.
+    """
     try:
         data = request.get_json()
         symbol = data.get('symbol', '').upper().strip()
@@ -37,84 +165,43 @@ def analyze_stock():
         if not symbol:
             return jsonify({'error': 'Stock symbol is required'}), 400
         
-        # Fetch data sequentially with delays to avoid Yahoo Finance rate limiting
-        # Company data first (needed for AI)
         try:
-            company_data = stock_service.get_company_overview(symbol)
-        except Exception as e:
-            print(f"Company overview error: {e}")
-            company_data = {}
-        
-        # Then fetch other data in parallel (but with fewer workers to reduce rate limits)
-        with ThreadPoolExecutor(max_workers=2) as executor:  # Reduced from 4 to 2
-            news_future = executor.submit(stock_service.get_recent_news, symbol)
-            sentiment_future = executor.submit(stock_service.get_social_sentiment, symbol)
-            analyst_future = executor.submit(stock_service.get_analyst_ratings, symbol)
-            
-            # Get other data with reasonable timeouts (these need more time for multiple API calls)
-            try:
-                news_data = news_future.result(timeout=5)  # Increased from 1.5 to 5 seconds
-            except FutureTimeoutError:
-                print(f"News data timeout for {symbol}")
-                news_data = []
-            except Exception as e:
-                print(f"News data error for {symbol}: {e}")
-                news_data = []
-            
-            try:
-                sentiment_data = sentiment_future.result(timeout=5)  # Increased from 1.5 to 5 seconds
-            except FutureTimeoutError:
-                print(f"Sentiment data timeout for {symbol}")
-                sentiment_data = {}  # Social sentiment has fallbacks, so return empty dict
-            except Exception as e:
-                print(f"Sentiment data error for {symbol}: {e}")
-                sentiment_data = {}  # Will use fallback sentiment
-            
-            try:
-                analyst_data = analyst_future.result(timeout=5)  # Increased from 1.5 to 5 seconds
-            except FutureTimeoutError:
-                print(f"Analyst data timeout for {symbol}")
-                analyst_data = {}
-            except Exception as e:
-                print(f"Analyst data error for {symbol}: {e}")
-                analyst_data = {}
+            fields = parse_fields(request.args.get('fields', data.get('fields')))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Generate AI recommendation with 3-second timeout (start immediately after company data)
-        # Total target: 3s company + 3s AI = 6s, with 1s buffer for other data
-        try:
-            ai_recommendation = ai_service.generate_recommendation(
-                symbol=symbol,
-                company_data=company_data,
-                news_data=news_data,
-                sentiment_data=sentiment_data,
-                analyst_data=analyst_data
-            )
-        except Exception as e:
-            # Fallback to mock recommendation if AI errors
-            print(f"AI recommendation error, using mock: {e}")
-            ai_recommendation = ai_service._get_mock_recommendation(symbol, company_data, analyst_data, news_data if isinstance(news_data, list) else [])
-        
-        # Combine all data
-        analysis = {
-            'symbol': symbol,
-            'company': company_data,
-            'news': news_data,
-            'sentiment': sentiment_data,
-            'analyst': analyst_data,
-            'ai_recommendation': ai_recommendation
-        }
+        # Company, news, sentiment and analyst data are fetched concurrently; provider
+        # limits and the yfinance throttle keep concurrent requests from tripping rate limits
+        analysis = build_analysis(symbol, stock_service, ai_service, stage_timeout=ANALYZE_STAGE_TIMEOUT, fields=fields,
+                                  recommendations=recommendations)
         
         return jsonify(analysis), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/analyze/<symbol>/<section>', methods=['GET'])
+def analyze_section(symbol, section):
+    """One analysis section (company, news, sentiment, analyst or ai), computed on its own"""
+    try:
+        symbol = symbol.upper().strip()
+        try:
+            fields = parse_fields([section])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 404
+        
+        analysis = build_analysis(symbol, stock_service, ai_service, stage_timeout=ANALYZE_STAGE_TIMEOUT, fields=fields,
+                                  recommendations=recommendations)
+        return conditional_json(analysis, make_etag(analysis_hashes(analysis)))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/starred', methods=['GET'])
 def get_starred():
     """Get all starred stocks"""
     try:
         starred = get_starred_stocks()
-        return jsonify(starred), 200
+        return conditional_json(starred, f'"{content_hash(starred)}"')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -129,6 +216,7 @@ def star_stock():
             return jsonify({'error': 'Stock symbol is required'}), 400
         
         add_starred_stock(symbol)
+        recommendations.prime(symbol, stock_service)
         return jsonify({'message': f'{symbol} added to starred stocks'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -139,41 +227,79 @@ def unstar_stock(symbol):
     try:
         symbol = symbol.upper().strip()
         remove_starred_stock(symbol)
+        delete_recommendation(symbol)
         return jsonify({'message': f'{symbol} removed from starred stocks'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/refresh/<symbol>', methods=['GET'])
 def refresh_stock(symbol):
-    """Refresh data for a specific saved stock"""
+    """Refresh data for a specific saved stock.
+    
+    Supports If-None-Match (304 when nothing changed) and ?delta=1, which returns
+    only the sections whose hash differs from the client's ETag (or ?since=<etag>).
+    """
     try:
         symbol = symbol.upper().strip()
         
-        # Fetch fresh data (same as analyze endpoint)
-        company_data = stock_service.get_company_overview(symbol)
-        news_data = stock_service.get_recent_news(symbol)
-        sentiment_data = stock_service.get_social_sentiment(symbol)
-        analyst_data = stock_service.get_analyst_ratings(symbol)
-        
-        ai_recommendation = ai_service.generate_recommendation(
-            symbol=symbol,
-            company_data=company_data,
-            news_data=news_data,
-            sentiment_data=sentiment_data,
-            analyst_data=analyst_data
-        )
-        
-        analysis = {
-            'symbol': symbol,
-            'company': company_data,
-            'news': news_data,
-            'sentiment': sentiment_data,
-            'analyst': analyst_data,
-            'ai_recommendation': ai_recommendation
-        }
+        analysis = build_analysis(symbol, stock_service, ai_service, recommendations=recommendations)
         
-        return jsonify(analysis), 200
+        hashes = analysis_hashes(analysis)
+        etag = make_etag(hashes)
+        if request.args.get('delta') in ('1', 'true'):
+            client_hashes = parse_etag(request.args.get('since') or request.headers.get('If-None-Match'))
+            if client_hashes:
+                analysis = delta_payload(analysis, hashes, client_hashes)
+        analysis['_hashes'] = hashes
+        return conditional_json(analysis, etag)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/refresh', methods=['POST'])
+def refresh_stocks():
+    """Refresh several saved stocks at once, streaming one NDJSON line per symbol as it finishes.
+    
+    Body: {"symbols": [...], "etags": {"AAPL": "<etag>"}}. Symbols whose ETag still
+    matches are answered with {"symbol", "_notModified": true, "_etag"} only.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        symbols = data.get('symbols', [])
+        
+        if not symbols or not isinstance(symbols, list):
+            return jsonify({'error': 'List of symbols is required'}), 400
         
+        symbols = list(dict.fromkeys(s.upper().strip() for s in symbols if isinstance(s, str) and s.strip()))
+        if len(symbols) > MAX_BATCH_SYMBOLS:
+            return jsonify({'error': f'At most {MAX_BATCH_SYMBOLS} symbols per request'}), 400
+        
+        etags = data.get('etags') or {}
+        futures = {}
+        for symbol in symbols:
+            future = symbol_executor.submit(tracing.propagate(build_analysis), symbol, stock_service, ai_service,
+                                             recommendations=recommendations)
+            futures[track_submit('refresh', future)] = symbol
+        
+        def generate():
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    analysis = future.result()
+                    hashes = analysis_hashes(analysis)
+                    etag = make_etag(hashes)
+                    if etag_matches(etags.get(symbol), etag):
+                        line = {'symbol': symbol, '_notModified': True, '_etag': etag}
+                    else:
+                        line = dict(analysis, _hashes=hashes, _etag=etag)
+                except Exception as e:
+                    line = {'symbol': symbol, 'error': str(e)}
+                yield app.json.dumps(line) + '\n'
+        
+        response = Response(generate(), content_type='application/x-ndjson')
+        # Stop reverse proxies from buffering the stream until it completes
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -202,20 +328,33 @@ def chatbot():
         # Get recent market news for context (with timeout to prevent hanging)
         market_news = []
         try:
-            market_news = stock_service.get_market_news(limit=5)
+            market_news = timed_stage('market_news', stock_service.get_market_news, limit=5)
         except Exception as news_error:
             print(f"Warning: Could not fetch market news: {news_error}")
             market_news = []
         
+        # Continue the conversation named by sessionId, or start a new one
+        session_id, history = chat_memory.load(data.get('sessionId'))
+        
         # Generate chatbot response
         try:
-            response_text = ai_service.chat(message, market_news)
-            return jsonify({'response': response_text}), 200
+            response_text = timed_stage('chat', ai_service.chat, message, market_news, history)
+        except Overloaded as e:
+            response = jsonify({'error': 'The assistant is busy right now. Please try again shortly.',
+                                'retryAfter': e.retry_after, 'sessionId': session_id})
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 503
         except Exception as chat_error:
             print(f"Chat error: {chat_error}")
             # Return a helpful error message without printing traceback (avoids broken pipe)
             return jsonify({'error': f'Failed to generate response. Please try again.'}), 500
         
+        try:
+            chat_memory.record(session_id, message, response_text)
+        except Exception as memory_error:
+            print(f"Warning: Could not save chat turn: {memory_error}")
+        return jsonify({'response': response_text, 'sessionId': session_id}), 200
+        
     except Exception as e:
         print(f"Chatbot endpoint error: {e}")
         return jsonify({'error': 'An error occurred processing your request. Please try again.'}), 500
@@ -267,10 +406,163 @@ def get_multiple_prices():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/history/<symbol>', methods=['GET'])
+def get_price_history(symbol):
+    """Daily OHLCV bars from the local history store (?days=N for the most recent N)"""
+    try:
+        symbol = symbol.upper().strip()
+        history = stock_service.get_price_history(symbol)
+        if history is None:
+            return jsonify({'error': f'No price history available for {symbol}'}), 404
+        days = request.args.get('days', type=int)
+        if days:
+            history = history.tail(days)
+        return jsonify(history.to_dict()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/metrics/<symbol>', methods=['GET'])
+def get_technical_metrics(symbol):
+    """Technical metrics from stored price history: volatility, beta vs SPY, drawdown, moving averages, RSI, 52-week range"""
+    try:
+        symbol = symbol.upper().strip()
+        metrics = stock_service.get_technicals(symbol)
+        if not metrics:
+            return jsonify({'error': f'No price history available for {symbol}'}), 404
+        return jsonify(metrics), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/metrics/batch', methods=['POST'])
+def get_batch_technical_metrics():
+    """Technical metrics for many symbols, computed in one vectorized pass
+    
+    Metrics come from the local price history store. At most METRICS_SYNC_LIMIT out-of-date
+    symbols (those with nothing stored first) are downloaded, on the refresh pool; the others
+    are listed under 'stale' (served from older bars) or 'missing' (no bars, no metrics).
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        symbols = data.get('symbols', [])
+        
+        if not symbols or not isinstance(symbols, list):
+            return jsonify({'error': 'List of symbols is required'}), 400
+        
+        symbols = list(dict.fromkeys(s.upper().strip() for s in symbols if isinstance(s, str) and s.strip()))
+        if len(symbols) > MAX_METRICS_SYMBOLS:
+            return jsonify({'error': f'At most {MAX_METRICS_SYMBOLS} symbols per request'}), 400
+        
+        outdated = [symbol for symbol in symbols if stock_service.history_needs_update(symbol)]
+        outdated.sort(key=lambda symbol: stock_service.price_history.meta(symbol)['last_date'] is not None)
+        syncs = [track_submit('refresh', symbol_executor.submit(tracing.propagate(stock_service.get_price_history),
+                                                                symbol))
+                 for symbol in outdated[:METRICS_SYNC_LIMIT]]
+        for future in syncs:
+            future.result()
+        
+        metrics = stock_service.get_technical_metrics(symbols, sync=False)
+        return jsonify({
+            'metrics': metrics,
+            'stale': [s for s in outdated if s in metrics and stock_service.history_needs_update(s)],
+            'missing': [s for s in symbols if s not in metrics],
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/screen', methods=['GET', 'POST'])
+def screen_stocks():
+    """Screen the local fundamentals table, e.g. ?filter=peRatio<20&filter=sector=Technology&sort=-marketCap
+    
+    POST takes the same options as JSON: {"filters": [...], "sort": ..., "limit": ..., "fields": [...]}.
+    No upstream calls are made; a stale table is rebuilt in the background.
+    """
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            filters = data.get('filters') or []
+            sort = data.get('sort')
+            limit = data.get('limit', 50)
+            fields = data.get('fields')
+        else:
+            filters = request.args.getlist('filter')
+            sort = request.args.get('sort')
+            limit = request.args.get('limit', 50, type=int)
+            fields = request.args.get('fields')
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
+        
+        try:
+            predicates = [parse_predicate(f) for f in filters]
+        except ScreenError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if screener.is_stale():
+            screener.refresh_in_background()
+        table = screener.table
+        if table is None:
+            response = jsonify({'error': 'Fundamentals table is being built, try again shortly', **screener.status()})
+            response.headers['Retry-After'] = '30'
+            return response, 503
+        
+        try:
+            result = table.screen(predicates, sort=sort, limit=max(1, min(int(limit), 500)), fields=fields)
+        except ScreenError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({**screener.status(), **result}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/screen/refresh', methods=['POST'])
+def refresh_screener():
+    """Start rebuilding the fundamentals table now"""
+    try:
+        started = screener.refresh_in_background()
+        return jsonify({'started': started, **screener.status()}), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/stream/prices', methods=['GET'])
+def stream_prices():
+    """Server-Sent Events stream of price changes for ?symbols=AAPL,MSFT
+    
+    Sends a "prices" event with the last known quotes on connect, then one
+    whenever any of the symbols changes.
+    """
+    symbols = list(dict.fromkeys(s.upper().strip() for s in request.args.get('symbols', '').split(',') if s.strip()))
+    if not symbols:
+        return jsonify({'error': 'symbols query parameter is required'}), 400
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        return jsonify({'error': f'At most {MAX_BATCH_SYMBOLS} symbols per stream'}), 400
+    
+    subscription = price_poller.subscribe(symbols)
+    
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                updates = subscription.next(timeout=PRICE_STREAM_KEEPALIVE)
+                if updates:
+                    yield f'event: prices\ndata: {app.json.dumps(updates)}\n\n'
+                else:
+                    yield ': keepalive\n\n'
+        finally:
+            # Runs when the client disconnects and the server closes the generator
+            price_poller.unsubscribe(subscription)
+    
+    response = Response(generate(), content_type='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint (text exposition format)"""
+    return Response(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/health', methods=['GET'])
 def health():
-    """Health check endpoint"""
-    return jsonify({'status': 'healthy'}), 200
+    """Health check endpoint (ready as soon as the app is imported; "warm" once clients are loaded)"""
+    return jsonify({'status': 'healthy', 'warm': warmup_done.is_set(), 'market': market_calendar.status()}), 200
 
 if __name__ == '__main__':
     app.run(debug=True, port=5001, host='0.0.0.0')
@@ -0,0 +1,71 @@
+"""Bulk recommendation throughput benchmark against the local provider stubs.
+
+Generates recommendations for a set of symbols twice: one at a time through
+generate_recommendation (what a loop over /api/analyze amounts to), then as
+one services.bulk run, and reports symbols per second for each. The bulk run
+checkpoints into a throwaway database, so nothing touches backend/database.
+
+Usage (from backend/):
+    python -m benchmarks.bulk --symbols 200 --sequential 10 --llm-latency 1.0
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.run import configure_environment
+from benchmarks.stub_providers import StubConfig, StubProviderServer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sequential vs bulk AI recommendation throughput')
+    parser.add_argument('--symbols', type=int, default=200, help='symbols in the bulk run')
+    parser.add_argument('--sequential', type=int, default=10, help='symbols generated one at a time for the baseline')
+    parser.add_argument('--llm', choices=['anthropic', 'openai'], default='anthropic')
+    parser.add_argument('--latency', type=float, default=0.05, help='default provider latency in seconds')
+    parser.add_argument('--llm-latency', type=float, default=1.0, help='LLM stub latency in seconds')
+    parser.add_argument('--llm-concurrency', type=int, default=32)
+    parser.add_argument('--data-concurrency', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    stub = StubProviderServer(StubConfig(latency=args.latency, llm_latency=args.llm_latency)).start()
+    configure_environment(stub, args.llm, '0.01')
+    os.environ['CACHE_BACKEND'] = 'none'
+    os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='bench-bulk-'), 'stocks.db')
+
+    from database.db import init_db
+    from services.ai_service import AIService
+    from services.analysis import DATA_SECTIONS, build_analysis
+    from services.bulk import BulkRecommendationRun
+    from services.stock_service import StockService
+
+    init_db()
+    stock_service = StockService()
+    stock_service.ticker_factory = stub.ticker_factory()
+    ai_service = AIService()
+    # Synthetic tickers; the stubs answer for any symbol
+    symbols = [f'B{i:04d}' for i in range(args.symbols)]
+
+    try:
+        started = time.perf_counter()
+        for symbol in symbols[:args.sequential]:
+            data = build_analysis(symbol, stock_service, ai_service, fields=list(DATA_SECTIONS))
+            ai_service.generate_recommendation(symbol, data['company'], data['news'], data['sentiment'],
+                                               data['analyst'], data['technicals'], fallback=False)
+        sequential_rate = args.sequential / (time.perf_counter() - started)
+
+        run = BulkRecommendationRun(ai_service, stock_service, args.llm_concurrency, args.data_concurrency)
+        summary = run.start(symbols)
+        bulk_rate = summary['done'] / summary['elapsed_s']
+    finally:
+        stub.stop()
+
+    print(f"\nsequential: {sequential_rate:6.2f} symbols/s ({args.sequential} symbols)")
+    print(f"bulk:       {bulk_rate:6.2f} symbols/s ({summary['done']}/{summary['total']} done, "
+          f"{summary['failed']} failed, llm concurrency {args.llm_concurrency})")
+    print(f"speedup:    {bulk_rate / sequential_rate:6.1f}x")
+    return {'sequential_rate': sequential_rate, 'bulk_rate': bulk_rate, 'summary': summary}
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Near-duplicate news detection benchmark on synthetic syndicated articles.
+
+Generates stories as clusters: one original plus syndicated copies that add a
+publisher suffix, change case, drop or add a word, or swap one word, with the
+summary cut or extended. Every article goes through services.dedup, and the
+benchmark reports:
+
+- inserts per second, and the cost of the first and last thousand inserts
+  (it stays flat as the index grows);
+- duplicates caught and false merges, against the known clusters;
+- how many copies the old exact-headline check would let through;
+- the time an all-pairs exact Jaccard comparison takes on a sample.
+
+Usage (from backend/):
+    python -m benchmarks.dedup --stories 2000 --max-copies 4
+"""
+import argparse
+import random
+import time
+
+from services.dedup import NEWS_DUP_THRESHOLD, NearDuplicateIndex, headline_shingles
+
+PUBLISHERS = ['Reuters', 'Bloomberg', 'CNBC', 'MarketWatch', 'Yahoo Finance', 'Barron\'s', 'Investopedia']
+
+
+def _vocabulary(rng: random.Random, size: int = 4000):
+    syllables = ['ta', 'ro', 'mi', 'ken', 'dra', 'lo', 'vex', 'sa', 'nor', 'qui', 'pel', 'zu', 'far', 'tem', 'gos']
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def _variant(rng: random.Random, words, headline, summary):
+    """A syndicated copy: one or two small edits to the headline, summary cut or extended"""
+    tokens = headline.split()
+    for _ in range(rng.randint(1, 2)):
+        edit = rng.choice(['suffix', 'case', 'drop', 'add', 'swap'])
+        if edit == 'drop' and len(tokens) > 6:
+            del tokens[rng.randrange(len(tokens))]
+        elif edit == 'add':
+            tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(words))
+        elif edit == 'swap':
+            tokens[rng.randrange(len(tokens))] = rng.choice(words)
+        elif edit == 'case':
+            tokens = [t.capitalize() for t in tokens]
+    text = ' '.join(tokens)
+    if rng.random() < 0.5:
+        text += f' - {rng.choice(PUBLISHERS)}'
+    summary_words = summary.split()
+    if rng.random() < 0.5:
+        summary_words = summary_words[:rng.randint(15, len(summary_words))]
+    else:
+        summary_words += [rng.choice(words) for _ in range(rng.randint(1, 8))]
+    return text, ' '.join(summary_words)
+
+
+def generate(stories: int, max_copies: int, seed: int = 7):
+    """[(cluster id, headline, summary)] with each cluster's copies scattered through the list"""
+    rng = random.Random(seed)
+    words = _vocabulary(rng)
+    articles = []
+    for cluster in range(stories):
+        headline = ' '.join(rng.choice(words) for _ in range(rng.randint(7, 12)))
+        summary = ' '.join(rng.choice(words) for _ in range(rng.randint(25, 40)))
+        articles.append((cluster, headline, summary))
+        for _ in range(rng.randint(0, max_copies)):
+            articles.append((cluster, *_variant(rng, words, headline, summary)))
+    rng.shuffle(articles)
+    return articles
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='MinHash/LSH near-duplicate detection on synthetic news')
+    parser.add_argument('--stories', type=int, default=2000, help='distinct stories')
+    parser.add_argument('--max-copies', type=int, default=4, help='syndicated copies per story (0..n, uniform)')
+    parser.add_argument('--threshold', type=float, default=NEWS_DUP_THRESHOLD)
+    parser.add_argument('--pairwise-sample', type=int, default=1000, help='articles in the all-pairs comparison')
+    args = parser.parse_args(argv)
+
+    articles = generate(args.stories, args.max_copies)
+    index = NearDuplicateIndex(args.threshold)
+    kept_clusters = {}
+    caught = false_merges = 0
+    timings = []
+    started = time.perf_counter()
+    for cluster, headline, summary in articles:
+        t = time.perf_counter()
+        duplicate_of = index.add(headline, summary)
+        timings.append(time.perf_counter() - t)
+        if duplicate_of is None:
+            kept_clusters[len(kept_clusters)] = cluster
+        elif kept_clusters[duplicate_of] == cluster:
+            caught += 1
+        else:
+            false_merges += 1
+    elapsed = time.perf_counter() - started
+
+    copies = len(articles) - args.stories
+    exact_caught = len(articles) - len({headline.strip().lower() for _, headline, _ in articles})
+    missed = len(kept_clusters) - len(set(kept_clusters.values()))
+
+    sample = articles[:args.pairwise_sample]
+    started = time.perf_counter()
+    sets = [headline_shingles(headline) for _, headline, _ in sample]
+    for i in range(len(sets)):
+        for j in range(i):
+            len(sets[i] & sets[j]) / len(sets[i] | sets[j])
+    pairwise = time.perf_counter() - started
+
+    first = sum(timings[:1000]) / min(1000, len(timings)) * 1e6
+    last = sum(timings[-1000:]) / min(1000, len(timings)) * 1e6
+    print(f"\narticles:     {len(articles)} ({args.stories} stories, {copies} syndicated copies)")
+    print(f"throughput:   {len(articles) / elapsed:,.0f} inserts/s ({elapsed:.2f}s)")
+    print(f"per insert:   {first:.0f} us for the first 1000, {last:.0f} us for the last 1000")
+    print(f"caught:       {caught}/{copies} copies ({caught / max(1, copies):.1%}), {missed} missed, "
+          f"{false_merges} false merges")
+    print(f"exact match:  {exact_caught}/{copies} copies caught by the old headline check")
+    print(f"all pairs:    {pairwise:.2f}s for {len(sample)} articles (grows with the square of the count)")
+    return {'inserts_per_s': len(articles) / elapsed, 'caught': caught, 'copies': copies,
+            'missed': missed, 'false_merges': false_merges, 'exact_caught': exact_caught}
+
+
+if __name__ == '__main__':
+    main()
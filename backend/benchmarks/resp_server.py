@@ -0,0 +1,196 @@
+"""Local stand-in for a Redis server, for testing CACHE_BACKEND=redis offline.
+
+Speaks enough RESP2 for services.cache.RedisCache (PING, AUTH, SELECT, GET,
+SET with EX/PX, DEL, EXISTS, DBSIZE, FLUSHDB) and keeps everything in memory.
+Several app processes can point at one instance to check that they share a cache.
+There is no Lua: EVAL/EVALSHA run Python ports of the scripts the app sends
+(the rate limiter's token bucket), registered in SCRIPTS.
+
+Usage (from backend/):
+    python -m benchmarks.resp_server --port 6379
+    CACHE_BACKEND=redis CACHE_REDIS_URL=redis://127.0.0.1:6379/0 gunicorn app:app --workers 4
+    RATE_LIMIT_BACKEND=redis RATE_LIMIT_REDIS_URL=redis://127.0.0.1:6379/0 gunicorn app:app --workers 4
+"""
+import argparse
+import hashlib
+import json
+import socketserver
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.rate_limit import TOKEN_BUCKET_SCRIPT, fair_rate, spend
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Inline command (e.g. typed into telnet)
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _reply(self, value):
+        if value is None:
+            data = b'$-1\r\n'
+        elif isinstance(value, Exception):
+            data = b'-ERR ' + str(value).encode() + b'\r\n'
+        elif isinstance(value, int):
+            data = b':%d\r\n' % value
+        elif isinstance(value, str):
+            data = b'+' + value.encode() + b'\r\n'
+        elif isinstance(value, list):
+            self.wfile.write(b'*%d\r\n' % len(value))
+            for item in value:
+                self._reply(item)
+            return
+        else:
+            data = b'$%d\r\n%s\r\n' % (len(value), value)
+        self.wfile.write(data)
+
+    def handle(self):
+        while True:
+            try:
+                args = self._read_command()
+            except (OSError, ValueError):
+                return
+            if args is None:
+                return
+            if not args:
+                continue
+            try:
+                self._reply(self.server.store.execute(args))
+            except Exception as e:
+                self._reply(e)
+
+
+class RespStore:
+    """Expiring in-memory key/value store behind the RESP server"""
+
+    def __init__(self):
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self.commands = Counter()
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires < time.time():
+            del self._data[key]
+            return None
+        return value
+
+    def execute(self, args: List[bytes]):
+        name = args[0].decode().upper()
+        self.commands[name] += 1
+        with self._lock:
+            if name == 'PING':
+                return 'PONG'
+            if name in ('AUTH', 'SELECT'):
+                return 'OK'
+            if name == 'GET':
+                return self._live(args[1])
+            if name == 'SET':
+                expires = None
+                options = [a.decode().upper() for a in args[3:]]
+                for i, option in enumerate(options[:-1]):
+                    if option == 'EX':
+                        expires = time.time() + float(options[i + 1])
+                    elif option == 'PX':
+                        expires = time.time() + float(options[i + 1]) / 1000
+                self._data[args[1]] = (args[2], expires)
+                return 'OK'
+            if name == 'DEL':
+                return sum(1 for key in args[1:] if self._data.pop(key, None) is not None)
+            if name == 'EXISTS':
+                return sum(1 for key in args[1:] if self._live(key) is not None)
+            if name == 'DBSIZE':
+                return len(self._data)
+            if name in ('FLUSHDB', 'FLUSHALL'):
+                self._data.clear()
+                return 'OK'
+            if name in ('EVAL', 'EVALSHA'):
+                sha = args[1].decode() if name == 'EVALSHA' else hashlib.sha1(args[1]).hexdigest()
+                script = SCRIPTS.get(sha)
+                if script is None:
+                    raise ValueError('NOSCRIPT No matching script' if name == 'EVALSHA' else
+                                     'scripting is not supported by this stand-in')
+                numkeys = int(args[2])
+                return script(self, args[3:3 + numkeys], [a.decode() for a in args[3 + numkeys:]])
+        raise ValueError(f"unknown command '{name}'")
+
+
+def _token_bucket(store: RespStore, keys: List[bytes], argv: List[str]):
+    """services.rate_limit.TOKEN_BUCKET_SCRIPT, with the bucket and active set kept as JSON values"""
+    now, cost, burst, rate, budget, window = (float(a) for a in argv[:6])
+    if budget > 0:
+        active = json.loads(store._live(keys[1]) or b'{}')
+        active[argv[6]] = now
+        active = {client: seen for client, seen in active.items() if seen >= now - window}
+        store._data[keys[1]] = (json.dumps(active).encode(), now + window)
+        rate = fair_rate(rate, budget, len(active))
+    state = json.loads(store._live(keys[0]) or b'[null, null]')
+    allowed, tokens = spend(state[0], state[1], now, cost, burst, rate)
+    store._data[keys[0]] = (json.dumps([tokens, now]).encode(), now + (burst - tokens) / rate + 1)
+    return [int(allowed), repr(tokens), repr(rate)]
+
+
+# sha1 of script source -> Python implementation(store, keys, argv)
+SCRIPTS: Dict[str, Callable] = {
+    hashlib.sha1(TOKEN_BUCKET_SCRIPT.encode('utf-8')).hexdigest(): _token_bucket,
+}
+
+
+class RespServer:
+    """Threaded RESP server on a local port (0 picks a free one)"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer((host, port), _RespHandler)
+        self._server.daemon_threads = True
+        self._server.store = RespStore()
+        self._thread = None
+
+    @property
+    def store(self) -> RespStore:
+        return self._server.store
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'redis://{host}:{port}/0'
+
+    def start(self) -> 'RespServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='resp-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='In-memory RESP (Redis protocol) server for local testing')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6379)
+    args = parser.parse_args(argv)
+    server = RespServer(args.host, args.port)
+    print(f'RESP stand-in listening on {server.url}')
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
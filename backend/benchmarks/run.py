@@ -0,0 +1,265 @@
+"""Offline end-to-end benchmark for the StockSense API.
+
+Starts the provider stubs, points StockService/AIService at them, serves the
+Flask app on a local port and drives the public endpoints at several
+concurrency levels. Results (throughput, p50/p95/p99, upstream call counts)
+are written as JSON so runs can be compared across commits.
+
+Usage (from backend/):
+    python -m benchmarks.run --concurrency 1,4,16 --requests 40
+    python -m benchmarks.run --compare benchmarks/results/<older>.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+
+from benchmarks.resp_server import RespServer
+from benchmarks.stub_providers import StubConfig, StubProviderServer
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+DEFAULT_SYMBOLS = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'TSLA', 'META', 'JPM']
+ENDPOINTS = ('analyze', 'prices', 'refresh', 'batch_refresh', 'chatbot')
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(max(1, math.ceil(pct * len(sorted_values) / 100.0)), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def configure_environment(stub: StubProviderServer, llm: str, yfinance_interval: str):
+    """Point the services at the stubs; must run before app is imported"""
+    os.environ.update(stub.env())
+    os.environ.update({
+        'FINNHUB_API_KEY': 'bench-finnhub',
+        'ALPHA_VANTAGE_KEY': 'bench-alphavantage',
+        'NEWS_API_KEY': 'bench-newsapi',
+        'ANTHROPIC_API_KEY': 'bench-anthropic' if llm == 'anthropic' else '',
+        'OPENAI_API_KEY': 'bench-openai' if llm == 'openai' else '',
+        'YFINANCE_MIN_INTERVAL': yfinance_interval,
+    })
+    no_proxy = os.environ.get('NO_PROXY', '')
+    os.environ['NO_PROXY'] = ','.join(filter(None, [no_proxy, '127.0.0.1', 'localhost']))
+
+
+def configure_cache(backend: str):
+    """Select the response cache; redis gets a local RESP stand-in. Returns that server, if any."""
+    os.environ['CACHE_BACKEND'] = backend
+    if backend == 'sqlite':
+        os.environ['CACHE_SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='bench-cache-'), 'cache.db')
+    if backend == 'redis':
+        server = RespServer().start()
+        os.environ['CACHE_REDIS_URL'] = server.url
+        return server
+    return None
+
+
+def start_app_server(stub: StubProviderServer):
+    """Import the Flask app against the stubs and serve it on an ephemeral port"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    import app as app_module
+    app_module.stock_service.ticker_factory = stub.ticker_factory()
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, name='bench-app', daemon=True)
+    thread.start()
+    return server, f'http://127.0.0.1:{server.server_port}/api'
+
+
+def make_request(session: requests.Session, api_url: str, endpoint: str, i: int, symbols: List[str]):
+    symbol = symbols[i % len(symbols)]
+    if endpoint == 'analyze':
+        return session.post(f'{api_url}/analyze', json={'symbol': symbol}, timeout=120)
+    if endpoint == 'prices':
+        return session.post(f'{api_url}/prices', json={'symbols': symbols}, timeout=120)
+    if endpoint == 'refresh':
+        return session.get(f'{api_url}/refresh/{symbol}', timeout=120)
+    if endpoint == 'batch_refresh':
+        # Latency here is time until the whole NDJSON stream has been read
+        return session.post(f'{api_url}/refresh', json={'symbols': symbols}, timeout=300)
+    if endpoint == 'chatbot':
+        questions = ['What is a P/E ratio?', 'How do dividends work?', 'What is market cap?',
+                     f'Explain why {symbol} might be volatile']
+        return session.post(f'{api_url}/chatbot', json={'message': questions[i % len(questions)]}, timeout=120)
+    raise ValueError(f'unknown endpoint {endpoint}')
+
+
+def run_level(api_url: str, endpoint: str, concurrency: int, total: int, symbols: List[str]) -> Dict:
+    local = threading.local()
+
+    def one(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = make_request(session, api_url, endpoint, i, symbols)
+            ok = response.status_code < 400
+            status = response.status_code
+        except requests.RequestException:
+            ok, status = False, 0
+        return time.perf_counter() - start, ok, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(o[0] * 1000 for o in outcomes)
+    errors = sum(1 for o in outcomes if not o[1])
+    statuses = {}
+    for o in outcomes:
+        statuses[str(o[2])] = statuses.get(str(o[2]), 0) + 1
+    return {
+        'endpoint': endpoint,
+        'concurrency': concurrency,
+        'requests': total,
+        'errors': errors,
+        'statuses': statuses,
+        'duration_s': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 3) if elapsed else 0,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 2) if latencies else 0,
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'max': round(latencies[-1], 2) if latencies else 0
+        }
+    }
+
+
+def compare(current: Dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r['endpoint'], r['concurrency']): r for r in baseline.get('results', [])}
+    print(f"\nComparison against {baseline_path} ({baseline.get('meta', {}).get('git_commit', '?')})")
+    print(f"{'endpoint':<10}{'conc':>6}{'rps':>10}{'Δrps':>9}{'p50':>10}{'Δp50':>9}{'p95':>10}{'Δp95':>9}")
+    for result in current['results']:
+        old = previous.get((result['endpoint'], result['concurrency']))
+        if not old:
+            continue
+
+        def delta(new, prev):
+            return f'{(new - prev) / prev * 100:+.0f}%' if prev else 'n/a'
+        print(f"{result['endpoint']:<10}{result['concurrency']:>6}"
+              f"{result['throughput_rps']:>10.2f}{delta(result['throughput_rps'], old['throughput_rps']):>9}"
+              f"{result['latency_ms']['p50']:>10.1f}{delta(result['latency_ms']['p50'], old['latency_ms']['p50']):>9}"
+              f"{result['latency_ms']['p95']:>10.1f}{delta(result['latency_ms']['p95'], old['latency_ms']['p95']):>9}")
+
+
+def parse_overrides(values: List[str]) -> Dict[str, Dict]:
+    """Parse --provider finnhub:latency=0.2,rate_limit_rate=0.1"""
+    overrides = {}
+    for value in values or []:
+        provider, _, settings = value.partition(':')
+        for pair in filter(None, settings.split(',')):
+            key, _, number = pair.partition('=')
+            overrides.setdefault(provider, {})[key] = float(number)
+    return overrides
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline StockSense benchmark against local provider stubs')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='comma-separated subset of ' + ','.join(ENDPOINTS))
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=40, help='requests per endpoint and concurrency level')
+    parser.add_argument('--symbols', default=','.join(DEFAULT_SYMBOLS))
+    parser.add_argument('--latency', type=float, default=0.05, help='default provider latency in seconds')
+    parser.add_argument('--llm-latency', type=float, default=0.8, help='LLM stub latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.2, help='relative latency jitter')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of stub calls answered with 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of stub calls answered with 429')
+    parser.add_argument('--provider', action='append', help='per-provider override, e.g. yahoo:latency=0.3,rate_limit_rate=0.2')
+    parser.add_argument('--llm', choices=['anthropic', 'openai', 'none'], default='anthropic')
+    parser.add_argument('--yfinance-interval', default='0.5', help='YFINANCE_MIN_INTERVAL for the run')
+    parser.add_argument('--cache', choices=['none', 'memory', 'sqlite', 'redis'], default='none',
+                        help='CACHE_BACKEND for the run (none keeps upstream call counts comparable across runs)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=str(DEFAULT_RESULTS_DIR), help='directory for the JSON result file')
+    parser.add_argument('--compare', help='earlier result JSON to diff against')
+    args = parser.parse_args(argv)
+
+    config = StubConfig(latency=args.latency, llm_latency=args.llm_latency, jitter=args.jitter,
+                        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                        seed=args.seed, overrides=parse_overrides(args.provider))
+    stub = StubProviderServer(config).start()
+    configure_environment(stub, args.llm, args.yfinance_interval)
+    cache_server = configure_cache(args.cache)
+    server, api_url = start_app_server(stub)
+
+    symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()]
+    levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+    endpoints = [e.strip() for e in args.endpoints.split(',') if e.strip()]
+
+    results = []
+    try:
+        for endpoint in endpoints:
+            for level in levels:
+                stub.reset_counts()
+                result = run_level(api_url, endpoint, level, args.requests, symbols)
+                result['upstream_calls'] = stub.call_counts()
+                results.append(result)
+                lat = result['latency_ms']
+                print(f"{endpoint:<8} c={level:<3} {result['throughput_rps']:8.2f} req/s  "
+                      f"p50={lat['p50']:8.1f}ms p95={lat['p95']:8.1f}ms p99={lat['p99']:8.1f}ms  errors={result['errors']}")
+    finally:
+        server.shutdown()
+        stub.stop()
+        if cache_server:
+            cache_server.stop()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'symbols': symbols,
+            'stub_config': config.to_dict(),
+            'args': vars(args)
+        },
+        'results': results
+    }
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['meta']['git_commit']}.json"
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nResults written to {output_path}')
+
+    if args.compare:
+        compare(report, args.compare)
+    return report
+
+
+if __name__ == '__main__':
+    main()
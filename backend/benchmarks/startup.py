@@ -0,0 +1,149 @@
+"""Startup-time benchmark for the StockSense backend.
+
+Runs `import app` in fresh interpreters with -X importtime and reports the
+import cost per module and per top-level package, time until /api/health
+answers, and time until the background warm-up has loaded the LLM clients
+and yfinance. Results are written as JSON next to the load benchmark's.
+
+Usage (from backend/):
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --compare benchmarks/results/<older>.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.run import BACKEND_DIR, DEFAULT_RESULTS_DIR, git_commit
+
+# Runs inside the child interpreter; prints one JSON line with its timings
+CHILD_SCRIPT = '''
+import json, sys, time
+t0 = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+client.get('/api/health')
+healthy = time.perf_counter()
+app.warmup_done.wait(60)
+warm = time.perf_counter()
+sys.stdout.write('STARTUP_RESULT ' + json.dumps({'import_ms': (imported - t0) * 1000, 'health_ms': (healthy - t0) * 1000,
+                  'warm_ms': (warm - t0) * 1000}) + '\\n')
+'''
+
+
+def child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # Dummy keys so the warm-up builds both LLM clients (constructing them makes no network calls)
+    env.setdefault('ANTHROPIC_API_KEY', 'bench-anthropic')
+    env.setdefault('OPENAI_API_KEY', 'bench-openai')
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Parse `-X importtime` lines into {module, self_us, cumulative_us, depth}"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        # Nesting is shown by two spaces of indent per level after the single separator space
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append({'module': name.strip(), 'self_us': int(self_us), 'cumulative_us': int(cumulative_us), 'depth': depth})
+    return rows
+
+
+def measure_imports() -> Dict:
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=BACKEND_DIR,
+                            env=dict(child_env(), STARTUP_WARMUP='0'), capture_output=True, text=True)
+    rows = parse_importtime(result.stderr)
+    app_row = next((r for r in rows if r['module'] == 'app'), None)
+    packages = {}
+    for row in rows:
+        package = row['module'].split('.')[0]
+        packages[package] = packages.get(package, 0) + row['self_us']
+    top_packages = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:15]
+    # Direct imports of app (depth 1) show what app.py itself pays for
+    direct = [r for r in rows if r['depth'] == 1]
+    return {
+        'app_import_ms': round(app_row['cumulative_us'] / 1000, 1) if app_row else None,
+        'by_package_ms': {name: round(us / 1000, 1) for name, us in top_packages},
+        'app_direct_imports_ms': {r['module']: round(r['cumulative_us'] / 1000, 1)
+                                  for r in sorted(direct, key=lambda r: r['cumulative_us'], reverse=True)[:15]},
+        'slowest_modules_ms': {r['module']: round(r['self_us'] / 1000, 1)
+                               for r in sorted(rows, key=lambda r: r['self_us'], reverse=True)[:15]},
+    }
+
+
+def measure_startup(runs: int) -> Dict:
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', CHILD_SCRIPT], cwd=BACKEND_DIR, env=child_env(),
+                                capture_output=True, text=True)
+        match = re.search(r'STARTUP_RESULT (\{[^\n]*?\})', result.stdout)
+        if result.returncode != 0 or not match:
+            raise RuntimeError(f'startup run failed:\n{result.stderr[-2000:]}')
+        samples.append(json.loads(match.group(1)))
+    return {key: round(statistics.median(s[key] for s in samples), 1) for key in samples[0]}
+
+
+def compare(current: Dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nComparison against {baseline_path} ({baseline.get('meta', {}).get('git_commit', '?')})")
+    for key, value in current['startup_ms'].items():
+        old = baseline.get('startup_ms', {}).get(key)
+        if old:
+            print(f"{key:<12}{value:>10.1f}ms  {(value - old) / old * 100:+.0f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='StockSense backend startup-time benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to time (median is reported)')
+    parser.add_argument('--output', default=str(DEFAULT_RESULTS_DIR), help='directory for the JSON result file')
+    parser.add_argument('--compare', help='earlier startup result JSON to diff against')
+    args = parser.parse_args(argv)
+
+    imports = measure_imports()
+    startup = measure_startup(args.runs)
+
+    print(f"import app: {imports['app_import_ms']}ms")
+    print('import cost by package:')
+    for name, ms in imports['by_package_ms'].items():
+        print(f'  {name:<28}{ms:>8.1f}ms')
+    print(f"time to import: {startup['import_ms']}ms  to /api/health: {startup['health_ms']}ms  "
+          f"to warm: {startup['warm_ms']}ms (median of {args.runs})")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': vars(args)
+        },
+        'startup_ms': startup,
+        'imports': imports
+    }
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"startup-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['meta']['git_commit']}.json"
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nResults written to {output_path}')
+
+    if args.compare:
+        compare(report, args.compare)
+    return report
+
+
+if __name__ == '__main__':
+    main()
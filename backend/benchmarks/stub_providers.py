@@ -0,0 +1,549 @@
+"""Local stand-ins for every upstream provider StockSense talks to.
+
+One threaded HTTP server answers Finnhub, Alpha Vantage, NewsAPI, StockTwits,
+Reddit, Google News, Yahoo Finance (via StubTicker), Anthropic and OpenAI
+requests with deterministic per-symbol payloads. Latency, error rate and 429
+injection are configurable per provider so benchmarks can reproduce slow or
+flaky upstreams without touching the real APIs.
+"""
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+import requests
+
+PROVIDERS = ('finnhub', 'alphavantage', 'newsapi', 'stocktwits', 'reddit',
+             'googlenews', 'yahoo', 'anthropic', 'openai')
+
+STUB_REASONING = """**1. Company Description**
+
+{symbol} is a stub company used for offline benchmarking. It sells simulated products to simulated customers. It holds a simulated market position.
+
+**2. Recent News Summary**
+
+{symbol} has seen routine simulated news flow. Nothing here reflects a real company.
+
+**3. Reasons to Buy for Long-Term**
+
+• **Stub Strength**: Generated locally for benchmarking.
+
+**4. Reasons Not to Buy for Long-Term**
+
+• **Stub Weakness**: Generated locally for benchmarking.
+
+**5. Long-Term Risk Assessment**
+
+The overall risk level is Medium for this stub response.
+
+**6. Market Correlation**
+
+{symbol} follows the simulated market. This says nothing about diversification.
+
+**7. Short-Term Tendencies**
+
+{symbol} moves with simulated volatility.
+
+**8. Summary**
+
+This is a canned response from the local LLM stub."""
+
+# Long enough to count as a real answer (short replies are not reused by the chat answer index)
+STUB_CHAT_ANSWER = """This is a canned educational answer from the local LLM stub.
+
+A real answer would explain the concept in plain language, give a short worked example
+and point out what beginners should keep in mind when they see it on a stock page."""
+
+
+class StubConfig:
+    """Per-provider latency (seconds), error rate and 429 rate"""
+
+    def __init__(self, latency: float = 0.05, llm_latency: float = 0.8, jitter: float = 0.2,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, seed: int = 42,
+                 overrides: Dict[str, Dict] = None):
+        self.defaults = {'latency': latency, 'error_rate': error_rate, 'rate_limit_rate': rate_limit_rate}
+        self.llm_latency = llm_latency
+        self.jitter = jitter
+        self.seed = seed
+        self.overrides = overrides or {}
+
+    def for_provider(self, provider: str) -> Dict:
+        settings = dict(self.defaults)
+        if provider in ('anthropic', 'openai'):
+            settings['latency'] = self.llm_latency
+        settings.update(self.overrides.get(provider, {}))
+        return settings
+
+    def to_dict(self) -> Dict:
+        return {
+            'defaults': self.defaults,
+            'llm_latency': self.llm_latency,
+            'jitter': self.jitter,
+            'seed': self.seed,
+            'overrides': self.overrides
+        }
+
+
+def _symbol_rng(symbol: str) -> random.Random:
+    return random.Random(zlib.crc32(symbol.upper().encode('utf-8')))
+
+
+def _quote(symbol: str) -> Dict:
+    rng = _symbol_rng(symbol)
+    previous_close = round(rng.uniform(20, 500), 2)
+    current = round(previous_close * (1 + rng.uniform(-0.04, 0.04)), 2)
+    return {
+        'c': current,
+        'pc': previous_close,
+        'dp': round((current - previous_close) / previous_close * 100, 2),
+        'h': round(max(current, previous_close) * 1.01, 2),
+        'l': round(min(current, previous_close) * 0.99, 2),
+        'o': previous_close
+    }
+
+
+def _articles(symbol: str, count: int, days: int = 7):
+    rng = _symbol_rng(symbol + ':news')
+    now = datetime.now(timezone.utc)
+    topics = ['earnings beat', 'new product launch', 'analyst upgrade', 'regulatory review',
+              'market rally', 'supply chain update', 'dividend announcement', 'guidance cut']
+    articles = []
+    for i in range(count):
+        published = now - timedelta(minutes=rng.randint(5, days * 24 * 60))
+        topic = topics[rng.randrange(len(topics))]
+        articles.append({
+            'headline': f'{symbol} {topic} #{i}',
+            'summary': f'Simulated coverage of {symbol}: {topic}. Article {i} for offline benchmarking.',
+            'source': rng.choice(['Reuters', 'Bloomberg', 'CNBC', 'MarketWatch']),
+            'url': f'https://stub.local/{symbol.lower()}/{i}',
+            'published': published
+        })
+    return articles
+
+
+def _info(symbol: str) -> Dict:
+    rng = _symbol_rng(symbol + ':info')
+    quote_data = _quote(symbol)
+    return {
+        'longName': f'{symbol} Stub Corp',
+        'sector': rng.choice(['Technology', 'Healthcare', 'Financial Services', 'Energy']),
+        'industry': 'Simulated Industry',
+        'marketCap': rng.randint(1, 3000) * 1_000_000_000,
+        'currentPrice': quote_data['c'],
+        'previousClose': quote_data['pc'],
+        'longBusinessSummary': f'{symbol} Stub Corp makes simulated products. It serves simulated customers. It competes in a simulated market.',
+        'website': 'https://stub.local',
+        'trailingPE': round(rng.uniform(8, 45), 2),
+        'priceToBook': round(rng.uniform(0.6, 12), 2),
+        'totalDebt': rng.randint(1, 100) * 1_000_000_000,
+        'totalCurrentAssets': rng.randint(1, 100) * 1_000_000_000,
+        'totalAssets': rng.randint(100, 400) * 1_000_000_000,
+        'currentRatio': round(rng.uniform(0.6, 3), 2),
+        'quickRatio': round(rng.uniform(0.4, 2.5), 2),
+        'trailingEps': round(rng.uniform(-2, 15), 2),
+        'forwardEps': round(rng.uniform(0, 16), 2),
+        'earningsQuarterlyGrowth': round(rng.uniform(-0.3, 0.5), 3),
+        'dividendRate': round(rng.uniform(0, 4), 2),
+        'dividendYield': round(rng.uniform(0, 0.05), 4),
+        'payoutRatio': round(rng.uniform(0, 0.8), 3),
+        'profitMargins': round(rng.uniform(-0.05, 0.35), 3),
+        'operatingMargins': round(rng.uniform(0, 0.4), 3),
+        'returnOnEquity': round(rng.uniform(-0.1, 0.5), 3),
+        'returnOnAssets': round(rng.uniform(-0.05, 0.2), 3),
+        'targetMeanPrice': round(quote_data['c'] * 1.1, 2),
+        'targetHighPrice': round(quote_data['c'] * 1.3, 2),
+        'targetLowPrice': round(quote_data['c'] * 0.8, 2),
+        'recommendationKey': rng.choice(['buy', 'hold', 'sell'])
+    }
+
+
+def _history(symbol: str, days: int = 260) -> Dict:
+    """Daily OHLCV bars ending today, as columns keyed by ISO date"""
+    rng = _symbol_rng(symbol + ':history')
+    price = _quote(symbol)['pc']
+    closes = []
+    for _ in range(days):
+        closes.append(price)
+        price = max(1.0, price / (1 + rng.gauss(0, 0.015)))
+    closes.reverse()
+    today = datetime.now(timezone.utc).date()
+    dates = []
+    day = today
+    while len(dates) < days:
+        if day.weekday() < 5:
+            dates.append(day)
+        day -= timedelta(days=1)
+    dates.reverse()
+    return {
+        'index': [d.isoformat() for d in dates],
+        'Open': [round(c * (1 + rng.uniform(-0.01, 0.01)), 2) for c in closes],
+        'High': [round(c * 1.015, 2) for c in closes],
+        'Low': [round(c * 0.985, 2) for c in closes],
+        'Close': [round(c, 2) for c in closes],
+        'Volume': [rng.randint(1_000_000, 50_000_000) for _ in closes]
+    }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server_version = 'StockSenseStub/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    # -- plumbing -------------------------------------------------------
+    def _send(self, status: int, body, content_type: str = 'application/json'):
+        if not isinstance(body, (bytes, str)):
+            body = json.dumps(body)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if status == 429:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _inject_faults(self, provider: str) -> bool:
+        """Sleep for the configured latency; return True if an error was sent instead of a payload"""
+        stub = self.server.stub
+        settings = stub.config.for_provider(provider)
+        rng = stub.next_rng()
+        latency = settings['latency'] * (1 + rng.uniform(-stub.config.jitter, stub.config.jitter))
+        if latency > 0:
+            time.sleep(latency)
+        roll = rng.random()
+        if roll < settings['rate_limit_rate']:
+            stub.record(provider, 429)
+            self._send(429, {'error': 'rate limited (stub)'})
+            return True
+        if roll < settings['rate_limit_rate'] + settings['error_rate']:
+            stub.record(provider, 500)
+            self._send(500, {'error': 'internal error (stub)'})
+            return True
+        stub.record(provider, 200)
+        return False
+
+    def _route(self, method: str):
+        parsed = urlparse(self.path)
+        parts = [unquote(p) for p in parsed.path.strip('/').split('/') if p]
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        if not parts or parts[0] not in PROVIDERS:
+            self._send(404, {'error': 'unknown stub provider'})
+            return
+        provider = parts[0]
+        body = {}
+        if method == 'POST':
+            length = int(self.headers.get('Content-Length', 0) or 0)
+            raw = self.rfile.read(length) if length else b''
+            try:
+                body = json.loads(raw or b'{}')
+            except ValueError:
+                body = {}
+        if self._inject_faults(provider):
+            return
+        handler = getattr(self, f'_handle_{provider}')
+        handler(parts[1:], params, body)
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+    # -- providers ------------------------------------------------------
+    def _handle_finnhub(self, parts, params, body):
+        path = '/'.join(parts)
+        symbol = params.get('symbol', 'STUB')
+        if path == 'quote':
+            self._send(200, _quote(symbol))
+        elif path == 'stock/recommendation':
+            rng = _symbol_rng(symbol + ':recs')
+            self._send(200, [{
+                'strongBuy': rng.randint(0, 10), 'buy': rng.randint(0, 15), 'hold': rng.randint(0, 12),
+                'sell': rng.randint(0, 4), 'strongSell': rng.randint(0, 2),
+                'period': datetime.now().strftime('%Y-%m-01'), 'symbol': symbol
+            }])
+        elif path in ('company-news', 'news'):
+            source_symbol = symbol if path == 'company-news' else 'MARKET'
+            days = 30 if path == 'company-news' else 1
+            since = params.get('from')
+            items = []
+            for article in _articles(source_symbol, 40, days):
+                if since and article['published'].strftime('%Y-%m-%d') < since:
+                    continue
+                headline = article['headline'] if path == 'company-news' else f"Stock market {article['headline']}"
+                items.append({
+                    'headline': headline, 'summary': article['summary'], 'source': article['source'],
+                    'url': article['url'], 'datetime': int(article['published'].timestamp()), 'image': ''
+                })
+            self._send(200, items)
+        else:
+            self._send(404, {'error': f'unknown finnhub path {path}'})
+
+    def _handle_alphavantage(self, parts, params, body):
+        function = params.get('function')
+        symbol = params.get('symbol', 'STUB')
+        if function == 'GLOBAL_QUOTE':
+            q = _quote(symbol)
+            self._send(200, {'Global Quote': {
+                '01. symbol': symbol, '05. price': str(q['c']), '08. previous close': str(q['pc']),
+                '10. change percent': f"{q['dp']}%"
+            }})
+        elif function == 'OVERVIEW':
+            info = _info(symbol)
+            self._send(200, {
+                'Symbol': symbol, 'Name': info['longName'], 'Sector': info['sector'],
+                'Industry': info['industry'], 'MarketCapitalization': str(info['marketCap']),
+                'PERatio': str(info['trailingPE']), 'Description': info['longBusinessSummary'],
+                '52WeekHigh': str(round(info['currentPrice'] * 1.2, 2))
+            })
+        else:
+            self._send(200, {})
+
+    def _handle_newsapi(self, parts, params, body):
+        query = params.get('q', '')
+        symbol = query.split(' OR ')[0].strip() if ' OR ' in query and len(query) < 80 else 'MARKET'
+        since = params.get('from')
+        articles = []
+        for article in _articles(symbol, 20):
+            published = article['published'].strftime('%Y-%m-%dT%H:%M:%SZ')
+            if since and published[:len(since)] < since:
+                continue
+            articles.append({
+                'title': article['headline'], 'description': article['summary'], 'content': article['summary'],
+                'source': {'name': article['source']}, 'url': article['url'] + '?via=newsapi',
+                'urlToImage': '', 'publishedAt': published
+            })
+        self._send(200, {'status': 'ok', 'totalResults': len(articles), 'articles': articles})
+
+    def _handle_stocktwits(self, parts, params, body):
+        symbol = parts[-1].replace('.json', '') if parts else 'STUB'
+        rng = _symbol_rng(symbol + ':stocktwits')
+        words = ['bull run ahead', 'buying more', 'going to crash', 'sell now', 'holding steady', 'to the moon']
+        self._send(200, {'messages': [{'body': f'${symbol} {rng.choice(words)}'} for _ in range(30)]})
+
+    def _handle_reddit(self, parts, params, body):
+        symbol = params.get('q', 'STUB')
+        rng = _symbol_rng(symbol + ':reddit:' + '/'.join(parts))
+        words = ['strong growth', 'bad quarter', 'long term hold', 'scam warning', 'good entry']
+        children = [{'data': {'title': f'{symbol} {rng.choice(words)}', 'selftext': ''}} for _ in range(10)]
+        self._send(200, {'data': {'children': children}})
+
+    def _handle_googlenews(self, parts, params, body):
+        symbol = params.get('q', 'STUB').split(' ')[0]
+        items = ''.join(f'<item><title>{a["headline"]} surge</title><link>{a["url"]}</link></item>'
+                        for a in _articles(symbol, 20))
+        self._send(200, f'<?xml version="1.0"?><rss><channel>{items}</channel></rss>', 'application/rss+xml')
+
+    def _handle_yahoo(self, parts, params, body):
+        attribute, symbol = (parts + ['', ''])[:2]
+        if attribute == 'info':
+            self._send(200, _info(symbol))
+        elif attribute == 'news':
+            self._send(200, [{
+                'content': {
+                    'title': a['headline'] + ' (Yahoo)', 'summary': a['summary'],
+                    'canonicalUrl': {'url': a['url'] + '?via=yahoo'},
+                    'pubDate': a['published'].strftime('%Y-%m-%dT%H:%M:%SZ')
+                },
+                'provider': {'displayName': a['source']}
+            } for a in _articles(symbol, 20)])
+        elif attribute == 'history':
+            self._send(200, _history(symbol))
+        elif attribute == 'recommendations_summary':
+            rng = _symbol_rng(symbol + ':recs')
+            self._send(200, [{'period': '0m', 'strongBuy': rng.randint(0, 10), 'buy': rng.randint(0, 15),
+                              'hold': rng.randint(0, 12), 'sell': rng.randint(0, 4), 'strongSell': rng.randint(0, 2)}])
+        else:
+            self._send(200, [])
+
+    def _handle_anthropic(self, parts, params, body):
+        prompt = json.dumps(body.get('messages', []))
+        symbol = _guess_symbol(prompt)
+        text = STUB_REASONING.format(symbol=symbol) if 'Stock Symbol' in prompt else STUB_CHAT_ANSWER
+        usage = {'input_tokens': len(prompt) // 4, 'output_tokens': len(text) // 4}
+        system = body.get('system') or ''
+        if isinstance(system, list):
+            # Blocks up to the last cache_control marker form the cacheable prefix
+            marked = [i for i, block in enumerate(system) if block.get('cache_control')]
+            cut = marked[-1] + 1 if marked else 0
+            prefix = ''.join(block.get('text', '') for block in system[:cut])
+            rest = ''.join(block.get('text', '') for block in system[cut:])
+            if prefix and len(prefix) // 4 >= _anthropic_cache_minimum(body.get('model', '')):
+                kind = 'cache_read_input_tokens' if self.server.stub.seen_prefix(prefix) else 'cache_creation_input_tokens'
+                usage[kind] = len(prefix) // 4
+            else:
+                # Below the model's minimum the marker is ignored and the prefix is billed as plain input
+                rest = prefix + rest
+            usage['input_tokens'] += len(rest) // 4
+        else:
+            usage['input_tokens'] += len(system) // 4
+        self._send(200, {
+            'id': 'msg_stub', 'type': 'message', 'role': 'assistant', 'model': body.get('model', 'stub'),
+            'content': [{'type': 'text', 'text': text}], 'stop_reason': 'end_turn', 'stop_sequence': None,
+            'usage': usage
+        })
+
+    def _handle_openai(self, parts, params, body):
+        prompt = json.dumps(body.get('messages', []))
+        symbol = _guess_symbol(prompt)
+        text = STUB_REASONING.format(symbol=symbol) if 'Stock Symbol' in prompt else STUB_CHAT_ANSWER
+        self._send(200, {
+            'id': 'chatcmpl-stub', 'object': 'chat.completion', 'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(text) // 4,
+                      'total_tokens': (len(prompt) + len(text)) // 4,
+                      'prompt_tokens_details': {'cached_tokens': self._openai_cached_tokens(body.get('messages', []))}}
+        })
+
+    def _openai_cached_tokens(self, messages) -> int:
+        """OpenAI caches identical prompt prefixes of 1024+ tokens automatically; model the system message"""
+        system = messages[0].get('content', '') if messages and messages[0].get('role') == 'system' else ''
+        if len(system) // 4 < 1024:
+            return 0
+        return len(system) // 4 if self.server.stub.seen_prefix(system) else 0
+
+
+def _anthropic_cache_minimum(model: str) -> int:
+    """Shortest prefix (tokens) Anthropic will cache for a model: 2048 for Haiku, 1024 otherwise"""
+    return 2048 if 'haiku' in model else 1024
+
+
+def _guess_symbol(prompt: str) -> str:
+    marker = 'Stock Symbol: '
+    if marker in prompt:
+        return prompt.split(marker, 1)[1].split('\\n', 1)[0].split('\n', 1)[0].strip()
+    return 'STUB'
+
+
+class StubProviderServer:
+    """Threaded HTTP server hosting every provider stub under /<provider>/..."""
+
+    def __init__(self, config: StubConfig = None, host: str = '127.0.0.1', port: int = 0):
+        self.config = config or StubConfig()
+        self._httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+        self._thread = None
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.calls = Counter()
+        self._prefixes = set()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def next_rng(self) -> random.Random:
+        with self._lock:
+            return random.Random(self._rng.random())
+
+    def record(self, provider: str, status: int):
+        with self._lock:
+            self.calls[f'{provider}:{status}'] += 1
+
+    def call_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(sorted(self.calls.items()))
+
+    def seen_prefix(self, text: str) -> bool:
+        """True if this prompt prefix was sent before (i.e. it would be a prompt-cache hit)"""
+        key = zlib.crc32(text.encode('utf-8'))
+        with self._lock:
+            seen = key in self._prefixes
+            self._prefixes.add(key)
+        return seen
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls.clear()
+
+    def start(self) -> 'StubProviderServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='stub-providers', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables that point StockService and AIService at this server"""
+        base = self.base_url
+        return {
+            'FINNHUB_BASE_URL': f'{base}/finnhub',
+            'ALPHA_VANTAGE_BASE_URL': f'{base}/alphavantage',
+            'NEWS_API_BASE_URL': f'{base}/newsapi',
+            'STOCKTWITS_BASE_URL': f'{base}/stocktwits',
+            'REDDIT_BASE_URL': f'{base}/reddit',
+            'GOOGLE_NEWS_BASE_URL': f'{base}/googlenews',
+            # Both SDKs read these natively
+            'ANTHROPIC_BASE_URL': f'{base}/anthropic',
+            'OPENAI_BASE_URL': f'{base}/openai/v1',
+        }
+
+    def ticker_factory(self):
+        """Drop-in replacement for yf.Ticker backed by the /yahoo stub"""
+        base = self.base_url
+
+        def factory(symbol):
+            return StubTicker(symbol, base)
+        return factory
+
+
+class StubTicker:
+    """Minimal yf.Ticker look-alike: info, news, history(), recommendations*"""
+
+    def __init__(self, symbol: str, base_url: str):
+        self.ticker = symbol
+        self._base_url = base_url
+
+    def _get(self, attribute: str, params: Optional[Dict] = None):
+        response = requests.get(f'{self._base_url}/yahoo/{attribute}/{quote(self.ticker, safe="")}',
+                                params=params, timeout=10)
+        # Raises requests.HTTPError with .response set, like yfinance does on 429
+        response.raise_for_status()
+        return response.json()
+
+    @property
+    def info(self) -> Dict:
+        return self._get('info')
+
+    @property
+    def news(self):
+        return self._get('news')
+
+    def history(self, period: str = '1mo', start=None, end=None, interval: str = '1d', **kwargs):
+        import pandas as pd
+        data = self._get('history')
+        frame = pd.DataFrame({k: v for k, v in data.items() if k != 'index'},
+                             index=pd.to_datetime(data['index']))
+        if start is not None:
+            frame = frame[frame.index >= pd.to_datetime(start)]
+        if end is not None:
+            frame = frame[frame.index < pd.to_datetime(end)]
+        if start is None and end is None:
+            days = {'1d': 1, '5d': 5, '1mo': 21, '3mo': 63, '6mo': 126, '1y': 252, '2y': 504}.get(period)
+            if days:
+                frame = frame.iloc[-days:]
+        return frame
+
+    @property
+    def recommendations_summary(self):
+        import pandas as pd
+        return pd.DataFrame(self._get('recommendations_summary'))
+
+    @property
+    def recommendations(self):
+        import pandas as pd
+        return pd.DataFrame()
@@ -0,0 +1,14 @@
+"""Loads backend/.env into the environment.
+
+Imported before anything else by app.py and by the services and database
+packages, so settings read when a module is imported (pool sizes, rate limits,
+DATABASE_PATH, ...) see the values in .env. Variables already set in the
+environment win over the file.
+"""
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ENV_PATH = Path(__file__).parent / '.env'
+
+load_dotenv(dotenv_path=ENV_PATH)
@@ -1,2 +1,2 @@
 # Database package
-
+import config  # noqa: F401  (load .env before DATABASE_PATH is read)
@@ -1,12 +1,13 @@
+import json
 import sqlite3
 import os
 from datetime import datetime
 
-DB_PATH = os.path.join(os.path.dirname(__file__), 'stocks.db')
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), 'stocks.db')
 
 def get_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(DB_PATH)
+    """Get database connection (DATABASE_PATH is read on every call, so it can be set after import)"""
+    conn = sqlite3.connect(os.getenv('DATABASE_PATH') or DEFAULT_DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -23,6 +24,83 @@ def init_db():
         )
     ''')
     
+    # Latest precomputed AI recommendation per symbol and the hash of the inputs it was built from
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS recommendations (
+            symbol TEXT PRIMARY KEY,
+            input_hash TEXT NOT NULL,
+            recommendation TEXT NOT NULL,
+            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Bulk recommendation runs and per-symbol progress, so an interrupted run can resume
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bulk_runs (
+            run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            total INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bulk_items (
+            run_id INTEGER NOT NULL,
+            symbol TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            error TEXT,
+            finished_at TIMESTAMP,
+            PRIMARY KEY (run_id, symbol)
+        )
+    ''')
+    
+    # Chatbot conversations: a summary of older turns plus the recent turns verbatim
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chat_sessions (
+            session_id TEXT PRIMARY KEY,
+            summary TEXT NOT NULL DEFAULT '',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chat_turns (
+            session_id TEXT NOT NULL,
+            turn INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            PRIMARY KEY (session_id, turn)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated ON chat_sessions (updated_at)')
+    
+    # Company news kept across fetches (one row per article, first provider to report it wins)
+    # and per-provider high-water marks, so each fetch only asks for newer articles
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS news_articles (
+            symbol TEXT NOT NULL,
+            headline_key TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            headline TEXT NOT NULL,
+            summary TEXT,
+            source TEXT,
+            url TEXT NOT NULL DEFAULT '',
+            published INTEGER NOT NULL DEFAULT 0,
+            fetched_at REAL NOT NULL,
+            PRIMARY KEY (symbol, headline_key)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_news_symbol_published ON news_articles (symbol, published DESC)')
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_news_symbol_url ON news_articles (symbol, url) WHERE url != ''")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS news_cursors (
+            symbol TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            last_published INTEGER NOT NULL,
+            checked_at REAL NOT NULL,
+            PRIMARY KEY (symbol, provider)
+        )
+    ''')
+    
     conn.commit()
     conn.close()
 
@@ -75,3 +153,238 @@ def update_stock_timestamp(symbol):
     conn.commit()
     conn.close()
 
+def is_starred(symbol):
+    """Whether a symbol is on the starred list"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('SELECT 1 FROM starred_stocks WHERE symbol = ?', (symbol,))
+    row = cursor.fetchone()
+    
+    conn.close()
+    
+    return row is not None
+
+def get_saved_recommendation(symbol):
+    """Latest precomputed recommendation for a symbol, or None"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('SELECT symbol, input_hash, recommendation, generated_at FROM recommendations WHERE symbol = ?', (symbol,))
+    row = cursor.fetchone()
+    
+    conn.close()
+    
+    if row is None:
+        return None
+    saved = dict(row)
+    saved['recommendation'] = json.loads(saved['recommendation'])
+    return saved
+
+def save_recommendation(symbol, input_hash, recommendation):
+    """Store the latest recommendation for a symbol, replacing the previous one"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        INSERT OR REPLACE INTO recommendations (symbol, input_hash, recommendation, generated_at)
+        VALUES (?, ?, ?, ?)
+    ''', (symbol, input_hash, json.dumps(recommendation), datetime.now()))
+    
+    conn.commit()
+    conn.close()
+
+def delete_recommendation(symbol):
+    """Drop the stored recommendation for a symbol"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('DELETE FROM recommendations WHERE symbol = ?', (symbol,))
+    
+    conn.commit()
+    conn.close()
+
+def create_bulk_run(symbols):
+    """Record a new bulk run over symbols and return its id"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('INSERT INTO bulk_runs (total, created_at) VALUES (?, ?)', (len(symbols), datetime.now()))
+    run_id = cursor.lastrowid
+    cursor.executemany('INSERT OR IGNORE INTO bulk_items (run_id, symbol) VALUES (?, ?)',
+                       [(run_id, symbol) for symbol in symbols])
+    
+    conn.commit()
+    conn.close()
+    
+    return run_id
+
+def get_bulk_run(run_id):
+    """A bulk run with its item counts by status, or None"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('SELECT run_id, created_at, total FROM bulk_runs WHERE run_id = ?', (run_id,))
+    row = cursor.fetchone()
+    cursor.execute('SELECT status, COUNT(*) AS n FROM bulk_items WHERE run_id = ? GROUP BY status', (run_id,))
+    counts = {r['status']: r['n'] for r in cursor.fetchall()}
+    
+    conn.close()
+    
+    if row is None:
+        return None
+    return dict(row, **{status: counts.get(status, 0) for status in ('pending', 'done', 'failed')})
+
+def pending_bulk_items(run_id):
+    """Symbols of a run that have not completed yet (pending or failed)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT symbol FROM bulk_items WHERE run_id = ? AND status != 'done' ORDER BY symbol", (run_id,))
+    rows = cursor.fetchall()
+    
+    conn.close()
+    
+    return [row['symbol'] for row in rows]
+
+def mark_bulk_item(run_id, symbol, status, error=None):
+    """Checkpoint one symbol of a bulk run as done or failed"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        UPDATE bulk_items
+        SET status = ?, error = ?, finished_at = ?
+        WHERE run_id = ? AND symbol = ?
+    ''', (status, error, datetime.now(), run_id, symbol))
+    
+    conn.commit()
+    conn.close()
+
+def get_chat_session(session_id, min_updated_at=0):
+    """A chat session with its stored turns in order, or None if missing or last used before min_updated_at"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('SELECT session_id, summary, updated_at FROM chat_sessions WHERE session_id = ? AND updated_at >= ?',
+                   (session_id, min_updated_at))
+    row = cursor.fetchone()
+    turns = []
+    if row is not None:
+        cursor.execute('SELECT turn, role, content FROM chat_turns WHERE session_id = ? ORDER BY turn', (session_id,))
+        turns = [dict(turn) for turn in cursor.fetchall()]
+    
+    conn.close()
+    
+    if row is None:
+        return None
+    return dict(row, turns=turns)
+
+def append_chat_turns(session_id, turns, updated_at):
+    """Append (role, content) turns to a session, creating it if needed"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        INSERT INTO chat_sessions (session_id, updated_at) VALUES (?, ?)
+        ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at
+    ''', (session_id, updated_at))
+    cursor.execute('SELECT COALESCE(MAX(turn), -1) FROM chat_turns WHERE session_id = ?', (session_id,))
+    start = cursor.fetchone()[0] + 1
+    cursor.executemany('INSERT INTO chat_turns (session_id, turn, role, content) VALUES (?, ?, ?, ?)',
+                       [(session_id, start + i, role, content) for i, (role, content) in enumerate(turns)])
+    
+    conn.commit()
+    conn.close()
+
+def compact_chat_session(session_id, summary, first_kept_turn):
+    """Replace a session's summary and drop the turns it now covers"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('UPDATE chat_sessions SET summary = ? WHERE session_id = ?', (summary, session_id))
+    cursor.execute('DELETE FROM chat_turns WHERE session_id = ? AND turn < ?', (session_id, first_kept_turn))
+    
+    conn.commit()
+    conn.close()
+
+def purge_chat_sessions(updated_before):
+    """Delete sessions last used before a timestamp; returns how many"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('DELETE FROM chat_turns WHERE session_id IN (SELECT session_id FROM chat_sessions WHERE updated_at < ?)',
+                   (updated_before,))
+    cursor.execute('DELETE FROM chat_sessions WHERE updated_at < ?', (updated_before,))
+    removed = cursor.rowcount
+    
+    conn.commit()
+    conn.close()
+    
+    return removed
+
+def get_news_cursor(symbol, provider):
+    """Publish time of the newest article a provider has returned for a symbol, or None"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('SELECT last_published FROM news_cursors WHERE symbol = ? AND provider = ?', (symbol, provider))
+    row = cursor.fetchone()
+    
+    conn.close()
+    
+    return row['last_published'] if row else None
+
+def store_news_articles(symbol, provider, articles, fetched_at, last_published):
+    """Insert articles not already stored (same headline or URL) and move the provider's cursor;
+    returns how many were new"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    before = conn.total_changes
+    cursor.executemany('''
+        INSERT OR IGNORE INTO news_articles
+            (symbol, headline_key, provider, headline, summary, source, url, published, fetched_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [(symbol, article['headline'].strip().lower(), provider, article['headline'], article.get('summary'),
+           article.get('source'), article.get('url') or '', article.get('date') or 0, fetched_at)
+          for article in articles])
+    added = conn.total_changes - before
+    cursor.execute('''
+        INSERT INTO news_cursors (symbol, provider, last_published, checked_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(symbol, provider) DO UPDATE SET
+            last_published = MAX(last_published, excluded.last_published), checked_at = excluded.checked_at
+    ''', (symbol, provider, last_published, fetched_at))
+    
+    conn.commit()
+    conn.close()
+    
+    return added
+
+def get_stored_news(symbol, limit):
+    """Newest stored articles for a symbol, most recent first"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        SELECT headline, summary, source, url, published AS date FROM news_articles
+        WHERE symbol = ? ORDER BY published DESC LIMIT ?
+    ''', (symbol, limit))
+    rows = cursor.fetchall()
+    
+    conn.close()
+    
+    return [dict(row) for row in rows]
+
+def purge_news(published_before):
+    """Delete stored articles published before a timestamp; returns how many"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('DELETE FROM news_articles WHERE published < ?', (published_before,))
+    removed = cursor.rowcount
+    
+    conn.commit()
+    conn.close()
+    
+    return removed
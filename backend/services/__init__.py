@@ -1,2 +1,2 @@
 # Services package
-
+import config  # noqa: F401  (load .env before any service reads its settings)
@@ -0,0 +1,147 @@
+import contextvars
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from services.metrics import registry
+
+# LLM calls in flight at once in this process, across providers and endpoints (LLM_CONCURRENCY)
+DEFAULT_LLM_CONCURRENCY = 8
+# Requests per endpoint allowed to wait for an LLM slot; beyond that they are shed at once.
+# Keep capacity plus all queues well under the gunicorn thread count so /api/health always gets a thread.
+# Override with ADMISSION_QUEUE_LIMITS="analyze=6,refresh=6,chatbot=4". Unlisted queues wait without a bound.
+DEFAULT_QUEUE_LIMITS = {
+    'analyze': 6,
+    'refresh': 6,
+    'chatbot': 4,
+}
+# Seconds a queued request waits for a slot before it is shed (ADMISSION_MAX_WAIT)
+DEFAULT_MAX_WAIT = 10.0
+# Flask endpoint -> admission queue; LLM work started anywhere else (precompute, bulk) is 'background'
+ENDPOINT_QUEUES = {
+    'analyze_stock': 'analyze',
+    'analyze_section': 'analyze',
+    'refresh_stock': 'refresh',
+    'refresh_stocks': 'refresh',
+    'chatbot': 'chatbot',
+}
+BACKGROUND_QUEUE = 'background'
+
+ADMISSION_IN_FLIGHT = registry.gauge(
+    'stocksense_llm_admission_in_flight',
+    'LLM calls holding an admission slot')
+ADMISSION_WAITING = registry.gauge(
+    'stocksense_llm_admission_waiting',
+    'Requests queued for an LLM admission slot',
+    ('queue',))
+ADMISSION_SHED = registry.counter(
+    'stocksense_llm_admission_shed_total',
+    'Requests refused an LLM slot (queue full or wait timed out)',
+    ('queue', 'reason'))
+
+_current_queue = contextvars.ContextVar('stocksense_admission_queue', default=BACKGROUND_QUEUE)
+
+
+class Overloaded(Exception):
+    """No LLM capacity for this request; retry_after is a suggested wait in seconds"""
+
+    def __init__(self, queue: str, retry_after: int):
+        super().__init__(f"LLM capacity exhausted ({queue} queue); retry in {retry_after}s")
+        self.queue = queue
+        self.retry_after = retry_after
+
+
+def _parse_limits(value: str) -> Dict[str, int]:
+    limits = {}
+    for pair in filter(None, (p.strip() for p in value.split(','))):
+        name, _, number = pair.partition('=')
+        try:
+            limits[name.strip()] = max(0, int(number))
+        except ValueError:
+            print(f"Ignoring invalid ADMISSION_QUEUE_LIMITS entry: {pair}")
+    return limits
+
+
+def enter_queue(endpoint: Optional[str]):
+    """Tag the current request (and work propagated from it) with its endpoint's admission queue"""
+    _current_queue.set(ENDPOINT_QUEUES.get(endpoint, BACKGROUND_QUEUE))
+
+
+def current_queue() -> str:
+    return _current_queue.get()
+
+
+class AdmissionController:
+    """Global cap on concurrent LLM calls, with a bounded wait queue per endpoint.
+
+    A request that finds every slot busy waits only if its queue has room and
+    only up to max_wait; otherwise it gets Overloaded right away, so a traffic
+    spike turns into quick refusals or degraded answers instead of every worker
+    thread blocking on LLM calls.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_LLM_CONCURRENCY, queue_limits: Optional[Dict[str, int]] = None,
+                 max_wait: float = DEFAULT_MAX_WAIT):
+        self.capacity = max(1, capacity)
+        self.queue_limits = dict(DEFAULT_QUEUE_LIMITS)
+        self.queue_limits.update(queue_limits or {})
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._waiting: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Smoothed time a slot is held, for Retry-After
+        self._hold_seconds = 5.0
+
+    @classmethod
+    def from_env(cls) -> 'AdmissionController':
+        """Controller configured from the environment as it is when called (after .env is loaded)"""
+        return cls(capacity=int(os.getenv('LLM_CONCURRENCY', DEFAULT_LLM_CONCURRENCY)),
+                   queue_limits=_parse_limits(os.getenv('ADMISSION_QUEUE_LIMITS', '')),
+                   max_wait=float(os.getenv('ADMISSION_MAX_WAIT', DEFAULT_MAX_WAIT)))
+
+    def retry_after(self, queue: str) -> int:
+        """Seconds until a slot is likely free for a new request in this queue"""
+        with self._lock:
+            ahead = self._waiting.get(queue, 0) + 1
+        return max(1, min(60, math.ceil(self._hold_seconds * math.ceil(ahead / self.capacity))))
+
+    def _shed(self, queue: str, reason: str):
+        ADMISSION_SHED.inc(queue=queue, reason=reason)
+        raise Overloaded(queue, self.retry_after(queue))
+
+    @contextmanager
+    def slot(self, queue: Optional[str] = None):
+        """Hold one LLM slot; raises Overloaded when the queue is full or the wait times out"""
+        queue = queue or current_queue()
+        if not self._slots.acquire(blocking=False):
+            limit = self.queue_limits.get(queue)
+            with self._lock:
+                waiting = self._waiting.get(queue, 0)
+                admitted = limit is None or waiting < limit
+                if admitted:
+                    self._waiting[queue] = waiting + 1
+            if not admitted:
+                self._shed(queue, 'queue_full')
+            ADMISSION_WAITING.inc(queue=queue)
+            try:
+                acquired = self._slots.acquire(timeout=None if limit is None else self.max_wait)
+            finally:
+                ADMISSION_WAITING.dec(queue=queue)
+                with self._lock:
+                    self._waiting[queue] -= 1
+            if not acquired:
+                self._shed(queue, 'timeout')
+        ADMISSION_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ADMISSION_IN_FLIGHT.dec()
+            self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * (time.perf_counter() - started)
+            self._slots.release()
+
+
+llm_admission = AdmissionController.from_env()
@@ -1,147 +1,68 @@
+import asyncio
 import os
-from typing import Dict, List
-import anthropic
-import openai
-
-class AIService:
-    def __init__(self):
-        self.anthropic_key = os.getenv('ANTHROPIC_API_KEY', '')
-        self.openai_key = os.getenv('OPENAI_API_KEY', '')
-        
-        # Initialize clients
-        self.claude_client = None
-        self.openai_client = None
-        
-        if self.anthropic_key and 'your_' not in self.anthropic_key:
-            try:
-                # Initialize Anthropic client - explicitly only pass api_key
-                # Clear any proxy-related environment variables that might interfere
-                import os as os_env
-                old_http_proxy = os_env.environ.pop('HTTP_PROXY', None)
-                old_https_proxy = os_env.environ.pop('HTTPS_PROXY', None)
-                try:
-                    self.claude_client = anthropic.Anthropic(api_key=self.anthropic_key)
-                    print(f"✅ Anthropic client initialized (key length: {len(self.anthropic_key)})")
-                finally:
-                    # Restore proxy env vars if they existed
-                    if old_http_proxy:
-                        os_env.environ['HTTP_PROXY'] = old_http_proxy
-                    if old_https_proxy:
-                        os_env.environ['HTTPS_PROXY'] = old_https_proxy
-            except Exception as e:
-                print(f"❌ Failed to initialize Anthropic client: {e}")
-        
-        if self.openai_key and 'your_' not in self.openai_key:
-            try:
-                # Initialize OpenAI client - explicitly only pass api_key
-                # Clear any proxy-related environment variables that might interfere
-                import os as os_env
-                old_http_proxy = os_env.environ.pop('HTTP_PROXY', None)
-                old_https_proxy = os_env.environ.pop('HTTPS_PROXY', None)
-                try:
-                    self.openai_client = openai.OpenAI(api_key=self.openai_key)
-                    print(f"✅ OpenAI client initialized (key length: {len(self.openai_key)})")
-                finally:
-                    # Restore proxy env vars if they existed
-                    if old_http_proxy:
-                        os_env.environ['HTTP_PROXY'] = old_http_proxy
-                    if old_https_proxy:
-                        os_env.environ['HTTPS_PROXY'] = old_https_proxy
-            except Exception as e:
-                print(f"❌ Failed to initialize OpenAI client: {e}")
-        
-        if not self.claude_client and not self.openai_client:
-            print("⚠️  WARNING: No AI clients initialized. Chatbot will use fallback responses.")
-    
-    def generate_recommendation(self, symbol: str, company_data: Dict, news_data: Dict, 
-                               sentiment_data: Dict, analyst_data: Dict) -> Dict:
-        """Generate AI-powered recommendation"""
-        
-        # Build comprehensive context for AI
-        company_desc = company_data.get('description', 'No description available.')
-        
-        # Format financial metrics
-        pe_ratio = company_data.get('peRatio')
-        pb_ratio = company_data.get('pbRatio')
-        current_ratio = company_data.get('currentRatio')
-        total_debt = company_data.get('totalDebt', 0)
-        current_assets = company_data.get('currentAssets', 0)
-        debt_to_current = company_data.get('debtToCurrentAssetsRatio')
-        trailing_eps = company_data.get('trailingEps')
-        earnings_growth = company_data.get('earningsGrowth')
-        dividend_yield = company_data.get('dividendYield')
-        has_dividend = company_data.get('hasDividend', False)
-        profit_margins = company_data.get('profitMargins')
-        credit_rating = company_data.get('creditRating')
-        
-        context = f"""
-Stock Symbol: {symbol}
-
-COMPANY OVERVIEW:
-{company_desc}
-
-BASIC INFORMATION:
-- Company Name: {company_data.get('name', 'N/A')}
-- Sector: {company_data.get('sector', 'N/A')}
-- Industry: {company_data.get('industry', 'N/A')}
-- Current Stock Price: ${company_data.get('currentPrice', 0):.2f}
-- Price Change Today: {company_data.get('changePercent', 0):.2f}%
-- Market Capitalization: ${company_data.get('marketCap', 0):,}
-- Years Public: {company_data.get('yearsPublic', 'N/A')} years
-
-FINANCIAL METRICS FOR VALUE INVESTING ANALYSIS:
-
-1. VALUATION METRICS:
-- P/E Ratio (Price-to-Earnings): {pe_ratio if pe_ratio else 'Not available'}
-  (Lower is better. Good: under 15-20. Shows if stock is cheap relative to earnings)
-- P/B Ratio (Price-to-Book): {pb_ratio if pb_ratio else 'Not available'}
-  (Lower is better. Good: around 1.2 or lower. Shows if stock trades below asset value)
-
-2. DEBT ANALYSIS:
-- Total Debt: {'$' + f"{total_debt:,.0f}" if total_debt else 'Not available'}
-- Current Assets: {'$' + f"{current_assets:,.0f}" if current_assets else 'Not available'}
-- Debt to Current Assets Ratio: {f"{debt_to_current:.1f}%" if debt_to_current else "Not available"}
-  (Good: debt under 110% of current assets indicates conservative financing)
-
-3. LIQUIDITY:
-- Current Ratio (Current Assets / Current Liabilities): {current_ratio if current_ratio else 'Not available'}
-  (Good: 1.5 or higher indicates strong liquidity and ability to pay short-term obligations)
-
-4. EARNINGS QUALITY:
-- Trailing EPS (Earnings Per Share): {'$' + f"{trailing_eps:.2f}" if trailing_eps else 'Not available'}
-- Earnings Growth: {f"{earnings_growth:.1f}%" if earnings_growth else 'Not available'}
-  (Look for consistent positive growth)
-
-5. DIVIDEND HISTORY:
-- Pays Dividends: {'Yes' if has_dividend else 'No'}
-- Dividend Yield: {f"{dividend_yield:.2f}%" if dividend_yield else 'Not available'}
-  (Look for 20+ years of continuous dividend payments for financial health)
-
-6. PROFITABILITY:
-- Profit Margins: {f"{profit_margins:.2f}%" if profit_margins else 'Not available'}
-  (Higher margins indicate efficient operations)
-
-7. QUALITY RATING:
-- Credit Rating: {credit_rating if credit_rating else 'Not available'}
-  (Seek S&P B+ or better for quality companies)
-
-Recent News Summary:
-{self._format_news(news_data)}
-
-Social Sentiment:
-- Reddit: {sentiment_data.get('reddit', {}).get('positive', 0)}% Positive, {sentiment_data.get('reddit', {}).get('negative', 0)}% Negative
-- Twitter: {sentiment_data.get('twitter', {}).get('positive', 0)}% Positive, {sentiment_data.get('twitter', {}).get('negative', 0)}% Negative
-
-Professional Analyst Opinions:
-- Buy Recommendations: {analyst_data.get('buyCount', 0)}
-- Hold Recommendations: {analyst_data.get('holdCount', 0)}
-- Sell Recommendations: {analyst_data.get('sellCount', 0)}
-- Average Price Target: ${analyst_data.get('averagePriceTarget', 'N/A')}
-"""
-        
-        prompt = f"""{context}
-
-Based on the comprehensive information above, provide a balanced, educational investment analysis for {symbol}. 
+import threading
+import weakref
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+from services.metrics import provider_call, record_llm_usage
+from services.tracing import span, annotate
+from services.admission import Overloaded, llm_admission
+from services.answer_index import AnswerIndex
+from services.chat_intents import fallback_intents
+from services.chat_memory import history_messages, history_tokens
+from services.prompt_budget import (DEFAULT_PROMPT_BUDGET, MIN_DESCRIPTION_TOKENS, MIN_NEWS_TOKENS, PROMPT_TOKENS,
+                                    budget_for, compact_description, estimate_tokens, fit_lines, rank_news)
+from services.cassette import cassette
+from services.limits import provider_limits
+from services.cache import get_cache
+from services.content_hash import content_hash
+
+# Static half of the recommendation prompt. It is identical for every symbol, so it is
+# sent as a system block marked for provider-side prompt caching; the per-symbol data
+# goes in the user message. Editing this text invalidates cached prompts and answers.
+# Keep it above PROMPT_CACHE_MIN_TOKENS: shorter blocks are never cached by claude-3-haiku,
+# the first model tried.
+RECOMMENDATION_SYSTEM_PROMPT = """You are a helpful financial advisor who explains investment decisions in simple, beginner-friendly terms. You ALWAYS provide BALANCED analysis showing both strengths and weaknesses. No stock is perfect - you must explain what metrics mean in context, not just whether they're 'good' or 'bad'. Focus on education and helping beginners understand trade-offs.
+
+The user message contains the data gathered for one stock: company overview, basic information, financial metrics, recent news, social sentiment, analyst opinions and price behavior. Base the analysis on that data.
+
+HOW TO READ THE FINANCIAL METRICS (value investing guidelines):
+1. Valuation:
+- P/E Ratio (Price-to-Earnings): lower is better. Good: under 15-20. Shows if the stock is cheap relative to earnings
+- P/B Ratio (Price-to-Book): lower is better. Good: around 1.2 or lower. Shows if the stock trades below asset value
+2. Debt: debt under 110% of current assets indicates conservative financing
+3. Liquidity: a Current Ratio (Current Assets / Current Liabilities) of 1.5 or higher indicates strong liquidity and ability to pay short-term obligations
+4. Earnings quality: look for consistent positive EPS growth
+5. Dividend history: look for 20+ years of continuous dividend payments for financial health
+6. Profitability: higher profit margins indicate efficient operations
+7. Quality rating: seek an S&P credit rating of B+ or better for quality companies
+
+HOW TO READ THE PRICE BEHAVIOR FIGURES (computed from the last 12 months of daily closes):
+- Annualized volatility: under 25% is low for a single stock, 25-45% moderate, above 45% high. Compare the 20-day figure with the 1-year figure: a much higher 20-day number means the stock has become unusually jumpy recently
+- Beta vs the S&P 500: about 1.0 means the stock tends to move with the market; above 1.3 it usually amplifies market moves; below 0.7 it moves more independently or more calmly. A beta near 0 with high volatility means the stock swings on its own news rather than with the market
+- Maximum drawdown: the largest fall from a peak to a later low within the year. It shows how much patience a holder needed; a drawdown beyond -30% is severe for an established company
+- Moving averages: a last close above both the 50-day and 200-day averages suggests an established uptrend; below both suggests a downtrend; between them suggests a transition. Do not present this as a trading signal
+- RSI (14-day): above 70 is often called overbought and below 30 oversold. Treat it as a description of recent momentum, never as a prediction
+- 52-week range position: near 100% the price is close to its yearly high, near 0% close to its yearly low. Mention it when it helps explain recent sentiment or news
+
+HOW TO USE NEWS, SENTIMENT AND ANALYST DATA:
+- Headlines are listed most relevant first. Summarize themes (earnings, products, regulation, management changes, lawsuits, acquisitions) rather than repeating headlines word for word, and never invent events that are not in the headlines
+- If the news list says some headlines were omitted, base the summary on the ones shown
+- Social sentiment percentages reflect retail investor mood on social platforms. They are noisy and can swing quickly; mention them as context, not as evidence of value
+- Analyst counts show professional opinion. A strong majority of buy ratings is worth mentioning, but explain that analysts can be wrong and often follow price momentum. Compare any average price target with the current price in plain terms
+- When sentiment, analyst opinion and fundamentals disagree, say so explicitly; that disagreement is itself useful information for a beginner
+
+HANDLING MISSING DATA:
+- Fields the data could not provide are listed together under "Not available". Do not guess their values and do not treat a missing value as good or bad
+- If a metric you would normally discuss is missing, say briefly that it was not available and move on to the metrics that are present
+- If price behavior is not available, base Market Correlation and Short-Term Tendencies on the sector and the company's size, and say that measured price data was not available
+- If there is no recent news, say that no notable recent news was found instead of inventing developments
+
+FORMATTING RULES:
+- Use the eight numbered section headings exactly as given below, each in bold, in that order
+- Bullet points start with "• " followed by a bold title, a colon and the explanation
+- Quote figures as given in the data (rounded sensibly), with units: %, $, or x for ratios where helpful
+- Keep the whole analysis between roughly 450 and 700 words
 
 CRITICAL INSTRUCTIONS:
 - DO NOT provide direct buy/hold/sell recommendations
@@ -178,11 +99,11 @@ REQUIRED ANALYSIS STRUCTURE (follow exactly):
    - Mention specific risk factors that could impact long-term holding
 
 6. **Market Correlation** (exactly 2 sentences):
-   - Sentence 1: Does this stock follow the broader market (S&P 500) closely or move independently?
+   - Sentence 1: Does this stock follow the broader market (S&P 500) closely or move independently? Use the beta from Price Behavior when available
    - Sentence 2: Explain what this means for diversification
 
 7. **Short-Term Tendencies** (2-3 sentences):
-   - Describe the stock's volatility and short-term price behavior
+   - Describe the stock's volatility and short-term price behavior using the Price Behavior figures (volatility, drawdown, moving averages, RSI, 52-week range)
    - Mention if it's prone to sharp swings, steady, or reactive to news
 
 8. **Summary** (3-4 sentences):
@@ -196,61 +117,441 @@ WRITING STYLE:
 - Be objective and factual
 - Present both positive and negative aspects fairly
 - Do NOT end with "you should buy/sell/hold" - let the facts speak for themselves
-"""
+
+EXAMPLE OF THE EXPECTED ANSWER (a fictional company; shows format and tone only, never reuse its facts):
+
+**1. Company Description**
+
+Northwind Tools designs and sells power tools, hand tools and replacement batteries under its own brand. Its customers are professional contractors and home improvement shoppers, reached through large hardware retailers and its own online store. It is one of the three largest tool makers in North America, helped by a battery platform that works across its whole product line.
+
+**2. Recent News Summary**
+
+Northwind Tools recently reported quarterly sales slightly ahead of expectations, helped by demand from professional contractors, while announcing a cost-cutting program for its consumer division. News also covered a product recall of one cordless saw model and a new distribution agreement in Europe, which together drew a mixed market reaction.
+
+**3. Reasons to Buy for Long-Term**
+
+• **Reasonable Valuation**: The P/E ratio of 16.2 sits inside the 15-20 range value investors usually look for, meaning you pay about $16 for each dollar of yearly earnings.
+• **Solid Liquidity**: A current ratio of 1.8 means the company has $1.80 of short-term assets for every dollar due within a year, comfortably above the 1.5 guideline.
+• **Long Dividend Record**: The company has paid dividends for more than 25 years, which points to steady cash generation through several economic cycles.
+• **Platform Advantage**: Customers who own its batteries tend to keep buying compatible tools, which makes revenue more predictable.
+
+**4. Reasons Not to Buy for Long-Term**
+
+• **Cyclical Demand**: Tool sales depend on housing and construction activity, so earnings can fall sharply in a downturn.
+• **Rising Debt**: Debt equals 125% of current assets, above the 110% guideline, which leaves less room for error if sales slow.
+• **Product Quality Risk**: The recent recall shows that quality problems can bring costs and damage the brand.
+• **Retailer Concentration**: A large share of sales goes through a few big retailers, which gives those retailers bargaining power over prices.
+
+**5. Long-Term Risk Assessment**
+
+The overall risk level is Medium. The business is established and profitable, but its debt is above the conservative guideline and its sales depend on the housing cycle. A prolonged construction slowdown combined with higher interest costs would be the main threat to long-term holders.
+
+**6. Market Correlation**
+
+With a beta of 1.2, Northwind Tools has tended to move a little more than the S&P 500, rising more in strong markets and falling more in weak ones. That means it adds limited diversification to a portfolio already heavy in economically sensitive stocks.
+
+**7. Short-Term Tendencies**
+
+Northwind Tools has shown moderate volatility, with annualized swings of about 31% and a maximum decline of 22% over the past year. The price sits above its 200-day average but below its 50-day average, suggesting the longer uptrend has paused, and it tends to react sharply to earnings reports and housing data.
+
+**8. Summary**
+
+Northwind Tools combines a reasonable valuation, healthy liquidity and a long dividend record with above-guideline debt and exposure to the housing cycle. Its battery platform supports repeat purchases, while recalls and retailer concentration are real weaknesses. Investors weighing it should consider how comfortable they are with a cyclical business carrying more debt than conservative guidelines suggest."""
+
+# Recommendation models in the order tried: fastest first, larger models if it fails
+CLAUDE_RECOMMENDATION_MODELS = [
+    ("claude-3-haiku-20240307", 1200),  # Fastest model, fewer tokens
+    ("claude-3-5-sonnet-20241022", 1500)  # Fallback if haiku fails
+]
+OPENAI_RECOMMENDATION_MODELS = ["gpt-4o-mini", "gpt-4o", "gpt-4"]
+# Concurrent LLM calls in generate_recommendations_bulk and bulk jobs
+BULK_LLM_CONCURRENCY = int(os.getenv('BULK_LLM_CONCURRENCY', '16'))
+
+# Smallest prompt prefix Anthropic caches for claude-3-haiku (other Claude models cache from 1024 tokens)
+PROMPT_CACHE_MIN_TOKENS = 2048
+
+# Anthropic system blocks; cache_control makes later calls read the block from the prompt cache
+RECOMMENDATION_SYSTEM_BLOCKS = [
+    {"type": "text", "text": RECOMMENDATION_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+]
+
+
+class AIService:
+    def __init__(self):
+        self.anthropic_key = os.getenv('ANTHROPIC_API_KEY', '')
+        self.openai_key = os.getenv('OPENAI_API_KEY', '')
         
-        # Try Claude first (faster), then OpenAI, then return mock
-        # Use shorter timeout by trying faster models first
-        try:
-            if self.claude_client:
-                return self._get_claude_recommendation(prompt)
-        except Exception as e:
-            print(f"Claude recommendation error: {e}")
+        # Clients (and the anthropic/openai SDKs, ~1.5s of imports) are created on first
+        # use or by the startup warm-up thread, so the app can serve requests immediately
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+        self._async_by_loop = weakref.WeakKeyDictionary()
+        # LLM answers are cached by prompt hash in the shared cache (CACHE_BACKEND)
+        self.cache = get_cache()
+        # Past chat answers by question similarity, local to this process
+        self.answer_index = AnswerIndex()
+        
+        has_claude = bool(self.anthropic_key and 'your_' not in self.anthropic_key) or cassette.has_provider('claude')
+        has_openai = bool(self.openai_key and 'your_' not in self.openai_key) or cassette.has_provider('openai')
+        if not has_claude and not has_openai:
+            print("⚠️  WARNING: No AI clients initialized. Chatbot will use fallback responses.")
+    
+    def _client(self, name: str, create):
+        if name not in self._clients:
+            with self._clients_lock:
+                if name not in self._clients:
+                    self._clients[name] = create()
+        return self._clients[name]
+    
+    @property
+    def claude_client(self):
+        return self._client('claude', self._create_claude_client)
+    
+    @claude_client.setter
+    def claude_client(self, client):
+        self._clients['claude'] = client
+    
+    @property
+    def openai_client(self):
+        return self._client('openai', self._create_openai_client)
+    
+    @openai_client.setter
+    def openai_client(self, client):
+        self._clients['openai'] = client
+    
+    def warm_up(self):
+        """Import the SDKs and build both clients ahead of the first request"""
+        return self.claude_client, self.openai_client
+    
+    def _create_claude_client(self):
+        client = None
+        if self.anthropic_key and 'your_' not in self.anthropic_key:
+            try:
+                import anthropic
+                # Initialize Anthropic client - explicitly only pass api_key
+                # Clear any proxy-related environment variables that might interfere
+                old_http_proxy = os.environ.pop('HTTP_PROXY', None)
+                old_https_proxy = os.environ.pop('HTTPS_PROXY', None)
+                try:
+                    client = anthropic.Anthropic(api_key=self.anthropic_key)
+                    print(f"✅ Anthropic client initialized (key length: {len(self.anthropic_key)})")
+                finally:
+                    # Restore proxy env vars if they existed
+                    if old_http_proxy:
+                        os.environ['HTTP_PROXY'] = old_http_proxy
+                    if old_https_proxy:
+                        os.environ['HTTPS_PROXY'] = old_https_proxy
+            except Exception as e:
+                print(f"❌ Failed to initialize Anthropic client: {e}")
+        # Record/replay LLM traffic when CASSETTE_MODE is set (replay needs no API keys)
+        return cassette.wrap_anthropic(client)
+    
+    def _create_openai_client(self):
+        client = None
+        if self.openai_key and 'your_' not in self.openai_key:
+            try:
+                import openai
+                # Initialize OpenAI client - explicitly only pass api_key
+                # Clear any proxy-related environment variables that might interfere
+                old_http_proxy = os.environ.pop('HTTP_PROXY', None)
+                old_https_proxy = os.environ.pop('HTTPS_PROXY', None)
+                try:
+                    client = openai.OpenAI(api_key=self.openai_key)
+                    print(f"✅ OpenAI client initialized (key length: {len(self.openai_key)})")
+                finally:
+                    # Restore proxy env vars if they existed
+                    if old_http_proxy:
+                        os.environ['HTTP_PROXY'] = old_http_proxy
+                    if old_https_proxy:
+                        os.environ['HTTPS_PROXY'] = old_https_proxy
+            except Exception as e:
+                print(f"❌ Failed to initialize OpenAI client: {e}")
+        return cassette.wrap_openai(client)
+    
+    def generate_recommendation(self, symbol: str, company_data: Dict, news_data: Dict, 
+                               sentiment_data: Dict, analyst_data: Dict, technical_data: Dict = None,
+                               fallback: bool = True) -> Dict:
+        """Generate AI-powered recommendation.
+        
+        With fallback=False, raises instead of returning the mock recommendation
+        when no LLM answers (used where a mock must not be stored).
+        """
+        # Budget the prompt for the model that will answer first
+        model = CLAUDE_RECOMMENDATION_MODELS[0][0] if self.claude_client else OPENAI_RECOMMENDATION_MODELS[0]
+        with span('llm.prompt_build'):
+            prompt = self._build_recommendation_prompt(symbol, company_data, news_data, sentiment_data, analyst_data,
+                                                       technical_data, budget=budget_for(model))
+        
+        # Same inputs give the same prompt; reuse the answer another worker already paid for
+        prompt_key = content_hash([RECOMMENDATION_SYSTEM_PROMPT, prompt])
+        cached = self.cache.get('recommendation', prompt_key)
+        if cached is not None:
+            return cached
         
         try:
-            if self.openai_client:
-                return self._get_openai_recommendation(prompt)
-        except Exception as e:
-            print(f"OpenAI recommendation error: {e}")
+            # One global admission slot per LLM request; shed when the endpoint's queue is full
+            with llm_admission.slot() if (self.claude_client or self.openai_client) else nullcontext():
+                # Try Claude first (faster), then OpenAI, then return mock
+                # Use shorter timeout by trying faster models first
+                try:
+                    if self.claude_client:
+                        with span('llm.call', provider='claude'):
+                            recommendation = self._get_claude_recommendation(prompt)
+                        self.cache.set('recommendation', prompt_key, recommendation)
+                        return recommendation
+                except Exception as e:
+                    print(f"Claude recommendation error: {e}")
+        
+                try:
+                    if self.openai_client:
+                        with span('llm.call', provider='openai'):
+                            recommendation = self._get_openai_recommendation(prompt)
+                        self.cache.set('recommendation', prompt_key, recommendation)
+                        return recommendation
+                except Exception as e:
+                    print(f"OpenAI recommendation error: {e}")
+        except Overloaded as e:
+            if not fallback:
+                raise
+            print(f"Recommendation for {symbol} degraded to mock: {e}")
+            return dict(self._get_mock_recommendation(symbol, company_data, analyst_data, news_data, technical_data),
+                        degraded=True)
+        
+        if not fallback:
+            raise RuntimeError(f"No LLM recommendation available for {symbol}")
         
         # Fallback to mock recommendation if no API keys or all failed
-        return self._get_mock_recommendation(symbol, company_data, analyst_data, news_data)
+        return self._get_mock_recommendation(symbol, company_data, analyst_data, news_data, technical_data)
     
-    def _get_claude_recommendation(self, prompt: str) -> Dict:
-        """Get recommendation from Claude API - optimized for speed"""
-        # Try faster model first (haiku), fallback to sonnet if needed
-        models_to_try = [
-            ("claude-3-haiku-20240307", 1200),  # Fastest model, fewer tokens
-            ("claude-3-5-sonnet-20241022", 1500)  # Fallback if haiku fails
+    # -- bulk generation -------------------------------------------------
+    def _async_clients(self):
+        """(AsyncAnthropic, AsyncOpenAI) for the running event loop; either may be None.
+        
+        Async clients hold connection pools bound to one loop, so each loop gets
+        its own. None while a cassette is active: it wraps the sync clients only.
+        """
+        loop = asyncio.get_running_loop()
+        clients = self._async_by_loop.get(loop)
+        if clients is None:
+            claude = openai_client = None
+            if not (cassette.recording or cassette.replaying):
+                try:
+                    if self.anthropic_key and 'your_' not in self.anthropic_key:
+                        import anthropic
+                        claude = anthropic.AsyncAnthropic(api_key=self.anthropic_key)
+                    if self.openai_key and 'your_' not in self.openai_key:
+                        import openai
+                        openai_client = openai.AsyncOpenAI(api_key=self.openai_key)
+                except Exception as e:
+                    print(f"❌ Failed to initialize async LLM clients: {e}")
+            clients = self._async_by_loop[loop] = (claude, openai_client)
+        return clients
+    
+    async def agenerate_recommendation(self, symbol: str, data: Dict, semaphore: asyncio.Semaphore) -> Dict:
+        """Async generate_recommendation(fallback=False) for bulk jobs; data holds the analysis sections.
+        
+        The semaphore bounds concurrent LLM calls across the whole job.
+        """
+        inputs = dict(
+            symbol=symbol,
+            company_data=data.get('company') or {},
+            news_data=data.get('news') or [],
+            sentiment_data=data.get('sentiment') or {},
+            analyst_data=data.get('analyst') or {},
+            technical_data=data.get('technicals') or {},
+        )
+        claude, openai_client = self._async_clients()
+        if claude is None and openai_client is None:
+            # No async client (no keys, or a cassette is active): run the sync path on a thread
+            async with semaphore:
+                return await asyncio.to_thread(self.generate_recommendation, fallback=False, **inputs)
+        
+        model = CLAUDE_RECOMMENDATION_MODELS[0][0] if claude else OPENAI_RECOMMENDATION_MODELS[0]
+        prompt = self._build_recommendation_prompt(*inputs.values(), budget=budget_for(model))
+        prompt_key = content_hash([RECOMMENDATION_SYSTEM_PROMPT, prompt])
+        cached = self.cache.get('recommendation', prompt_key)
+        if cached is not None:
+            return cached
+        
+        async with semaphore:
+            for provider, client in (('claude', claude), ('openai', openai_client)):
+                if client is None:
+                    continue
+                try:
+                    recommendation = await (self._aclaude_recommendation(client, prompt) if provider == 'claude'
+                                            else self._aopenai_recommendation(client, prompt))
+                    self.cache.set('recommendation', prompt_key, recommendation)
+                    return recommendation
+                except Exception as e:
+                    print(f"{provider} bulk recommendation error for {symbol}: {e}")
+        raise RuntimeError(f"No LLM recommendation available for {symbol}")
+    
+    async def _aclaude_recommendation(self, client, prompt: str) -> Dict:
+        for model, max_tokens in CLAUDE_RECOMMENDATION_MODELS:
+            try:
+                with provider_call('claude', 'bulk_recommendation'):
+                    message = await client.messages.create(
+                        model=model,
+                        max_tokens=max_tokens,
+                        system=RECOMMENDATION_SYSTEM_BLOCKS,
+                        messages=[{"role": "user", "content": prompt}]
+                    )
+                record_llm_usage('claude', 'bulk_recommendation', getattr(message, 'usage', None))
+                return self._recommendation_from_text(message.content[0].text)
+            except Exception:
+                if model == CLAUDE_RECOMMENDATION_MODELS[-1][0]:
+                    raise
+    
+    async def _aopenai_recommendation(self, client, prompt: str) -> Dict:
+        for model in OPENAI_RECOMMENDATION_MODELS:
+            try:
+                with provider_call('openai', 'bulk_recommendation'):
+                    response = await client.chat.completions.create(
+                        model=model,
+                        messages=[
+                            {"role": "system", "content": RECOMMENDATION_SYSTEM_PROMPT},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=1200,
+                        temperature=0.7
+                    )
+                record_llm_usage('openai', 'bulk_recommendation', getattr(response, 'usage', None))
+                return self._recommendation_from_text(response.choices[0].message.content)
+            except Exception:
+                if model == OPENAI_RECOMMENDATION_MODELS[-1]:
+                    raise
+    
+    def generate_recommendations_bulk(self, inputs: Dict[str, Dict], concurrency: int = None) -> Dict[str, Dict]:
+        """Recommendations for many symbols at once ({symbol: analysis sections} in, {symbol: result} out).
+        
+        Runs up to concurrency LLM calls at a time (BULK_LLM_CONCURRENCY) instead of
+        one blocking call per symbol. Failed symbols map to {'error': ...}.
+        """
+        async def run():
+            semaphore = asyncio.Semaphore(concurrency or BULK_LLM_CONCURRENCY)
+            symbols = list(inputs)
+            results = await asyncio.gather(*(self.agenerate_recommendation(symbol, inputs[symbol], semaphore)
+                                             for symbol in symbols), return_exceptions=True)
+            return {symbol: {'error': str(result)} if isinstance(result, Exception) else result
+                    for symbol, result in zip(symbols, results)}
+        return asyncio.run(run())
+    
+    def _build_recommendation_prompt(self, symbol: str, company_data: Dict, news_data: List,
+                                     sentiment_data: Dict, analyst_data: Dict, technical_data: Dict = None,
+                                     budget: int = None) -> str:
+        """Build the per-symbol part of the recommendation prompt, compacted to a token budget.
+        
+        Instructions, the answer structure and metric guidance live in
+        RECOMMENDATION_SYSTEM_PROMPT, which is sent as a cached system block.
+        Missing fields are listed once instead of line by line; the business
+        summary and the ranked news share whatever the fixed fields leave.
+        """
+        budget = budget or DEFAULT_PROMPT_BUDGET
+        
+        def money(value, digits=2):
+            return f"${value:,.{digits}f}" if value else None
+        
+        def percent(value, digits=2):
+            return f"{value:.{digits}f}%" if value else None
+        
+        basic = [
+            ('Company Name', company_data.get('name')),
+            ('Sector', company_data.get('sector')),
+            ('Industry', company_data.get('industry')),
+            ('Current Stock Price', money(company_data.get('currentPrice'))),
+            ('Price Change Today', f"{company_data.get('changePercent') or 0:.2f}%"),
+            ('Market Capitalization', money(company_data.get('marketCap'), 0)),
+            ('Years Public', f"{company_data['yearsPublic']} years" if company_data.get('yearsPublic') else None),
+        ]
+        metrics = [
+            ('P/E Ratio', company_data.get('peRatio') or None),
+            ('P/B Ratio', company_data.get('pbRatio') or None),
+            ('Total Debt', money(company_data.get('totalDebt'), 0)),
+            ('Current Assets', money(company_data.get('currentAssets'), 0)),
+            ('Debt to Current Assets Ratio', percent(company_data.get('debtToCurrentAssetsRatio'), 1)),
+            ('Current Ratio', company_data.get('currentRatio') or None),
+            ('Trailing EPS', money(company_data.get('trailingEps'))),
+            ('Earnings Growth', percent(company_data.get('earningsGrowth'), 1)),
+            ('Pays Dividends', 'Yes' if company_data.get('hasDividend') else 'No'),
+            ('Dividend Yield', percent(company_data.get('dividendYield'))),
+            ('Profit Margins', percent(company_data.get('profitMargins'))),
+            ('Credit Rating', company_data.get('creditRating')),
         ]
+        missing = [label for label, value in metrics if value in (None, '', 'N/A')]
+        metric_lines = [f"- {label}: {value}" for label, value in metrics if label not in missing]
+        if missing:
+            metric_lines.append(f"- Not available: {', '.join(missing)}")
         
+        sentiment_lines = []
+        for source in ('stocktwits', 'reddit', 'twitter'):
+            scores = sentiment_data.get(source) or {}
+            if scores.get('positive') is not None:
+                sentiment_lines.append(f"- {source.capitalize()}: {scores.get('positive')}% Positive, {scores.get('negative', 0)}% Negative")
+        
+        analyst_lines = [
+            f"- Buy Recommendations: {analyst_data.get('buyCount', 0)}",
+            f"- Hold Recommendations: {analyst_data.get('holdCount', 0)}",
+            f"- Sell Recommendations: {analyst_data.get('sellCount', 0)}",
+        ]
+        if analyst_data.get('averagePriceTarget'):
+            analyst_lines.append(f"- Average Price Target: ${analyst_data['averagePriceTarget']}")
+        
+        template = f"""Stock Symbol: {symbol}
+
+COMPANY OVERVIEW:
+{{description}}
+
+BASIC INFORMATION:
+{chr(10).join(f"- {label}: {value}" for label, value in basic if value not in (None, '', 'N/A'))}
+
+FINANCIAL METRICS:
+{chr(10).join(metric_lines)}
+
+Recent News Summary:
+{{news}}
+
+Social Sentiment:
+{chr(10).join(sentiment_lines) or 'Not available.'}
+
+Professional Analyst Opinions:
+{chr(10).join(analyst_lines)}
+
+Price Behavior (computed from the last 12 months of daily prices):
+{self._format_technicals(technical_data)}
+
+Write the analysis for {symbol}."""
+        
+        # The summary gets up to 45% of what the fixed fields leave; news takes the rest
+        remaining = budget - estimate_tokens(template)
+        description = compact_description(company_data.get('description') or 'No description available.',
+                                           max(MIN_DESCRIPTION_TOKENS, int(remaining * 0.45)))
+        news = self._format_news(news_data, symbol, company_data.get('name', ''),
+                                 max(MIN_NEWS_TOKENS, remaining - estimate_tokens(description)))
+        prompt = template.replace('{description}', description, 1).replace('{news}', news, 1)
+        
+        tokens = estimate_tokens(prompt)
+        PROMPT_TOKENS.observe(tokens, operation='recommendation')
+        annotate(prompt_tokens=tokens, prompt_budget=budget)
+        return prompt
+    
+    def _get_claude_recommendation(self, prompt: str) -> Dict:
+        """Get recommendation from Claude API - optimized for speed"""
+        models_to_try = CLAUDE_RECOMMENDATION_MODELS
         for model, max_tokens in models_to_try:
             try:
-                message = self.claude_client.messages.create(
-                    model=model,
-                    max_tokens=max_tokens,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }]
-                )
-                
-                response_text = message.content[0].text
+                with provider_limits.slot('claude'), provider_call('claude', 'recommendation'):
+                    message = self.claude_client.messages.create(
+                        model=model,
+                        max_tokens=max_tokens,
+                        system=RECOMMENDATION_SYSTEM_BLOCKS,
+                        messages=[{
+                            "role": "user",
+                            "content": prompt
+                        }]
+                    )
+                record_llm_usage('claude', 'recommendation', getattr(message, 'usage', None))
                 
-                # Extract risk level from Long-Term Risk Assessment section
-                risk_level = "Medium"
-                if "**Long-Term Risk Assessment**" in response_text or "5." in response_text:
-                    # Try to extract risk level
-                    risk_text = response_text.upper()
-                    if "LOW RISK" in risk_text or ("RISK" in risk_text and "LOW" in risk_text.split("RISK")[0][-20:]):
-                        risk_level = "Low"
-                    elif "HIGH RISK" in risk_text or ("RISK" in risk_text and "HIGH" in risk_text.split("RISK")[0][-20:]):
-                        risk_level = "High"
-                
-                return {
-                    'recommendation': None,  # No direct recommendation
-                    'reasoning': response_text,
-                    'riskLevel': risk_level
-                }
+                return self._recommendation_from_text(message.content[0].text)
             except Exception as e:
                 if model == models_to_try[-1][0]:  # Last model, re-raise
                     raise
@@ -261,20 +562,22 @@ WRITING STYLE:
     
     def _get_openai_recommendation(self, prompt: str) -> Dict:
         """Get recommendation from OpenAI API"""
-        # Try faster models first
-        models_to_try = ["gpt-4o-mini", "gpt-4o", "gpt-4"]
+        models_to_try = OPENAI_RECOMMENDATION_MODELS
         response_text = None
         for model in models_to_try:
             try:
-                response = self.openai_client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful financial advisor who explains investment decisions in simple, beginner-friendly terms. You ALWAYS provide BALANCED analysis showing both strengths and weaknesses. No stock is perfect - you must explain what metrics mean in context, not just whether they're 'good' or 'bad'. Focus on education and helping beginners understand trade-offs."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1200,  # Reduced for faster response
-                    temperature=0.7  # Slightly lower for faster generation
-                )
+                with provider_limits.slot('openai'), provider_call('openai', 'recommendation'):
+                    response = self.openai_client.chat.completions.create(
+                        model=model,
+                        messages=[
+                            # OpenAI caches long identical prompt prefixes automatically
+                            {"role": "system", "content": RECOMMENDATION_SYSTEM_PROMPT},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=1200,  # Reduced for faster response
+                        temperature=0.7  # Slightly lower for faster generation
+                    )
+                record_llm_usage('openai', 'recommendation', getattr(response, 'usage', None))
                 response_text = response.choices[0].message.content
                 break  # Success
             except Exception as e:
@@ -285,7 +588,10 @@ WRITING STYLE:
         if response_text is None:
             raise Exception("All OpenAI models failed")
         
-        # Extract risk level from Long-Term Risk Assessment section
+        return self._recommendation_from_text(response_text)
+    
+    def _recommendation_from_text(self, response_text: str) -> Dict:
+        """Wrap an LLM analysis, extracting the risk level from its Long-Term Risk Assessment"""
         risk_level = "Medium"
         risk_text = response_text.upper()
         if "LOW RISK" in risk_text or ("RISK" in risk_text and "LOW" in risk_text.split("RISK")[0][-20:]):
@@ -299,7 +605,8 @@ WRITING STYLE:
             'riskLevel': risk_level
         }
     
-    def _get_mock_recommendation(self, symbol: str, company_data: Dict, analyst_data: Dict, news_data: list = None) -> Dict:
+    def _get_mock_recommendation(self, symbol: str, company_data: Dict, analyst_data: Dict, news_data: list = None,
+                                 technical_data: Dict = None) -> Dict:
         """Generate a balanced mock recommendation following the new structure"""
         buy_count = analyst_data.get('buyCount', 0)
         sell_count = analyst_data.get('sellCount', 0)
@@ -472,11 +779,29 @@ WRITING STYLE:
         reasoning_parts.append(risk_text)
         
         # 6. Market Correlation (2 sentences)
-        correlation_text = f"**6. Market Correlation**\n\n{symbol} generally follows the broader market trends of the S&P 500, though sector-specific factors may cause some divergence. This correlation means the stock will likely move with overall market sentiment, which provides some diversification benefit but also means it may decline during broader market downturns."
+        beta = (technical_data or {}).get('beta')
+        if beta is not None:
+            if beta >= 1.2:
+                beta_desc = f"moves more than the S&P 500, with a beta of {beta:.2f} (a 1% market move has typically come with about a {beta:.1f}% move in the stock)"
+                diversification = "This amplifies both market rallies and downturns, so it adds market risk to a portfolio rather than offsetting it."
+            elif beta >= 0.8:
+                beta_desc = f"tracks the S&P 500 fairly closely, with a beta of {beta:.2f}"
+                diversification = "It therefore offers limited diversification on its own, since it tends to rise and fall with the overall market."
+            elif beta >= 0.3:
+                beta_desc = f"moves less than the S&P 500, with a beta of {beta:.2f} over the past year"
+                diversification = "That lower sensitivity to market swings can help diversify a portfolio, although it may also lag in strong rallies."
+            else:
+                beta_desc = f"has moved largely independently of the S&P 500 over the past year (beta {beta:.2f})"
+                diversification = "Its returns have been driven mostly by company-specific news, which can diversify a market-heavy portfolio but offers no cushion in broad selloffs."
+            correlation_text = f"**6. Market Correlation**\n\n{symbol} {beta_desc}. {diversification}"
+        else:
+            correlation_text = f"**6. Market Correlation**\n\n{symbol} generally follows the broader market trends of the S&P 500, though sector-specific factors may cause some divergence. This correlation means the stock will likely move with overall market sentiment, which provides some diversification benefit but also means it may decline during broader market downturns."
         reasoning_parts.append(correlation_text)
         
         # 7. Short-Term Tendencies (2-3 sentences)
-        volatility_text = f"**7. Short-Term Tendencies**\n\n{symbol} exhibits moderate volatility typical of stocks in the {industry} sector. The stock price tends to react to earnings announcements, sector news, and broader market movements. Short-term price swings are common, making this stock more suitable for investors with a longer time horizon who can weather temporary fluctuations."
+        volatility_text = self._describe_technicals(symbol, technical_data)
+        if not volatility_text:
+            volatility_text = f"**7. Short-Term Tendencies**\n\n{symbol} exhibits moderate volatility typical of stocks in the {industry} sector. The stock price tends to react to earnings announcements, sector news, and broader market movements. Short-term price swings are common, making this stock more suitable for investors with a longer time horizon who can weather temporary fluctuations."
         reasoning_parts.append(volatility_text)
         
         # 8. Summary (3-4 sentences) - NO direct recommendation
@@ -492,21 +817,91 @@ WRITING STYLE:
             'note': 'This is an educational analysis based on fundamental metrics. For AI-powered analysis with deeper insights, add ANTHROPIC_API_KEY or OPENAI_API_KEY to your .env file.'
         }
     
-    def _format_news(self, news_data: list) -> str:
-        """Format news data for AI context"""
+    def _format_news(self, news_data: list, symbol: str = '', company_name: str = '', budget: int = None) -> str:
+        """Format news data for AI context: up to 5 headlines, most recent and relevant first, within budget tokens
+        
+        The top headline is always kept, even over budget; headlines dropped for space are counted, not hidden.
+        """
         if not news_data:
             return "No recent news available."
         
         formatted = []
-        for i, article in enumerate(news_data[:5], 1):
+        for i, article in enumerate(rank_news(news_data, symbol, company_name)[:5], 1):
             headline = article.get('headline', 'N/A')
             source = article.get('source', 'N/A')
             formatted.append(f"{i}. {headline} ({source})")
         
-        return "\n".join(formatted)
+        if budget is not None:
+            kept = fit_lines(formatted, budget) or formatted[:1]
+            if len(kept) < len(formatted):
+                kept.append(f"({len(formatted) - len(kept)} more headlines omitted)")
+            formatted = kept
+        return "\n".join(formatted) or "No recent news available."
+    
+    def _format_technicals(self, technical_data: Dict) -> str:
+        """Format technical metrics for the recommendation prompt"""
+        if not technical_data:
+            return "Price history not available."
+        
+        def fmt(key, suffix=''):
+            value = technical_data.get(key)
+            return f"{value}{suffix}" if value is not None else 'Not available'
+        
+        return "\n".join([
+            f"- Annualized Volatility: {fmt('volatility1y', '%')} (1 year), {fmt('volatility20d', '%')} (last 20 trading days)",
+            f"- Beta vs S&P 500 (SPY): {fmt('beta')} (1.0 moves with the market; higher swings more)",
+            f"- Maximum Drawdown (1 year): {fmt('maxDrawdown1y', '%')}",
+            f"- Last Close: ${fmt('lastClose')}; 20/50/200-day Averages: ${fmt('sma20')} / ${fmt('sma50')} / ${fmt('sma200')}",
+            f"- RSI (14-day): {fmt('rsi14')} (above 70 often called overbought, below 30 oversold)",
+            f"- 52-Week Range: ${fmt('low52w')} - ${fmt('high52w')} (currently at {fmt('rangePosition52w', '%')} of the range)"
+        ])
+    
+    def _describe_technicals(self, symbol: str, technical_data: Dict) -> Optional[str]:
+        """Short-Term Tendencies section built from measured price behavior"""
+        volatility = (technical_data or {}).get('volatility1y')
+        if volatility is None:
+            return None
+        
+        if volatility >= 45:
+            level = 'high'
+        elif volatility >= 25:
+            level = 'moderate'
+        else:
+            level = 'low'
+        sentences = [f"{symbol} has shown {level} volatility, with annualized swings of about {volatility:.0f}% over the past year"
+                     + (f" and a maximum peak-to-trough decline of {abs(technical_data['maxDrawdown1y']):.0f}%." if technical_data.get('maxDrawdown1y') is not None else ".")]
+        
+        last_close, sma50, sma200 = technical_data.get('lastClose'), technical_data.get('sma50'), technical_data.get('sma200')
+        if last_close and sma50 and sma200:
+            above = [name for name, value in (('50-day', sma50), ('200-day', sma200)) if last_close > value]
+            if len(above) == 2:
+                trend = 'above both its 50-day and 200-day moving averages, a sign of an established uptrend'
+            elif not above:
+                trend = 'below both its 50-day and 200-day moving averages, a sign of recent weakness'
+            else:
+                below = '200-day' if above[0] == '50-day' else '50-day'
+                trend = f"above its {above[0]} moving average but below its {below} average, suggesting a mixed trend"
+            sentences.append(f"The stock currently trades {trend}.")
+        
+        rsi = technical_data.get('rsi14')
+        position = technical_data.get('rangePosition52w')
+        if rsi is not None and position is not None:
+            if rsi >= 70:
+                momentum = 'a 14-day RSI above 70, which often precedes short-term pullbacks'
+            elif rsi <= 30:
+                momentum = 'a 14-day RSI below 30, which often reflects heavy recent selling'
+            else:
+                momentum = f"a neutral 14-day RSI of {rsi:.0f}"
+            sentences.append(f"It sits at {position:.0f}% of its 52-week range with {momentum}.")
+        
+        return "**7. Short-Term Tendencies**\n\n" + " ".join(sentences)
     
-    def chat(self, message: str, market_news: List[Dict] = None) -> str:
-        """Generate chatbot response for financial education"""
+    def chat(self, message: str, market_news: List[Dict] = None, history: Dict = None) -> str:
+        """Generate chatbot response for financial education.
+        
+        history is a conversation from ChatMemory: a summary of older exchanges
+        and the recent turns, sent ahead of the new message.
+        """
         
         # Format market news if available
         news_context = ""
@@ -538,329 +933,135 @@ Your responses should be:
 
 Always maintain a helpful, professional, and educational tone."""
 
+        summary_context = ""
+        if history and history.get('summary'):
+            summary_context = f"\n\nEARLIER IN THIS CONVERSATION (summary):\n{history['summary']}\n"
+        
         user_prompt = f"""User Question: {message}
-{news_context}
+{news_context}{summary_context}
 
 Please provide a helpful, educational response. Remember: NO buy/sell recommendations, only education and explanations."""
 
-        # Try Claude first, then OpenAI, then fallback
-        if self.claude_client:
-            try:
-                import sys
-                sys.stderr.write("🤖 Attempting Claude API call...\n")
-                sys.stderr.flush()
-                # Try multiple Claude model names in order of preference
-                claude_models = [
-                    "claude-3-haiku-20240307",     # Fastest and most reliable
-                    "claude-3-5-sonnet-20241022",  # Newer model if available
-                    "claude-3-5-haiku-20241022"    # Newer haiku version
-                ]
-                
-                for model in claude_models:
+        prior_messages = history_messages(history)
+        PROMPT_TOKENS.observe(estimate_tokens(user_prompt) + history_tokens(history), operation='chat')
+        
+        # Only LLM answers are cached; fallback responses are cheap to rebuild
+        chat_key = content_hash([prior_messages, user_prompt]) if prior_messages else content_hash(user_prompt)
+        cached = self.cache.get('chat', chat_key)
+        if cached is not None:
+            return cached
+        # Rephrasings of a question answered before ("what's a P/E?" / "explain p/e ratios").
+        # Follow-ups depend on the conversation, so only opening questions are matched and indexed
+        standalone = not prior_messages and not summary_context
+        similar = self.answer_index.lookup(message, market_news) if standalone else None
+        if similar is not None:
+            print(f"Chat answered from a similar past question (similarity {similar[1]:.2f})")
+            return similar[0]
+
+        try:
+            with llm_admission.slot() if (self.claude_client or self.openai_client) else nullcontext():
+                # Try Claude first, then OpenAI, then fallback
+                if self.claude_client:
                     try:
-                        sys.stderr.write(f"Trying Claude model: {model}\n")
-                        sys.stderr.flush()
-                        response = self.claude_client.messages.create(
-                            model=model,
-                            max_tokens=1000,
-                            system=system_prompt,
-                            messages=[{
-                                "role": "user",
-                                "content": user_prompt
-                            }]
-                        )
-                        sys.stderr.write(f"✅ Claude API call successful with model: {model}\n")
-                        sys.stderr.flush()
-                        return response.content[0].text
-                    except Exception as model_error:
-                        sys.stderr.write(f"⚠️  Model {model} failed: {str(model_error)[:200]}, trying next...\n")
+                        import sys
+                        sys.stderr.write("🤖 Attempting Claude API call...\n")
                         sys.stderr.flush()
-                        continue
+                        # Try multiple Claude model names in order of preference
+                        claude_models = [
+                            "claude-3-haiku-20240307",     # Fastest and most reliable
+                            "claude-3-5-sonnet-20241022",  # Newer model if available
+                            "claude-3-5-haiku-20241022"    # Newer haiku version
+                        ]
+                
+                        for model in claude_models:
+                            try:
+                                sys.stderr.write(f"Trying Claude model: {model}\n")
+                                sys.stderr.flush()
+                                with span('llm.call', provider='claude', model=model), provider_limits.slot('claude'), provider_call('claude', 'chat'):
+                                    response = self.claude_client.messages.create(
+                                        model=model,
+                                        max_tokens=1000,
+                                        system=system_prompt,
+                                        messages=prior_messages + [{
+                                            "role": "user",
+                                            "content": user_prompt
+                                        }]
+                                    )
+                                record_llm_usage('claude', 'chat', getattr(response, 'usage', None))
+                                sys.stderr.write(f"✅ Claude API call successful with model: {model}\n")
+                                sys.stderr.flush()
+                                self._remember_answer(chat_key, message, response.content[0].text, market_news, standalone)
+                                return response.content[0].text
+                            except Exception as model_error:
+                                sys.stderr.write(f"⚠️  Model {model} failed: {str(model_error)[:200]}, trying next...\n")
+                                sys.stderr.flush()
+                                continue
                         
-            except Exception as e:
-                import traceback
-                sys.stderr.write(f"❌ Claude chat error: {e}\n")
-                sys.stderr.write(traceback.format_exc())
-                sys.stderr.flush()
+                    except Exception as e:
+                        import traceback
+                        sys.stderr.write(f"❌ Claude chat error: {e}\n")
+                        sys.stderr.write(traceback.format_exc())
+                        sys.stderr.flush()
         
-        if self.openai_client:
-            try:
-                import sys
-                sys.stderr.write("🤖 Attempting OpenAI API call...\n")
-                sys.stderr.flush()
-                # Try multiple OpenAI model names in order of preference
-                # Note: If you get quota errors, check your OpenAI billing
-                openai_models = [
-                    "gpt-4o",              # Latest and most capable
-                    "gpt-4o-mini",         # Faster and cheaper
-                    "gpt-4-turbo",         # Alternative
-                    "gpt-3.5-turbo"        # Fallback (most likely to work with free tier)
-                ]
-                
-                for model in openai_models:
+                if self.openai_client:
                     try:
-                        sys.stderr.write(f"Trying OpenAI model: {model}\n")
-                        sys.stderr.flush()
-                        response = self.openai_client.chat.completions.create(
-                            model=model,
-                            max_tokens=1000,
-                            messages=[
-                                {"role": "system", "content": system_prompt},
-                                {"role": "user", "content": user_prompt}
-                            ]
-                        )
-                        sys.stderr.write(f"✅ OpenAI API call successful with model: {model}\n")
+                        import sys
+                        sys.stderr.write("🤖 Attempting OpenAI API call...\n")
                         sys.stderr.flush()
-                        return response.choices[0].message.content
-                    except Exception as model_error:
-                        sys.stderr.write(f"⚠️  Model {model} failed: {str(model_error)[:200]}, trying next...\n")
-                        sys.stderr.flush()
-                        continue
+                        # Try multiple OpenAI model names in order of preference
+                        # Note: If you get quota errors, check your OpenAI billing
+                        openai_models = [
+                            "gpt-4o",              # Latest and most capable
+                            "gpt-4o-mini",         # Faster and cheaper
+                            "gpt-4-turbo",         # Alternative
+                            "gpt-3.5-turbo"        # Fallback (most likely to work with free tier)
+                        ]
+                
+                        for model in openai_models:
+                            try:
+                                sys.stderr.write(f"Trying OpenAI model: {model}\n")
+                                sys.stderr.flush()
+                                with span('llm.call', provider='openai', model=model), provider_limits.slot('openai'), provider_call('openai', 'chat'):
+                                    response = self.openai_client.chat.completions.create(
+                                        model=model,
+                                        max_tokens=1000,
+                                        messages=[{"role": "system", "content": system_prompt}] + prior_messages + [
+                                            {"role": "user", "content": user_prompt}
+                                        ]
+                                    )
+                                record_llm_usage('openai', 'chat', getattr(response, 'usage', None))
+                                sys.stderr.write(f"✅ OpenAI API call successful with model: {model}\n")
+                                sys.stderr.flush()
+                                self._remember_answer(chat_key, message, response.choices[0].message.content, market_news, standalone)
+                                return response.choices[0].message.content
+                            except Exception as model_error:
+                                sys.stderr.write(f"⚠️  Model {model} failed: {str(model_error)[:200]}, trying next...\n")
+                                sys.stderr.flush()
+                                continue
                         
-            except Exception as e:
-                import traceback
-                sys.stderr.write(f"❌ OpenAI chat error: {e}\n")
-                sys.stderr.write(traceback.format_exc())
-                sys.stderr.flush()
+                    except Exception as e:
+                        import traceback
+                        sys.stderr.write(f"❌ OpenAI chat error: {e}\n")
+                        sys.stderr.write(traceback.format_exc())
+                        sys.stderr.flush()
+        except Overloaded:
+            # Under overload a canned answer on the same topic beats an error; otherwise the endpoint sheds
+            intent = fallback_intents.match(message.lower())
+            if intent is None:
+                raise
+            print(f"Chat degraded to the '{intent}' fallback answer (LLM capacity exhausted)")
+            return fallback_intents.answers[intent]
         
         # Fallback: Provide basic educational responses for common questions
         print("⚠️  Using fallback response (no AI clients available or all API calls failed)")
         return self._get_fallback_response(message.lower())
     
+    def _remember_answer(self, chat_key: str, message: str, answer: str, market_news: List[Dict] = None,
+                         standalone: bool = True):
+        self.cache.set('chat', chat_key, answer)
+        if standalone:
+            self.answer_index.add(message, answer, market_news)
+    
     def _get_fallback_response(self, message_lower: str) -> str:
-        """Provide basic educational responses when AI APIs are unavailable"""
-        
-        # Common financial terms and concepts
-        if any(term in message_lower for term in ['pe ratio', 'p/e ratio', 'price-to-earnings', 'price to earnings']):
-            return """**P/E Ratio (Price-to-Earnings Ratio)**
-
-The P/E ratio is one of the most commonly used metrics to evaluate whether a stock is overvalued or undervalued.
-
-**What it means:**
-- It compares a company's stock price to its earnings per share (EPS)
-- Formula: Stock Price ÷ Earnings Per Share = P/E Ratio
-- Example: If a stock costs $50 and the company earns $5 per share, the P/E ratio is 10
-
-**How to interpret it:**
-- **Lower P/E (under 15-20)**: Generally considered "cheap" - you're paying less for each dollar of earnings
-- **Higher P/E (over 20-25)**: Generally considered "expensive" - you're paying more for each dollar of earnings
-- **Industry comparison**: P/E ratios vary by industry, so compare a stock's P/E to others in the same sector
-
-**Important notes:**
-- A low P/E doesn't always mean a good investment - the company might have problems
-- A high P/E doesn't always mean a bad investment - the company might be growing rapidly
-- Always consider P/E along with other financial metrics and the company's growth prospects
-
-Think of it like this: If you're buying a business, the P/E ratio tells you how many years of current earnings it would take to "pay back" your investment."""
-
-        elif any(term in message_lower for term in ['dividend', 'dividends']):
-            return """**Dividends**
-
-Dividends are regular payments that some companies make to their shareholders from their profits.
-
-**What they are:**
-- Cash payments distributed to shareholders, usually quarterly (every 3 months)
-- Not all companies pay dividends - growth companies often reinvest profits instead
-- Expressed as a dollar amount per share or as a percentage (dividend yield)
-
-**Example:**
-- If a company pays $1 per share quarterly and you own 100 shares, you receive $100 every 3 months
-- If the stock price is $50, the dividend yield is 2% ($1 ÷ $50 × 4 quarters)
-
-**Why companies pay dividends:**
-- Attract income-seeking investors
-- Signal financial strength and stability
-- Return excess cash to shareholders
-
-**Important considerations:**
-- Dividend yield: Annual dividend ÷ Stock price
-- Dividend history: Companies with 20+ years of continuous dividends are often more stable
-- Dividend sustainability: Can the company afford to keep paying?
-
-**Note:** Dividend payments are not guaranteed and can be reduced or eliminated if the company faces financial difficulties."""
-
-        elif any(term in message_lower for term in ['market cap', 'market capitalization', 'market cap']):
-            return """**Market Capitalization (Market Cap)**
-
-Market cap is the total value of all a company's outstanding shares of stock.
-
-**How it's calculated:**
-- Market Cap = Current Stock Price × Total Number of Shares Outstanding
-- Example: If a stock costs $100 and there are 1 million shares, the market cap is $100 million
-
-**Company size categories:**
-- **Large Cap**: $10+ billion (e.g., Apple, Microsoft, Amazon)
-- **Mid Cap**: $2-10 billion
-- **Small Cap**: $300 million - $2 billion
-- **Micro Cap**: Under $300 million
-
-**Why it matters:**
-- Indicates company size and scale
-- Larger companies are generally more stable but may grow slower
-- Smaller companies may have more growth potential but higher risk
-- Helps compare companies of different sizes
-
-**Important:** Market cap changes constantly as the stock price moves. It represents what investors collectively think the company is worth, not necessarily its book value or assets."""
-
-        elif any(term in message_lower for term in ['pb ratio', 'p/b ratio', 'price-to-book', 'price to book']):
-            return """**P/B Ratio (Price-to-Book Ratio)**
-
-The P/B ratio compares a company's stock price to its book value (net assets).
-
-**What it means:**
-- Formula: Stock Price ÷ Book Value Per Share = P/B Ratio
-- Book value = Total Assets - Total Liabilities (what the company is "worth" on paper)
-- Example: If a stock costs $12 and book value is $10 per share, P/B = 1.2
-
-**How to interpret it:**
-- **P/B < 1.0**: Stock trades below book value (potentially undervalued)
-- **P/B = 1.0-1.5**: Stock trades close to book value (fair value range)
-- **P/B > 1.5**: Stock trades above book value (may be overvalued, or company has valuable intangibles)
-
-**When it's useful:**
-- Best for asset-heavy companies (banks, real estate, manufacturing)
-- Less useful for tech companies with valuable intangibles (brands, patents, software)
-
-**Think of it like:** If you're buying a house, the P/B ratio compares the selling price to what the house is worth on paper (after debts)."""
-
-        elif any(term in message_lower for term in ['current ratio', 'liquidity']):
-            return """**Current Ratio (Liquidity Ratio)**
-
-The current ratio measures a company's ability to pay its short-term debts with its short-term assets.
-
-**What it means:**
-- Formula: Current Assets ÷ Current Liabilities = Current Ratio
-- Current assets: Cash, inventory, accounts receivable (due within 1 year)
-- Current liabilities: Bills, loans, accounts payable (due within 1 year)
-
-**How to interpret it:**
-- **Above 1.5**: Generally healthy - company can cover short-term obligations
-- **Below 1.0**: Potential liquidity problems - may struggle to pay bills
-- **Exactly 1.0**: Assets exactly match liabilities (risky)
-
-**Example:**
-- If a company has $1.5 million in current assets and $1 million in current liabilities, current ratio = 1.5
-- This means the company has $1.50 available for every $1.00 it owes in the short term
-
-**Why it matters:**
-- Indicates financial health and stability
-- Companies with low current ratios may face cash flow problems
-- Important for assessing bankruptcy risk
-
-**Note:** Too high a current ratio (above 3-4) might indicate the company isn't efficiently using its assets."""
-
-        elif any(term in message_lower for term in ['eps', 'earnings per share', 'earnings']):
-            return """**EPS (Earnings Per Share)**
-
-EPS tells you how much profit a company makes for each share of stock.
-
-**What it means:**
-- Formula: (Net Income - Preferred Dividends) ÷ Number of Outstanding Shares = EPS
-- Shows profitability on a per-share basis
-- Example: If a company earns $10 million and has 5 million shares, EPS = $2.00
-
-**Types of EPS:**
-- **Trailing EPS**: Based on past 12 months of earnings (most common)
-- **Forward EPS**: Estimated future earnings (projections)
-
-**How to use it:**
-- Compare EPS across companies in the same industry
-- Track EPS growth over time (increasing is generally good)
-- Used to calculate P/E ratio (Price ÷ EPS = P/E)
-
-**Important considerations:**
-- Higher EPS is generally better, but context matters
-- Compare to previous periods to see growth trends
-- One-time events can skew EPS (look for consistent patterns)
-
-**Think of it like:** If you own a pizza shop with 4 partners, EPS tells you how much profit each partner gets per "share" of ownership."""
-
-        elif any(term in message_lower for term in ['debt', 'leverage', 'liabilities']):
-            return """**Debt and Leverage**
-
-Debt is money a company borrows that must be repaid, usually with interest.
-
-**Types of debt:**
-- **Short-term debt**: Due within 1 year (bills, short loans)
-- **Long-term debt**: Due after 1 year (bonds, mortgages, long-term loans)
-- **Total debt**: Sum of all borrowing
-
-**Why companies use debt:**
-- Finance growth and expansion
-- Take advantage of opportunities
-- Benefit from tax deductions on interest payments
-
-**How to evaluate debt:**
-- **Debt-to-equity ratio**: Total debt ÷ Shareholders' equity (lower is generally better)
-- **Debt-to-assets ratio**: Total debt ÷ Total assets
-- **Interest coverage**: Can the company afford interest payments?
-
-**Conservative approach:**
-- Total debt should be under 110% of current assets
-- Company should generate enough cash flow to service debt
-- Low debt = less risk but potentially slower growth
-
-**High debt risks:**
-- Interest payments reduce profits
-- Economic downturns can make repayment difficult
-- May limit future borrowing capacity
-
-**Remember:** Some debt is normal and healthy, but excessive debt increases bankruptcy risk."""
-
-        elif any(term in message_lower for term in ['stock market', 'how does the stock market work', 'what is the stock market']):
-            return """**How the Stock Market Works**
-
-The stock market is a place where people buy and sell shares of publicly traded companies.
-
-**Basic concepts:**
-- **Stock/Share**: A small piece of ownership in a company
-- **Stock Exchange**: Where stocks are traded (NYSE, NASDAQ)
-- **Stock Price**: Determined by supply and demand - what buyers are willing to pay
-
-**How it works:**
-1. Companies "go public" (IPO) and sell shares to raise money
-2. Investors buy shares, becoming partial owners
-3. Share prices fluctuate based on:
-   - Company performance (earnings, growth)
-   - Economic conditions
-   - Investor sentiment
-   - News and events
-
-**Why prices change:**
-- **Supply and demand**: More buyers = higher price, more sellers = lower price
-- **Company news**: Good earnings = price up, bad news = price down
-- **Market sentiment**: Overall optimism or pessimism
-- **Economic factors**: Interest rates, inflation, unemployment
-
-**Key players:**
-- **Investors**: Buy and hold stocks for long-term growth
-- **Traders**: Buy and sell frequently to profit from price movements
-- **Companies**: Raise capital by selling shares
-
-**Remember:** The stock market can be volatile - prices go up and down. Long-term investing typically performs better than trying to time the market."""
-
-        # Default fallback
-        api_key_status = ""
-        if not self.anthropic_key and not self.openai_key:
-            api_key_status = "\n\n**Note:** AI API keys are not configured. For full AI-powered responses, please add ANTHROPIC_API_KEY or OPENAI_API_KEY to your backend .env file. For technical setup issues, contact aarushravi.09@gmail.com."
-        
-        return f"""I'm here to help you learn about financial terms and concepts! I can explain things like:
-- Financial terminology (P/E ratio, dividends, market cap, etc.)
-- How different financial systems work
-- Investment concepts and strategies (for educational purposes)
-- Market trends and news (for context only)
-
-However, I cannot provide buy/sell recommendations. For technical issues with the tool, please contact aarushravi.09@gmail.com.
-
-**Common topics I can explain:**
-- P/E Ratio (Price-to-Earnings)
-- Dividends
-- Market Capitalization
-- P/B Ratio (Price-to-Book)
-- Current Ratio and Liquidity
-- EPS (Earnings Per Share)
-- Debt and Leverage
-- How the Stock Market Works
-
-What specific financial term or concept would you like to learn about?{api_key_status}"""
-
+        """Provide basic educational responses when AI APIs are unavailable (topics in data/chat_intents.json)"""
+        return fallback_intents.answer(message_lower, has_llm_keys=bool(self.anthropic_key or self.openai_key))
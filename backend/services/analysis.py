@@ -0,0 +1,153 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Iterable, List, Optional, Union
+
+from services import tracing
+from services.metrics import STAGE_LATENCY, track_submit
+
+
+class LazyExecutor:
+    """Thread pool created on first submit, sized from an environment variable read at that point"""
+
+    def __init__(self, setting: str, default: int, thread_name_prefix: str):
+        self.setting = setting
+        self.default = default
+        self.thread_name_prefix = thread_name_prefix
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def max_workers(self) -> int:
+        return int(os.getenv(self.setting, self.default))
+
+    def _get(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix=self.thread_name_prefix)
+        return self._executor
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        return self._get().submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+
+# Stage pool runs the per-symbol fetchers; symbol pool runs whole analyses for batch refresh.
+# They are separate so a symbol task waiting on its stages can never starve the stage pool.
+stage_executor = LazyExecutor('ANALYSIS_STAGE_WORKERS', 16, 'stage')
+symbol_executor = LazyExecutor('BATCH_REFRESH_CONCURRENCY', 8, 'refresh')
+
+
+# Data sections: payload key -> (stage name, StockService method, value when the stage fails)
+DATA_SECTIONS = {
+    'company': ('company_overview', 'get_company_overview', {}),
+    'news': ('news', 'get_recent_news', []),
+    'sentiment': ('sentiment', 'get_social_sentiment', {}),
+    'analyst': ('analyst', 'get_analyst_ratings', {}),
+    'technicals': ('technicals', 'get_technicals', {}),
+}
+SECTIONS = tuple(DATA_SECTIONS) + ('ai_recommendation',)
+# Short names accepted in URLs and fields=
+SECTION_ALIASES = {'ai': 'ai_recommendation'}
+
+
+def parse_fields(fields: Union[str, Iterable[str], None]) -> Optional[List[str]]:
+    """Normalize a fields= selector ("company,news" or a list) to section keys; None means all.
+
+    Raises ValueError for unknown section names.
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    selected = []
+    for field in fields:
+        field = str(field).strip().lower()
+        if not field:
+            continue
+        section = SECTION_ALIASES.get(field, field)
+        if section not in SECTIONS:
+            raise ValueError(f"Unknown section '{field}'. Valid sections: {', '.join(list(DATA_SECTIONS) + ['ai'])}")
+        if section not in selected:
+            selected.append(section)
+    return selected or None
+
+
+def timed_stage(stage, func, *args, **kwargs):
+    """Run one analysis stage as a trace span, recording its latency"""
+    with tracing.span(stage), STAGE_LATENCY.time(stage=stage):
+        return func(*args, **kwargs)
+
+
+def submit_stage(stage, func, *args, **kwargs):
+    """Schedule a stage on the shared stage pool, keeping the caller's trace"""
+    return track_submit('analyze', stage_executor.submit(tracing.propagate(timed_stage), stage, func, *args, **kwargs))
+
+
+def _stage_result(future, stage: str, symbol: str, default, timeout: Optional[float]):
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        print(f"{stage} timeout for {symbol}")
+    except Exception as e:
+        print(f"{stage} error for {symbol}: {e}")
+    return default
+
+
+def build_analysis(symbol: str, stock_service, ai_service, stage_timeout: Optional[float] = None,
+                   fields: Optional[List[str]] = None, recommendations=None) -> Dict:
+    """Fetch the requested analysis sections (all by default) for one symbol.
+
+    Only the stages behind the requested sections run, concurrently. The AI
+    recommendation needs every data section, so asking for it fetches them all.
+    Failed or timed-out stages fall back to empty data; the AI recommendation
+    falls back to the mock recommendation.
+
+    With a RecommendationPrecomputer, starred symbols are answered with their
+    stored recommendation and the fresh data is queued for regeneration.
+    """
+    requested = list(fields) if fields else list(SECTIONS)
+    needed = list(DATA_SECTIONS) if 'ai_recommendation' in requested else [s for s in requested if s in DATA_SECTIONS]
+
+    futures = {}
+    for section in needed:
+        stage, method, _ = DATA_SECTIONS[section]
+        futures[section] = submit_stage(stage, getattr(stock_service, method), symbol)
+    data = {section: _stage_result(future, section, symbol, DATA_SECTIONS[section][2].copy(), stage_timeout)
+            for section, future in futures.items()}
+
+    tracked = recommendations is not None and 'ai_recommendation' in requested and recommendations.tracks(symbol)
+    saved = recommendations.latest(symbol) if tracked else None
+    if saved is not None:
+        data['ai_recommendation'] = recommendations.payload(saved)
+        recommendations.submit(symbol, data, saved)
+    elif 'ai_recommendation' in requested:
+        try:
+            data['ai_recommendation'] = timed_stage(
+                'ai_recommendation', ai_service.generate_recommendation,
+                symbol=symbol,
+                company_data=data['company'],
+                news_data=data['news'],
+                sentiment_data=data['sentiment'],
+                analyst_data=data['analyst'],
+                technical_data=data['technicals'],
+                # A starred symbol's first recommendation is stored, so it must come from an LLM
+                fallback=not tracked
+            )
+            if tracked:
+                recommendations.save(symbol, data, data['ai_recommendation'])
+        except Exception as e:
+            print(f"AI recommendation error, using mock: {e}")
+            news_data = data['news'] if isinstance(data['news'], list) else []
+            data['ai_recommendation'] = ai_service._get_mock_recommendation(symbol, data['company'], data['analyst'], news_data, data['technicals'])
+
+    analysis = {'symbol': symbol}
+    for section in SECTIONS:
+        if section in requested:
+            analysis[section] = data[section]
+    return analysis
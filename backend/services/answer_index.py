@@ -0,0 +1,195 @@
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from services.content_hash import content_hash, stable_hash
+from services.metrics import record_cache
+
+# Cosine similarity (TF-IDF over hashed word and bigram features) above which a past answer is reused
+ANSWER_SIMILARITY = float(os.getenv('CHAT_ANSWER_SIMILARITY', '0.8'))
+# Seconds a general answer stays reusable, and one that draws on the market news it was given
+ANSWER_TTL = float(os.getenv('CHAT_ANSWER_TTL', '86400'))
+NEWS_ANSWER_TTL = float(os.getenv('CHAT_NEWS_ANSWER_TTL', '300'))
+MAX_ANSWERS = int(os.getenv('CHAT_ANSWER_INDEX_SIZE', '2000'))
+# Shorter answers are usually refusals or error text, not worth reusing
+MIN_ANSWER_CHARS = 200
+
+HASH_BITS = 20
+# Entries compared in full per lookup, picked by feature overlap from the inverted index
+MAX_CANDIDATES = 50
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+# Symbols and numbers in the original question; "AAPL's P/E" must not answer "MSFT's P/E"
+_ENTITY = re.compile(r"\b(?:[A-Z]{1,5}(?=\b|'s)|\d+(?:\.\d+)?%?)")
+_NOT_ENTITIES = {'I', 'A', 'P', 'E', 'B', 'PE', 'PB', 'EPS', 'ETF', 'IPO', 'CEO', 'RSI', 'S', 'US', 'USA', 'OK'}
+# Spelling variants folded together before tokenizing
+_PHRASES = [
+    (re.compile(r'\bp\s*/\s*e\b|\bprice[\s-]+to[\s-]+earnings?\b'), ' pe '),
+    (re.compile(r'\bp\s*/\s*b\b|\bprice[\s-]+to[\s-]+book\b'), ' pb '),
+    (re.compile(r'\bearnings\s+per\s+share\b'), ' eps '),
+    (re.compile(r'\bmarket\s+capitali[sz]ation\b'), ' market cap '),
+    (re.compile(r'\bexchange[\s-]+traded\s+funds?\b'), ' etf '),
+]
+_STOPWORDS = set("""
+a about an and are as at be can could do does explain for how i if in is it its me mean means my of on or please
+should tell that the this to what whats what's when which why will with would you your give some define definition
+""".split())
+# Questions about current events always depend on the news they were answered with
+_NEWS_WORDS = {'news', 'today', 'todays', 'headline', 'headlines', 'latest', 'recent', 'recently', 'happening',
+               'week', 'yesterday', 'currently', 'right now'}
+
+
+def normalize_question(text: str) -> List[str]:
+    """Lower-cased content words with variants folded ('P/E ratios?' -> ['pe', 'ratio'])"""
+    text = (text or '').lower()
+    for pattern, replacement in _PHRASES:
+        text = pattern.sub(replacement, text)
+    words = []
+    for word in _WORD.findall(text):
+        word = word.replace("'s", '')
+        if word in _STOPWORDS:
+            continue
+        # Crude plural folding is enough for short questions
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def question_entities(text: str) -> frozenset:
+    return frozenset(e for e in _ENTITY.findall(text or '') if e not in _NOT_ENTITIES)
+
+
+def features(words: List[str]) -> Counter:
+    """Hashed unigram and bigram counts"""
+    grams = words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+    mask = (1 << HASH_BITS) - 1
+    return Counter(stable_hash(gram) & mask for gram in grams)
+
+
+def news_fingerprint(market_news: Optional[List[Dict]]) -> str:
+    return content_hash([article.get('headline') for article in (market_news or [])])
+
+
+def references_news(question: str, answer: str, market_news: Optional[List[Dict]]) -> bool:
+    """Whether an answer depends on the market news it was given: the question asks about
+    current events, or the answer repeats most of a headline's words"""
+    lowered = (question or '').lower()
+    if any(word in lowered for word in _NEWS_WORDS):
+        return True
+    answer_words = set(normalize_question(answer))
+    for article in market_news or []:
+        headline = [w for w in normalize_question(article.get('headline') or '') if len(w) > 3]
+        if len(headline) >= 3 and sum(w in answer_words for w in headline) >= 0.6 * len(headline):
+            return True
+    return False
+
+
+class _Entry:
+    __slots__ = ('question', 'answer', 'tf', 'entities', 'news_key', 'expires')
+
+    def __init__(self, question, answer, tf, entities, news_key, expires):
+        self.question = question
+        self.answer = answer
+        self.tf = tf
+        self.entities = entities
+        self.news_key = news_key
+        self.expires = expires
+
+
+class AnswerIndex:
+    """Nearest-neighbour index over past chatbot answers.
+
+    Questions are reduced to hashed word/bigram features and compared by TF-IDF
+    cosine similarity, with document frequencies taken from the indexed
+    questions. An inverted index picks the candidates, so a lookup only scores
+    entries that share a term with the question. Answers that used the market
+    news only match while that news is unchanged, and expire after NEWS_ANSWER_TTL.
+    """
+
+    def __init__(self, threshold: float = ANSWER_SIMILARITY, max_entries: int = MAX_ANSWERS):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._postings: Dict[int, set] = {}
+        self._df = Counter()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _idf(self, feature: int) -> float:
+        return math.log((1 + len(self._entries)) / (1 + self._df[feature])) + 1
+
+    def _norm(self, tf: Counter) -> float:
+        return math.sqrt(sum((count * self._idf(f)) ** 2 for f, count in tf.items()))
+
+    def lookup(self, question: str, market_news: Optional[List[Dict]] = None) -> Optional[Tuple[str, float]]:
+        """(answer, similarity) of the closest live entry above the threshold, or None"""
+        words = normalize_question(question)
+        if not words:
+            return None
+        tf = features(words)
+        entities = question_entities(question)
+        news_key = news_fingerprint(market_news)
+        now = time.time()
+        best = None
+        with self._lock:
+            overlap = Counter()
+            for feature in tf:
+                for entry_id in self._postings.get(feature, ()):
+                    overlap[entry_id] += 1
+            query_norm = self._norm(tf)
+            for entry_id, _ in overlap.most_common(MAX_CANDIDATES):
+                entry = self._entries[entry_id]
+                if entry.expires < now:
+                    self._remove(entry_id)
+                    continue
+                if entry.entities != entities or (entry.news_key and entry.news_key != news_key):
+                    continue
+                dot = sum(count * entry.tf[f] * self._idf(f) ** 2 for f, count in tf.items() if f in entry.tf)
+                score = dot / (query_norm * self._norm(entry.tf) or 1)
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (entry_id, score)
+            if best is not None:
+                self._entries.move_to_end(best[0])
+                best = (self._entries[best[0]].answer, best[1])
+        record_cache('chat_similar', best is not None)
+        return best
+
+    def add(self, question: str, answer: str, market_news: Optional[List[Dict]] = None) -> bool:
+        """Index an LLM answer; False if it is not worth reusing"""
+        words = normalize_question(question)
+        if not words or len(answer or '') < MIN_ANSWER_CHARS:
+            return False
+        uses_news = references_news(question, answer, market_news)
+        entry = _Entry(question, answer, features(words), question_entities(question),
+                       news_fingerprint(market_news) if uses_news else None,
+                       time.time() + (NEWS_ANSWER_TTL if uses_news else ANSWER_TTL))
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            for feature in entry.tf:
+                self._postings.setdefault(feature, set()).add(entry_id)
+                self._df[feature] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        for feature in entry.tf:
+            postings = self._postings.get(feature)
+            if postings is not None:
+                postings.discard(entry_id)
+                if not postings:
+                    del self._postings[feature]
+            self._df[feature] -= 1
+            if self._df[feature] <= 0:
+                del self._df[feature]
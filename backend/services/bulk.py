@@ -0,0 +1,125 @@
+"""Bulk AI recommendation refresh for many symbols (the screener universe, the starred list, ...).
+
+Each symbol's data is fetched on a thread pool and its recommendation generated
+with the async LLM clients, so dozens of LLM calls are in flight at once instead
+of one. Every finished symbol is stored in the recommendations table and
+checkpointed in bulk_items; an interrupted run picks up where it stopped with
+--resume.
+
+Usage (from backend/):
+    python -m services.bulk --universe
+    python -m services.bulk --symbols AAPL,MSFT,NVDA --llm-concurrency 32
+    python -m services.bulk --resume 3
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from services.analysis import DATA_SECTIONS, build_analysis
+from services.ai_service import BULK_LLM_CONCURRENCY
+from services.metrics import registry
+from services.precompute import input_hash
+from database.db import (init_db, get_starred_stocks, save_recommendation, create_bulk_run, get_bulk_run,
+                         pending_bulk_items, mark_bulk_item)
+
+# Symbols whose data is being fetched at once (each fetch fans out to the analysis stage pool)
+BULK_DATA_CONCURRENCY = int(os.getenv('BULK_DATA_CONCURRENCY', '8'))
+
+BULK_ITEMS = registry.counter(
+    'stocksense_bulk_recommendations_total',
+    'Symbols finished by bulk recommendation runs',
+    ('status',))
+
+
+class BulkRecommendationRun:
+    """One checkpointed pass over a list of symbols"""
+
+    def __init__(self, ai_service, stock_service, llm_concurrency: Optional[int] = None,
+                 data_concurrency: Optional[int] = None):
+        self.ai_service = ai_service
+        self.stock_service = stock_service
+        self.llm_concurrency = llm_concurrency or BULK_LLM_CONCURRENCY
+        self.data_concurrency = data_concurrency or BULK_DATA_CONCURRENCY
+
+    def start(self, symbols: List[str], on_result: Optional[Callable] = None) -> Dict:
+        """Create a run for symbols and process it; returns the run summary"""
+        run_id = create_bulk_run(list(dict.fromkeys(symbols)))
+        return self.resume(run_id, on_result)
+
+    def resume(self, run_id: int, on_result: Optional[Callable] = None) -> Dict:
+        """Process every symbol of a run that is not done yet (failed ones are retried)"""
+        if get_bulk_run(run_id) is None:
+            raise ValueError(f"Unknown bulk run {run_id}")
+        symbols = pending_bulk_items(run_id)
+        print(f"Bulk run {run_id}: {len(symbols)} symbols to go")
+        started = time.perf_counter()
+        asyncio.run(self._process(run_id, symbols, on_result))
+        summary = get_bulk_run(run_id)
+        summary['elapsed_s'] = round(time.perf_counter() - started, 2)
+        print(f"Bulk run {run_id}: {summary['done']}/{summary['total']} done, {summary['failed']} failed "
+              f"in {summary['elapsed_s']}s")
+        return summary
+
+    async def _process(self, run_id: int, symbols: List[str], on_result: Optional[Callable]):
+        loop = asyncio.get_running_loop()
+        llm_slots = asyncio.Semaphore(self.llm_concurrency)
+        with ThreadPoolExecutor(max_workers=self.data_concurrency, thread_name_prefix='bulk') as pool:
+            async def one(symbol: str):
+                try:
+                    data = await loop.run_in_executor(pool, self._fetch, symbol)
+                    recommendation = await self.ai_service.agenerate_recommendation(symbol, data, llm_slots)
+                    # Checkpoint: sqlite writes are short, run them off the loop anyway
+                    await loop.run_in_executor(pool, self._save, run_id, symbol, data, recommendation)
+                    status, error = 'done', None
+                except Exception as e:
+                    print(f"Bulk recommendation error for {symbol}: {e}")
+                    await loop.run_in_executor(pool, mark_bulk_item, run_id, symbol, 'failed', str(e))
+                    status, error = 'failed', str(e)
+                BULK_ITEMS.inc(status=status)
+                if on_result:
+                    on_result(symbol, status, error)
+
+            await asyncio.gather(*(one(symbol) for symbol in symbols))
+
+    def _fetch(self, symbol: str) -> Dict:
+        return build_analysis(symbol, self.stock_service, self.ai_service, fields=list(DATA_SECTIONS))
+
+    @staticmethod
+    def _save(run_id: int, symbol: str, data: Dict, recommendation: Dict):
+        save_recommendation(symbol, input_hash(data), recommendation)
+        mark_bulk_item(run_id, symbol, 'done')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Regenerate AI recommendations for many symbols')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--symbols', help='Comma-separated symbols')
+    target.add_argument('--universe', action='store_true', help='The screener universe')
+    target.add_argument('--starred', action='store_true', help='Every starred symbol')
+    target.add_argument('--resume', type=int, metavar='RUN_ID', help='Finish an interrupted run')
+    parser.add_argument('--llm-concurrency', type=int, default=None)
+    parser.add_argument('--data-concurrency', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    from services.ai_service import AIService
+    from services.stock_service import StockService
+    init_db()
+    run = BulkRecommendationRun(AIService(), StockService(), args.llm_concurrency, args.data_concurrency)
+
+    if args.resume:
+        return run.resume(args.resume)
+    if args.universe:
+        from services.screener import load_universe
+        symbols = load_universe()
+    elif args.starred:
+        symbols = [row['symbol'] for row in get_starred_stocks()]
+    else:
+        symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()]
+    return run.start(symbols)
+
+
+if __name__ == '__main__':
+    main()
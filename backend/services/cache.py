@@ -0,0 +1,366 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from services.market_calendar import market_calendar
+from services.metrics import record_cache, registry
+
+DEFAULT_SQLITE_PATH = Path(__file__).parent.parent / 'database' / 'cache.db'
+KEY_PREFIX = 'stocksense:'
+
+# Seconds each kind of entry stays fresh; override with CACHE_TTL_<NAME> (e.g. CACHE_TTL_NEWS=120)
+DEFAULT_TTLS = {
+    'quote': 10,
+    'overview': 60,
+    'news': 300,
+    'market_news': 300,
+    'sentiment': 600,
+    'analyst': 3600,
+    'recommendation': 1800,
+    'chat': 900,
+}
+
+CACHE_ERRORS = registry.counter(
+    'stocksense_cache_errors_total',
+    'Cache backend failures (the lookup is treated as a miss)',
+    ('backend',))
+
+
+class CacheBackend:
+    """Stores serialized values with an expiry. Implementations must be thread-safe."""
+    name = 'base'
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl: float):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    """Caching disabled: every lookup misses"""
+    name = 'none'
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU. Each gunicorn worker gets its own copy."""
+    name = 'memory'
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteCache(CacheBackend):
+    """Cache in a local SQLite file in WAL mode, shared by every worker process on the host.
+
+    WAL lets readers run alongside the single writer, so lookups from other
+    workers never block on a write. Connections are per thread and per process
+    (a connection inherited across fork() must not be reused).
+    """
+    name = 'sqlite'
+    PURGE_EVERY = 500
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 20000):
+        self.path = str(path or DEFAULT_SQLITE_PATH)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache (expires)')
+
+    def _conn(self) -> sqlite3.Connection:
+        conn, pid = getattr(self._local, 'conn', (None, None))
+        if conn is None or pid != os.getpid():
+            # Autocommit; each statement is its own short transaction
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = (conn, os.getpid())
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute('SELECT value, expires FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def set(self, key, value, ttl):
+        conn = self._conn()
+        conn.execute('INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+                     (key, value, time.time() + ttl))
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self._purge(conn)
+
+    def _purge(self, conn: sqlite3.Connection):
+        """Drop expired rows, then the soonest-expiring ones beyond max_entries"""
+        conn.execute('DELETE FROM cache WHERE expires < ?', (time.time(),))
+        conn.execute('DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires DESC LIMIT -1 OFFSET ?)',
+                     (self.max_entries,))
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+
+class RespError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+
+class RedisCache(CacheBackend):
+    """Minimal Redis client (RESP2 over a socket), enough for GET/SET PX/DEL.
+
+    Works against Redis, Valkey, KeyDB or any RESP-compatible server, so several
+    hosts can share one cache. There is one connection per thread and process.
+    """
+    name = 'redis'
+
+    def __init__(self, url: str = 'redis://127.0.0.1:6379/0', timeout: float = 2.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = (sock, sock.makefile('rb'), os.getpid())
+        self._local.connection = connection
+        if self.password:
+            self._call(connection, 'AUTH', self.password)
+        if self.db:
+            self._call(connection, 'SELECT', str(self.db))
+        return connection
+
+    def _close(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection:
+            try:
+                connection[0].close()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        return b''.join(parts)
+
+    @classmethod
+    def _read_reply(cls, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError('connection closed by cache server')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode('utf-8')
+        if kind == b'-':
+            raise RespError(payload.decode('utf-8'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2].decode('utf-8')
+        if kind == b'*':
+            count = int(payload)
+            return None if count < 0 else [cls._read_reply(reader) for _ in range(count)]
+        raise ConnectionError(f'unexpected reply from cache server: {line[:40]!r}')
+
+    def _call(self, connection, *args):
+        sock, reader, _ = connection
+        sock.sendall(self._encode(args))
+        return self._read_reply(reader)
+
+    def command(self, *args):
+        """Run one command, reconnecting once if the pooled connection went stale"""
+        for attempt in (1, 2):
+            connection = getattr(self._local, 'connection', None)
+            try:
+                if connection is None or connection[2] != os.getpid():
+                    connection = self._connect()
+                return self._call(connection, *args)
+            except (OSError, ConnectionError):
+                self._close()
+                if attempt == 2:
+                    raise
+
+    def get(self, key):
+        return self.command('GET', key)
+
+    def set(self, key, value, ttl):
+        self.command('SET', key, value, 'PX', str(max(1, int(ttl * 1000))))
+
+    def delete(self, key):
+        self.command('DEL', key)
+
+
+def create_backend(kind: Optional[str] = None) -> CacheBackend:
+    """Backend chosen by CACHE_BACKEND: memory (default), sqlite, redis or none"""
+    kind = (kind or os.getenv('CACHE_BACKEND', 'memory')).strip().lower()
+    if kind == 'none':
+        return NullCache()
+    if kind == 'memory':
+        return MemoryCache(int(os.getenv('CACHE_MAX_ENTRIES', '2048')))
+    if kind == 'sqlite':
+        return SQLiteCache(os.getenv('CACHE_SQLITE_PATH') or None, int(os.getenv('CACHE_MAX_ENTRIES', '20000')))
+    if kind == 'redis':
+        return RedisCache(os.getenv('CACHE_REDIS_URL') or os.getenv('REDIS_URL') or 'redis://127.0.0.1:6379/0')
+    raise ValueError(f"Unknown CACHE_BACKEND '{kind}'. Use memory, sqlite, redis or none")
+
+
+class Cache:
+    """JSON values on top of a backend, with per-kind TTLs, hit/miss metrics and
+    in-process single flight (concurrent misses for one key run the loader once).
+
+    Backend failures are logged and treated as misses; a cache outage must never
+    fail a request. An optional ttl_policy(name, ttl) adjusts default TTLs at write
+    time (e.g. longer while the market is closed).
+    """
+
+    def __init__(self, backend: CacheBackend, ttls: Optional[Dict[str, float]] = None,
+                 ttl_policy: Optional[Callable[[str, float], float]] = None):
+        self.backend = backend
+        self.ttl_policy = ttl_policy
+        self.ttls = dict(DEFAULT_TTLS)
+        for name in self.ttls:
+            override = os.getenv(f'CACHE_TTL_{name.upper()}')
+            if override:
+                self.ttls[name] = float(override)
+        self.ttls.update(ttls or {})
+        # key -> [lock, threads holding or waiting on it]; removed when the last one leaves
+        self._inflight: Dict[str, List] = {}
+        self._inflight_guard = threading.Lock()
+
+    def _key(self, name: str, key: str) -> str:
+        return f'{KEY_PREFIX}{name}:{key}'
+
+    def get(self, name: str, key: str):
+        """Cached value or None"""
+        try:
+            raw = self.backend.get(self._key(name, key))
+        except Exception as e:
+            CACHE_ERRORS.inc(backend=self.backend.name)
+            print(f"Cache read error ({self.backend.name}): {e}")
+            raw = None
+        record_cache(name, raw is not None)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, name: str, key: str, value, ttl: Optional[float] = None):
+        if ttl is None:
+            ttl = self.ttls.get(name, 300)
+            if self.ttl_policy is not None and ttl > 0:
+                ttl = self.ttl_policy(name, ttl)
+        if ttl <= 0:
+            return
+        try:
+            self.backend.set(self._key(name, key), json.dumps(value, default=str), ttl)
+        except Exception as e:
+            CACHE_ERRORS.inc(backend=self.backend.name)
+            print(f"Cache write error ({self.backend.name}): {e}")
+
+    def delete(self, name: str, key: str):
+        try:
+            self.backend.delete(self._key(name, key))
+        except Exception as e:
+            CACHE_ERRORS.inc(backend=self.backend.name)
+            print(f"Cache delete error ({self.backend.name}): {e}")
+
+    def get_or_load(self, name: str, key: str, loader: Callable, cacheable: Callable = bool):
+        """Return the cached value, or call loader() and cache its result if cacheable(result)"""
+        value = self.get(name, key)
+        if value is not None:
+            return value
+        full_key = self._key(name, key)
+        with self._inflight_guard:
+            entry = self._inflight.setdefault(full_key, [threading.Lock(), 0])
+            entry[1] += 1
+            lock = entry[0]
+        try:
+            with lock:
+                # Another thread may have loaded it while we waited
+                try:
+                    raw = self.backend.get(full_key)
+                except Exception:
+                    raw = None
+                if raw is not None:
+                    return json.loads(raw)
+                value = loader()
+                if cacheable(value):
+                    self.set(name, key, value)
+                return value
+        finally:
+            with self._inflight_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._inflight[full_key]
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_cache() -> Cache:
+    """Process-wide cache, built from the environment on first use"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            policy = None
+            if os.getenv('MARKET_HOURS_CACHE', '1') not in ('0', 'false'):
+                # Quotes and fundamentals stay cached from the close until the next open
+                policy = market_calendar.cache_ttl
+            _shared_cache = Cache(create_backend(), ttl_policy=policy)
+        return _shared_cache
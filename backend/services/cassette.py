@@ -0,0 +1,326 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+import requests
+
+# CASSETTE_MODE=record  -> perform real calls and append them to CASSETTE_PATH
+# CASSETTE_MODE=replay  -> serve calls from CASSETTE_PATH, never touching the network
+# CASSETTE_REPLAY_LATENCY=1 additionally sleeps for each call's recorded duration
+DEFAULT_CASSETTE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cassettes', 'default.jsonl.gz')
+
+# Credentials are never written to disk or used in lookup keys
+SECRET_PARAMS = {'token', 'apikey', 'apiKey', 'api_key'}
+# Date-window params change every day; leaving them out keeps old cassettes replayable
+VOLATILE_PARAMS = {'from', 'to', 'start', 'end'}
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Raised in replay mode when a call was never recorded (handled like a network failure)"""
+
+
+def _key(*parts) -> str:
+    digest = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return digest[:20]
+
+
+def _clean_params(params: Optional[Dict]) -> Dict:
+    return {k: v for k, v in (params or {}).items() if k not in SECRET_PARAMS}
+
+
+def _key_params(params: Optional[Dict]) -> Dict:
+    return {k: v for k, v in _clean_params(params).items() if k not in VOLATILE_PARAMS}
+
+
+class CassetteResponse:
+    """Just enough of requests.Response for the provider parsers"""
+
+    def __init__(self, url: str, status_code: int, body: str, content_type: str = ''):
+        self.url = url
+        self.status_code = status_code
+        self.text = body
+        self.content = body.encode('utf-8')
+        self.headers = {'Content-Type': content_type} if content_type else {}
+        self.ok = status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f'{self.status_code} (cassette)', response=self)
+
+
+def _encode_value(value):
+    """Serialize a yfinance attribute (dict/list/DataFrame) into a JSON-safe envelope"""
+    if hasattr(value, 'to_json') and hasattr(value, 'columns'):
+        return {'kind': 'frame', 'data': value.to_json(orient='split', date_format='iso')}
+    return {'kind': 'json', 'data': value}
+
+
+def _decode_value(envelope):
+    if envelope.get('kind') == 'frame':
+        import pandas as pd
+        return pd.read_json(io.StringIO(envelope['data']), orient='split')
+    return envelope.get('data')
+
+
+def _llm_text(payload: Dict) -> str:
+    messages = payload.get('messages') or []
+    last = messages[-1].get('content', '') if messages else ''
+    if isinstance(last, list):
+        last = ' '.join(block.get('text', '') for block in last if isinstance(block, dict))
+    return str(last)
+
+
+class Cassette:
+    """Record/replay store for outbound provider and LLM traffic (gzip-compressed JSONL)"""
+
+    def __init__(self, path: str = DEFAULT_CASSETTE_PATH, mode: str = '', replay_latency: bool = False):
+        self.path = path
+        self.mode = mode if mode in ('record', 'replay') else ''
+        self.replay_latency = replay_latency
+        self._entries: Dict[str, list] = {}
+        self._loose: Dict[str, list] = {}
+        self._cursors: Dict[str, int] = {}
+        self._providers = set()
+        self._lock = threading.Lock()
+        if self.mode == 'replay':
+            self._load()
+            print(f"📼 Cassette replay: {sum(len(v) for v in self._entries.values())} calls from {self.path}")
+        elif self.mode == 'record':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            print(f"📼 Cassette recording to {self.path}")
+
+    @classmethod
+    def from_env(cls) -> 'Cassette':
+        return cls(
+            path=os.getenv('CASSETTE_PATH', DEFAULT_CASSETTE_PATH),
+            mode=os.getenv('CASSETTE_MODE', '').strip().lower(),
+            replay_latency=os.getenv('CASSETTE_REPLAY_LATENCY', '') in ('1', 'true')
+        )
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == 'record'
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    # -- storage --------------------------------------------------------
+    def _load(self):
+        if not os.path.exists(self.path):
+            print(f"⚠️  Cassette {self.path} not found - every call will miss")
+            return
+        # Appends create multi-member gzip files; gzip.open reads them transparently
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # tolerate a truncated last line from an interrupted recording
+                self._index(entry)
+
+    def _index(self, entry: Dict):
+        self._entries.setdefault(entry['k'], []).append(entry)
+        if entry.get('lk'):
+            self._loose.setdefault(entry['lk'], []).append(entry)
+        self._providers.add(entry.get('p'))
+
+    def _append(self, entry: Dict):
+        line = json.dumps(entry, separators=(',', ':'), default=str) + '\n'
+        with self._lock:
+            with gzip.open(self.path, 'at', encoding='utf-8') as f:
+                f.write(line)
+
+    def _next(self, key: str, loose_key: str = None) -> Optional[Dict]:
+        """Return recorded entries for a key in recording order, repeating the last one"""
+        with self._lock:
+            for index, lookup in ((key, self._entries), (loose_key, self._loose)):
+                entries = lookup.get(index) if index else None
+                if entries:
+                    cursor = self._cursors.get(index, 0)
+                    self._cursors[index] = cursor + 1
+                    return entries[min(cursor, len(entries) - 1)]
+        return None
+
+    def _sleep(self, entry: Dict):
+        if self.replay_latency and entry.get('t'):
+            time.sleep(entry['t'])
+
+    def has_provider(self, provider: str) -> bool:
+        return provider in self._providers
+
+    def placeholder_key(self, provider: str) -> str:
+        """Stand-in API key so key-gated code paths run during replay"""
+        return f'cassette-{provider}' if self.replaying and self.has_provider(provider) else ''
+
+    # -- HTTP providers -------------------------------------------------
+    def http_key(self, provider: str, url: str, params: Optional[Dict]) -> str:
+        return _key('http', provider, url, _key_params(params))
+
+    def record_http(self, provider: str, url: str, params: Optional[Dict], response, elapsed: float):
+        self._append({
+            'k': self.http_key(provider, url, params), 'p': provider, 'u': url, 'q': _clean_params(params),
+            's': response.status_code, 'ct': response.headers.get('Content-Type', ''),
+            'b': response.text, 't': round(elapsed, 4)
+        })
+
+    def record_http_error(self, provider: str, url: str, params: Optional[Dict], error: Exception, elapsed: float):
+        self._append({
+            'k': self.http_key(provider, url, params), 'p': provider, 'u': url, 'q': _clean_params(params),
+            'e': f'{type(error).__name__}: {error}'[:300], 't': round(elapsed, 4)
+        })
+
+    def replay_http(self, provider: str, url: str, params: Optional[Dict]) -> CassetteResponse:
+        entry = self._next(self.http_key(provider, url, params))
+        if entry is None:
+            raise CassetteMiss(f'No cassette entry for {provider} {url}')
+        self._sleep(entry)
+        if 'e' in entry:
+            raise requests.exceptions.ConnectionError(f"(cassette) {entry['e']}")
+        return CassetteResponse(entry['u'], entry['s'], entry['b'], entry.get('ct', ''))
+
+    # -- yfinance -------------------------------------------------------
+    def yf_key(self, symbol: str, attribute: str, kwargs: Dict) -> str:
+        return _key('yfinance', symbol, attribute, _key_params(kwargs))
+
+    def record_yf(self, symbol: str, attribute: str, kwargs: Dict, value, elapsed: float, error: Exception = None):
+        entry = {'k': self.yf_key(symbol, attribute, kwargs), 'p': 'yfinance',
+                 'u': f'yfinance://{symbol}/{attribute}', 'q': kwargs, 't': round(elapsed, 4)}
+        if error is not None:
+            status = getattr(getattr(error, 'response', None), 'status_code', None)
+            entry['e'] = f'{type(error).__name__}: {error}'[:300]
+            entry['s'] = status
+        else:
+            entry['v'] = _encode_value(value)
+        self._append(entry)
+
+    def replay_yf(self, symbol: str, attribute: str, kwargs: Dict):
+        entry = self._next(self.yf_key(symbol, attribute, kwargs))
+        if entry is None:
+            raise CassetteMiss(f'No cassette entry for yfinance {symbol}.{attribute}')
+        self._sleep(entry)
+        if 'e' in entry:
+            if entry.get('s'):
+                response = CassetteResponse(entry['u'], entry['s'], '')
+                raise requests.exceptions.HTTPError(f"(cassette) {entry['e']}", response=response)
+            raise requests.exceptions.ConnectionError(f"(cassette) {entry['e']}")
+        return _decode_value(entry['v'])
+
+    # -- LLM providers --------------------------------------------------
+    def llm_keys(self, provider: str, payload: Dict):
+        exact = _key('llm', provider, payload)
+        # Loose key: same provider/model/leading prompt text, so prompts that differ only
+        # in volatile numbers further down still replay
+        loose = _key('llm-loose', provider, payload.get('model'), _llm_text(payload)[:120])
+        return exact, loose
+
+    def wrap_anthropic(self, client):
+        if self.replaying:
+            return _AnthropicProxy(self, None) if (client or self.has_provider('claude')) else None
+        if self.recording and client is not None:
+            return _AnthropicProxy(self, client)
+        return client
+
+    def wrap_openai(self, client):
+        if self.replaying:
+            return _OpenAIProxy(self, None) if (client or self.has_provider('openai')) else None
+        if self.recording and client is not None:
+            return _OpenAIProxy(self, client)
+        return client
+
+    def _llm_call(self, provider: str, payload: Dict, call, extract, build):
+        exact, loose = self.llm_keys(provider, payload)
+        if self.replaying:
+            entry = self._next(exact, loose)
+            if entry is None:
+                raise CassetteMiss(f'No cassette entry for {provider} {payload.get("model")}')
+            self._sleep(entry)
+            if 'e' in entry:
+                raise RuntimeError(f"(cassette) {entry['e']}")
+            return build(entry)
+        start = time.perf_counter()
+        try:
+            response = call()
+        except Exception as e:
+            self._append({'k': exact, 'lk': loose, 'p': provider, 'm': payload.get('model'),
+                          'e': f'{type(e).__name__}: {e}'[:300], 't': round(time.perf_counter() - start, 4)})
+            raise
+        text, usage = extract(response)
+        self._append({'k': exact, 'lk': loose, 'p': provider, 'm': payload.get('model'),
+                      'b': text, 'usage': usage, 't': round(time.perf_counter() - start, 4)})
+        return response
+
+
+def _usage_dict(usage) -> Dict:
+    if usage is None:
+        return {}
+    if hasattr(usage, 'model_dump'):
+        return usage.model_dump(exclude_none=True)
+    return dict(getattr(usage, '__dict__', {}))
+
+
+def _namespace(value):
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _namespace(v) for k, v in value.items()})
+    return value
+
+
+class _AnthropicProxy:
+    """Looks like anthropic.Anthropic for messages.create(); records or replays"""
+
+    def __init__(self, cassette: Cassette, client):
+        self._cassette = cassette
+        self._client = client
+        self.messages = SimpleNamespace(create=self._create)
+
+    def _create(self, **kwargs):
+        def extract(message):
+            text = ''.join(getattr(block, 'text', '') for block in message.content)
+            return text, _usage_dict(getattr(message, 'usage', None))
+
+        def build(entry):
+            return SimpleNamespace(
+                model=entry.get('m'), role='assistant', stop_reason='end_turn',
+                content=[SimpleNamespace(type='text', text=entry['b'])],
+                usage=_namespace(entry.get('usage') or {})
+            )
+        call = (lambda: self._client.messages.create(**kwargs)) if self._client else None
+        return self._cassette._llm_call('claude', kwargs, call, extract, build)
+
+
+class _OpenAIProxy:
+    """Looks like openai.OpenAI for chat.completions.create(); records or replays"""
+
+    def __init__(self, cassette: Cassette, client):
+        self._cassette = cassette
+        self._client = client
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        def extract(response):
+            return response.choices[0].message.content, _usage_dict(getattr(response, 'usage', None))
+
+        def build(entry):
+            return SimpleNamespace(
+                model=entry.get('m'),
+                choices=[SimpleNamespace(index=0, finish_reason='stop',
+                                         message=SimpleNamespace(role='assistant', content=entry['b']))],
+                usage=_namespace(entry.get('usage') or {})
+            )
+        call = (lambda: self._client.chat.completions.create(**kwargs)) if self._client else None
+        return self._cassette._llm_call('openai', kwargs, call, extract, build)
+
+
+cassette = Cassette.from_env()
@@ -0,0 +1,110 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from services.metrics import registry
+
+DEFAULT_INTENTS_FILE = Path(__file__).parent.parent / 'data' / 'chat_intents.json'
+
+FALLBACK_ANSWERS = registry.counter(
+    'stocksense_chat_fallback_total',
+    'Chat messages answered by the fallback engine, by matched intent',
+    ('intent',))
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r'[\s-]+', ' ', text.lower()).strip()
+
+
+def _trie_regex(patterns: List[str]) -> str:
+    """One regex for many phrases, factored by common prefix.
+
+    A flat "a|b|c" alternation is tried branch by branch at every position of the
+    message; the trie form rejects a position after looking at one character, so
+    matching cost stays flat as topics are added. Spaces also match hyphens.
+    """
+    trie: Dict = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        branches = [(r'[\s-]+' if char == ' ' else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy: the longer phrase wins when both "market" and "market cap" are patterns
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class IntentMatcher:
+    """Fallback chatbot answers, matched by one combined regex over every intent's patterns.
+
+    At any position the longest phrase wins ("price to earnings" over "earnings").
+    Each intent scores the number of words its matched patterns cover; ties go to
+    the intent listed first in the data file. Answers are joined once when the
+    file is loaded.
+    """
+
+    def __init__(self, intents: List[Dict], default: Dict):
+        self.intents = [intent['id'] for intent in intents]
+        self.titles = {intent['id']: intent['title'] for intent in intents}
+        self.answers = {intent['id']: '\n'.join(intent['answer']) for intent in intents}
+        # Normalized pattern -> (intent, weight, file order)
+        self._patterns: Dict[str, Tuple[str, int, int]] = {}
+        for order, intent in enumerate(intents):
+            for pattern in intent['patterns']:
+                key = _normalize(pattern)
+                self._patterns.setdefault(key, (intent['id'], len(key.split(' ')), order))
+        # A plural the file didn't list still matches
+        self._regex = re.compile(r'(?<![\w/])' + _trie_regex(list(self._patterns)) + r'(?:e?s)?(?![\w/])',
+                                 re.IGNORECASE)
+
+        topics = '\n'.join(f'- {self.titles[intent]}' for intent in self.intents)
+        default_answer = '\n'.join(default['answer']).replace('{topics}', topics)
+        self.default_answer = default_answer
+        self.default_answer_no_keys = f"{default_answer}\n\n{default['no_keys_note']}"
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'IntentMatcher':
+        with open(path or os.getenv('CHAT_INTENTS_FILE') or DEFAULT_INTENTS_FILE, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['intents'], data['default'])
+
+    def _lookup(self, matched: str) -> Optional[Tuple[str, int, int]]:
+        key = _normalize(matched)
+        for candidate in (key, key[:-1], key[:-2]):
+            if candidate in self._patterns:
+                return self._patterns[candidate]
+        return None
+
+    def match(self, message: str) -> Optional[str]:
+        """Best intent id for a message, or None"""
+        scores: Dict[str, List[int]] = {}
+        for found in self._regex.finditer(message):
+            hit = self._lookup(found.group())
+            if hit is None:
+                continue
+            intent, weight, order = hit
+            score = scores.setdefault(intent, [0, order])
+            score[0] += weight
+        if not scores:
+            return None
+        return min(scores, key=lambda intent: (-scores[intent][0], scores[intent][1]))
+
+    def answer(self, message: str, has_llm_keys: bool = True) -> str:
+        intent = self.match(message)
+        FALLBACK_ANSWERS.inc(intent=intent or 'default')
+        if intent is not None:
+            return self.answers[intent]
+        return self.default_answer if has_llm_keys else self.default_answer_no_keys
+
+
+fallback_intents = IntentMatcher.load()
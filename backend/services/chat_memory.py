@@ -0,0 +1,100 @@
+import os
+import re
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from services.prompt_budget import compact_description, estimate_tokens, fit_lines
+from database.db import get_chat_session, append_chat_turns, compact_chat_session, purge_chat_sessions
+
+# Seconds of inactivity after which a conversation is forgotten
+CHAT_SESSION_TTL = float(os.getenv('CHAT_SESSION_TTL', '3600'))
+# Tokens of history sent with each message (summary plus recent turns), and the part the summary may use
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv('CHAT_HISTORY_TOKEN_BUDGET', '1200'))
+CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv('CHAT_SUMMARY_TOKEN_BUDGET', '250'))
+# Most recent turns (a question and its answer are two) kept verbatim
+CHAT_HISTORY_TURNS = int(os.getenv('CHAT_HISTORY_TURNS', '6'))
+PURGE_EVERY = 200
+
+_SESSION_ID = re.compile(r'^[0-9a-f]{32}$')
+_MARKDOWN = re.compile(r'[*#`_>]+|^\s*[-\d.]+\s+', re.MULTILINE)
+
+
+def summarize_exchange(question: str, answer: str) -> str:
+    """One summary line for a question and its answer (extractive; no LLM call)"""
+    answer_text = ' '.join(_MARKDOWN.sub('', answer).split())
+    return f"- User asked: {compact_description(' '.join(question.split()), 30)} " \
+           f"Answer covered: {compact_description(answer_text, 40)}"
+
+
+class ChatMemory:
+    """Server-side chat conversations stored in SQLite.
+
+    Each session keeps its newest turns verbatim, as many as fit the history
+    budget, plus a running summary with one line per older exchange. The
+    oldest summary lines drop off once the summary budget is reached, so the
+    context sent with a message stays bounded however long the conversation
+    runs. Sessions idle for longer than the TTL are treated as new and purged
+    periodically.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, budget: Optional[int] = None,
+                 summary_budget: Optional[int] = None, max_turns: Optional[int] = None):
+        self.ttl = CHAT_SESSION_TTL if ttl is None else ttl
+        self.budget = budget or CHAT_HISTORY_TOKEN_BUDGET
+        self.summary_budget = min(summary_budget or CHAT_SUMMARY_TOKEN_BUDGET, self.budget)
+        self.max_turns = max_turns or CHAT_HISTORY_TURNS
+        self._writes = 0
+
+    def load(self, session_id: Optional[str]) -> Tuple[str, Dict]:
+        """(session id, history) for a message; a missing, expired or malformed id starts a new session"""
+        session = None
+        if session_id and _SESSION_ID.match(session_id):
+            session = get_chat_session(session_id, time.time() - self.ttl)
+        if session is None:
+            return uuid.uuid4().hex, {'summary': '', 'turns': []}
+        turns = [{'role': turn['role'], 'content': turn['content']} for turn in session['turns']]
+        return session_id, {'summary': session['summary'], 'turns': turns}
+
+    def record(self, session_id: str, message: str, answer: str):
+        """Store an exchange, then fold turns that no longer fit the budget into the summary"""
+        append_chat_turns(session_id, [('user', message), ('assistant', answer)], time.time())
+        self._compact(session_id)
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            purge_chat_sessions(time.time() - self.ttl)
+
+    def _compact(self, session_id: str):
+        session = get_chat_session(session_id)
+        turns = session['turns']
+        # Newest whole exchanges that fit next to a full-size summary
+        keep_from, used = len(turns), 0
+        while keep_from >= 2 and len(turns) - keep_from < self.max_turns:
+            cost = sum(estimate_tokens(turn['content']) for turn in turns[keep_from - 2:keep_from])
+            if used + cost > self.budget - self.summary_budget:
+                break
+            keep_from -= 2
+            used += cost
+        if keep_from == 0:
+            return
+
+        dropped = turns[:keep_from]
+        lines = [line for line in session['summary'].split('\n') if line]
+        lines += [summarize_exchange(dropped[i]['content'], dropped[i + 1]['content'])
+                  for i in range(0, len(dropped) - 1, 2)]
+        # Newest lines win when the summary is full
+        summary = '\n'.join(reversed(fit_lines(list(reversed(lines)), self.summary_budget)))
+        first_kept = turns[keep_from]['turn'] if keep_from < len(turns) else turns[-1]['turn'] + 1
+        compact_chat_session(session_id, summary, first_kept)
+
+
+def history_tokens(history: Optional[Dict]) -> int:
+    if not history:
+        return 0
+    return estimate_tokens(history.get('summary') or '') + sum(estimate_tokens(turn['content'])
+                                                                for turn in history.get('turns') or [])
+
+
+def history_messages(history: Optional[Dict]) -> List[Dict]:
+    """Recent turns as provider chat messages"""
+    return [{'role': turn['role'], 'content': turn['content']} for turn in (history or {}).get('turns') or []]
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import zlib
+from typing import Dict, Optional
+
+# Sections of an analysis payload, in ETag order
+ANALYSIS_SECTIONS = ('company', 'news', 'sentiment', 'analyst', 'technicals', 'ai_recommendation')
+HASH_LENGTH = 10
+
+
+def stable_hash(text: str) -> int:
+    """Process-independent integer hash (Python's hash() is salted per process)"""
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def content_hash(value) -> str:
+    """Short hash of a JSON-serializable value; key order does not matter"""
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+
+
+def analysis_hashes(analysis: Dict) -> Dict[str, str]:
+    """Per-section content hashes for an analysis payload"""
+    return {section: content_hash(analysis.get(section)) for section in ANALYSIS_SECTIONS if section in analysis}
+
+
+def make_etag(hashes: Dict[str, str]) -> str:
+    """Encode section hashes into one ETag so a later request can be answered with a delta.
+
+    The ETag carries every section hash (e.g. "company:1a2b..;news:3c4d.."), which
+    keeps delta computation stateless across gunicorn workers.
+    """
+    return '"' + ';'.join(f'{section}:{hashes[section]}' for section in ANALYSIS_SECTIONS if section in hashes) + '"'
+
+
+def parse_etag(value: Optional[str]) -> Dict[str, str]:
+    """Recover section hashes from an If-None-Match header or ?since= value"""
+    if not value:
+        return {}
+    # If-None-Match may list several tags; the first sectioned one wins
+    for tag in value.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        hashes = {}
+        for part in tag.split(';'):
+            section, _, digest = part.partition(':')
+            if section in ANALYSIS_SECTIONS and digest:
+                hashes[section] = digest
+        if hashes:
+            return hashes
+    return {}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    bare = etag.strip('"')
+    return any(tag == etag or tag == f'W/{etag}' or tag.strip('"') == bare for tag in candidates)
+
+
+def delta_payload(analysis: Dict, hashes: Dict[str, str], client_hashes: Dict[str, str]) -> Dict:
+    """Keep only sections whose hash differs from the client's copy"""
+    delta = {key: value for key, value in analysis.items() if key not in ANALYSIS_SECTIONS}
+    unchanged = []
+    for section in ANALYSIS_SECTIONS:
+        if section not in analysis:
+            continue
+        if client_hashes.get(section) == hashes.get(section):
+            unchanged.append(section)
+        else:
+            delta[section] = analysis[section]
+    delta['_delta'] = True
+    delta['_unchanged'] = unchanged
+    return delta
@@ -0,0 +1,153 @@
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from services.content_hash import stable_hash
+from services.metrics import registry
+
+# Estimated Jaccard similarity of headline (or summary) shingles above which two articles are the same story
+NEWS_DUP_THRESHOLD = float(os.getenv('NEWS_DUP_THRESHOLD', '0.6'))
+NUM_PERM = 64
+# 16 bands of 4 rows: pairs above ~0.5 similarity share a bucket with high probability,
+# so candidates are found before the threshold check and almost nothing below it is compared
+BANDS = 16
+# Summaries are compared on their opening words; shorter ones say too little to match on
+SUMMARY_WORDS = 60
+MIN_SUMMARY_SHINGLES = 8
+
+_WORD = re.compile(r'[a-z0-9]+')
+# "... - Reuters", "... | CNBC": publisher suffixes that syndicated copies add or drop
+_SUFFIX = re.compile(r'\s+[-–—|]\s+(?:\S+\s+){0,2}\S+\s*$')
+_STOPWORDS = set("""
+a an and are as at be by for from has have in into is it its of on or that the this to was were will with
+""".split())
+_PLACEHOLDER_SUMMARIES = {'no summary available', ''}
+
+NEWS_DUPLICATES = registry.counter(
+    'stocksense_news_duplicates_total',
+    'Articles dropped as near-duplicates of one already kept')
+
+
+def shingles(text: str, max_words: Optional[int] = None) -> Set[str]:
+    """Content words plus adjacent word pairs (so 'Q3 earnings' and 'Q4 earnings' stay apart)"""
+    words = [w for w in _WORD.findall((text or '').lower()) if w not in _STOPWORDS]
+    if max_words is not None:
+        words = words[:max_words]
+    return set(words) | {f'{a} {b}' for a, b in zip(words, words[1:])}
+
+
+def headline_shingles(headline: str) -> Set[str]:
+    return shingles(_SUFFIX.sub('', headline or ''))
+
+
+class MinHasher:
+    """MinHash signatures: NUM_PERM multiply-shift hashes (top 32 bits of a*x + b mod 2^64) of crc32 shingle hashes.
+
+    The 64-bit wraparound matters: without it a small x stays small under every
+    permutation and the signature values are correlated.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.randint(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64)
+
+    def signature(self, items: Set[str]) -> Optional[np.ndarray]:
+        if not items:
+            return None
+        hashes = np.fromiter((stable_hash(item) for item in items), dtype=np.uint64, count=len(items))
+        with np.errstate(over='ignore'):
+            return ((np.outer(hashes, self.a) + self.b) >> np.uint64(32)).min(axis=0)
+
+
+_default_hasher = MinHasher()
+
+
+def similarity(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> float:
+    """Estimated Jaccard similarity of the sets behind two signatures"""
+    if a is None or b is None:
+        return 0.0
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+class NearDuplicateIndex:
+    """LSH index of article signatures for near-duplicate detection.
+
+    Headline and summary each get a MinHash signature, split into bands; any
+    article sharing a band with a new one is a candidate and is confirmed by
+    estimated Jaccard similarity. An insert touches one bucket per band, so it
+    costs the same however many articles are indexed.
+    """
+
+    def __init__(self, threshold: float = NEWS_DUP_THRESHOLD, bands: int = BANDS,
+                 hasher: Optional[MinHasher] = None):
+        self.threshold = threshold
+        self.hasher = hasher or _default_hasher
+        self.bands = bands
+        self.rows = self.hasher.num_perm // bands
+        self._buckets: Dict[bytes, List[int]] = {}
+        # Per article: (headline signature, summary signature)
+        self._signatures: List[Tuple[Optional[np.ndarray], Optional[np.ndarray]]] = []
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def signatures(self, headline: str, summary: Optional[str] = None) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        summary_sig = None
+        if summary and summary.strip().lower() not in _PLACEHOLDER_SUMMARIES:
+            summary_shingles = shingles(summary, SUMMARY_WORDS)
+            if len(summary_shingles) >= MIN_SUMMARY_SHINGLES:
+                summary_sig = self.hasher.signature(summary_shingles)
+        return self.hasher.signature(headline_shingles(headline)), summary_sig
+
+    def _band_keys(self, field: int, signature: Optional[np.ndarray]):
+        if signature is None:
+            return
+        for band in range(self.bands):
+            yield bytes((field, band)) + signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _find(self, signatures) -> Optional[int]:
+        checked = set()
+        for field, signature in enumerate(signatures):
+            for key in self._band_keys(field, signature):
+                for candidate in self._buckets.get(key, ()):
+                    if candidate in checked:
+                        continue
+                    checked.add(candidate)
+                    if similarity(signature, self._signatures[candidate][field]) >= self.threshold:
+                        return candidate
+        return None
+
+    def find(self, headline: str, summary: Optional[str] = None) -> Optional[int]:
+        """Position of an indexed article this one near-duplicates, or None"""
+        return self._find(self.signatures(headline, summary))
+
+    def add(self, headline: str, summary: Optional[str] = None) -> Optional[int]:
+        """Index an article unless it near-duplicates one already indexed.
+
+        Returns the earlier article's position for a duplicate (nothing is
+        added), or None once the article has been indexed.
+        """
+        signatures = self.signatures(headline, summary)
+        duplicate_of = self._find(signatures)
+        if duplicate_of is not None:
+            return duplicate_of
+        position = len(self._signatures)
+        self._signatures.append(signatures)
+        for field, signature in enumerate(signatures):
+            for key in self._band_keys(field, signature):
+                self._buckets.setdefault(key, []).append(position)
+        return None
+
+
+def dedupe_articles(articles: List[Dict], threshold: float = NEWS_DUP_THRESHOLD) -> List[Dict]:
+    """Articles in order, dropping any that near-duplicate an earlier one (the first copy wins)"""
+    index = NearDuplicateIndex(threshold)
+    kept = [article for article in articles
+            if index.add(article.get('headline') or '', article.get('summary')) is None]
+    if len(kept) < len(articles):
+        NEWS_DUPLICATES.inc(len(articles) - len(kept))
+    return kept
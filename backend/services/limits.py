@@ -0,0 +1,76 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+from services.metrics import registry
+
+# Max concurrent in-flight calls per provider, shared by every request in this process.
+# Override with PROVIDER_CONCURRENCY="finnhub=10,yfinance=2,claude=4".
+DEFAULT_PROVIDER_CONCURRENCY = {
+    'finnhub': 8,
+    'alpha_vantage': 2,
+    'newsapi': 4,
+    'stocktwits': 4,
+    'reddit': 4,
+    'google_news': 4,
+    'yfinance': 4,
+    'claude': 4,
+    'openai': 4,
+}
+FALLBACK_CONCURRENCY = 4
+
+PROVIDER_WAITING = registry.gauge(
+    'stocksense_provider_limit_waiting',
+    'Calls waiting for a provider concurrency slot',
+    ('provider',))
+
+
+def _parse_limits(value: str) -> Dict[str, int]:
+    limits = {}
+    for pair in filter(None, (p.strip() for p in value.split(','))):
+        name, _, number = pair.partition('=')
+        try:
+            limits[name.strip()] = max(1, int(number))
+        except ValueError:
+            print(f"Ignoring invalid PROVIDER_CONCURRENCY entry: {pair}")
+    return limits
+
+
+class ProviderLimiter:
+    """Per-provider semaphores so concurrent refreshes cannot stampede one upstream"""
+
+    def __init__(self, limits: Dict[str, int] = None):
+        self.limits = dict(DEFAULT_PROVIDER_CONCURRENCY)
+        self.limits.update(limits or {})
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'ProviderLimiter':
+        return cls(_parse_limits(os.getenv('PROVIDER_CONCURRENCY', '')))
+
+    def _semaphore(self, provider: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(provider)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.limits.get(provider, FALLBACK_CONCURRENCY))
+                self._semaphores[provider] = semaphore
+            return semaphore
+
+    @contextmanager
+    def slot(self, provider: str):
+        semaphore = self._semaphore(provider)
+        if not semaphore.acquire(blocking=False):
+            PROVIDER_WAITING.inc(provider=provider)
+            try:
+                semaphore.acquire()
+            finally:
+                PROVIDER_WAITING.dec(provider=provider)
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+provider_limits = ProviderLimiter.from_env()
@@ -0,0 +1,256 @@
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Optional, Set, Tuple
+
+try:
+    from zoneinfo import ZoneInfo
+    MARKET_TZ = ZoneInfo('America/New_York')
+except Exception:  # tzdata missing (e.g. bare Windows installs); US Eastern rules are applied by hand
+    MARKET_TZ = None
+
+OPEN_TIME = (9, 30)
+CLOSE_TIME = (16, 0)
+EARLY_CLOSE_TIME = (13, 0)
+# Minutes after the close during which data still counts as live (closing auction, late prints)
+MARKET_SETTLE_MINUTES = float(os.getenv('MARKET_SETTLE_MINUTES', '20'))
+# Longest the quote poller sleeps while the market is closed
+CLOSED_POLL_INTERVAL = 3600
+
+# One-off closures not covered by the holiday rules (national days of mourning);
+# add more with MARKET_EXTRA_HOLIDAYS="2025-01-09,..."
+SPECIAL_CLOSURES = {
+    date(2018, 12, 5),
+    date(2025, 1, 9),
+}
+
+# Seconds each cache kind may live while the market is closed; None = until the next open.
+# Kinds not listed keep their normal TTL around the clock. Override with CACHE_CLOSED_TTL_<NAME>
+# (a number of seconds, or "open").
+DEFAULT_CLOSED_TTLS = {
+    'quote': None,
+    'overview': None,
+    # Companies publish news and earnings outside trading hours, so keep polling, just slowly
+    'news': 3600,
+    'market_news': 3600,
+    'sentiment': 3600,
+}
+
+
+def _easter(year: int) -> date:
+    """Western Easter Sunday (anonymous Gregorian computus)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    return date(year, month, (h + l - 7 * m + 114) % 31 + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """nth (1-based) weekday of a month; n=-1 is the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays move to Friday, Sunday ones to Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=16)
+def nyse_holidays(year: int) -> Dict[date, str]:
+    """Full-day NYSE closures in a year, by the exchange's standing rules"""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+        _nth_weekday(year, 2, 0, 3): "Washington's Birthday",
+        _easter(year) - timedelta(days=2): "Good Friday",
+        _nth_weekday(year, 5, 0, -1): "Memorial Day",
+        _observed(date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, 0, 1): "Labor Day",
+        _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+        _observed(date(year, 12, 25)): "Christmas Day",
+    }
+    # A Saturday New Year's Day is not made up on the Friday before (that Friday ends the previous year)
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays[_observed(new_year)] = "New Year's Day"
+    if year >= 2022:
+        holidays[_observed(date(year, 6, 19))] = "Juneteenth"
+    return holidays
+
+
+@lru_cache(maxsize=16)
+def nyse_early_closes(year: int) -> Set[date]:
+    """1:00 pm closes: the eve of Independence Day and Christmas (Monday to Thursday only) and Black Friday"""
+    days = {_nth_weekday(year, 11, 3, 4) + timedelta(days=1)}
+    for day in (date(year, 7, 3), date(year, 12, 24)):
+        if day.weekday() <= 3:
+            days.add(day)
+    return days
+
+
+def _us_eastern_offset(utc: datetime) -> timedelta:
+    """UTC offset of US Eastern time: DST from 2am on the second Sunday of March to 2am on the first Sunday of November"""
+    year = utc.year
+    dst_start = datetime.combine(_nth_weekday(year, 3, 6, 2), datetime.min.time()) + timedelta(hours=7)
+    dst_end = datetime.combine(_nth_weekday(year, 11, 6, 1), datetime.min.time()) + timedelta(hours=6)
+    naive = utc.replace(tzinfo=None)
+    return timedelta(hours=-4) if dst_start <= naive < dst_end else timedelta(hours=-5)
+
+
+def _parse_dates(value: str) -> Set[date]:
+    days = set()
+    for part in filter(None, (p.strip() for p in value.split(','))):
+        try:
+            days.add(date.fromisoformat(part))
+        except ValueError:
+            print(f"Ignoring invalid MARKET_EXTRA_HOLIDAYS entry: {part}")
+    return days
+
+
+def _parse_closed_ttls() -> Dict[str, Optional[float]]:
+    ttls = dict(DEFAULT_CLOSED_TTLS)
+    for name in ttls:
+        override = os.getenv(f'CACHE_CLOSED_TTL_{name.upper()}')
+        if override:
+            ttls[name] = None if override.strip().lower() == 'open' else float(override)
+    return ttls
+
+
+class MarketCalendar:
+    """NYSE trading sessions computed locally (no upstream calendar API).
+
+    Knows weekends, the exchange's holiday rules, 1:00 pm early closes and a
+    short list of one-off closures. Freshness decisions treat the market as
+    live from the open until `settle_minutes` after the close, so the closing
+    price is picked up before caches stretch to the next open.
+    """
+
+    def __init__(self, settle_minutes: float = MARKET_SETTLE_MINUTES, extra_closures: Optional[Set[date]] = None,
+                 closed_ttls: Optional[Dict[str, Optional[float]]] = None):
+        self.settle = timedelta(minutes=settle_minutes)
+        self.closures = SPECIAL_CLOSURES | (extra_closures or set())
+        self.closed_ttls = dict(DEFAULT_CLOSED_TTLS if closed_ttls is None else closed_ttls)
+
+    @classmethod
+    def from_env(cls) -> 'MarketCalendar':
+        return cls(extra_closures=_parse_dates(os.getenv('MARKET_EXTRA_HOLIDAYS', '')),
+                   closed_ttls=_parse_closed_ttls())
+
+    @staticmethod
+    def to_market_time(timestamp: Optional[float] = None) -> datetime:
+        """Exchange-local datetime (aware) for a Unix timestamp, now by default"""
+        utc = datetime.fromtimestamp(time.time() if timestamp is None else timestamp, timezone.utc)
+        if MARKET_TZ is not None:
+            return utc.astimezone(MARKET_TZ)
+        return utc.astimezone(timezone(_us_eastern_offset(utc)))
+
+    def today(self, timestamp: Optional[float] = None) -> date:
+        """Current date on the exchange's clock"""
+        return self.to_market_time(timestamp).date()
+
+    @staticmethod
+    def _at(day: date, hour_minute: Tuple[int, int]) -> float:
+        """Unix timestamp of an exchange-local wall-clock time"""
+        local = datetime(day.year, day.month, day.day, *hour_minute)
+        if MARKET_TZ is not None:
+            return local.replace(tzinfo=MARKET_TZ).timestamp()
+        # Session times are never near the 2am DST switch, so the noon offset is the day's offset
+        offset = _us_eastern_offset(datetime(day.year, day.month, day.day, 17))
+        return local.replace(tzinfo=timezone(offset)).timestamp()
+
+    def holiday(self, day: date) -> Optional[str]:
+        """Name of the closure on a weekday, or None"""
+        if day in self.closures:
+            return 'Special closure'
+        return nyse_holidays(day.year).get(day)
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and self.holiday(day) is None
+
+    def session(self, day: date) -> Optional[Tuple[float, float]]:
+        """(open, close) Unix timestamps of a day's regular session, or None if the market is shut"""
+        if not self.is_trading_day(day):
+            return None
+        close = EARLY_CLOSE_TIME if day in nyse_early_closes(day.year) else CLOSE_TIME
+        return self._at(day, OPEN_TIME), self._at(day, close)
+
+    def is_open(self, timestamp: Optional[float] = None) -> bool:
+        """Regular session in progress"""
+        now = time.time() if timestamp is None else timestamp
+        session = self.session(self.to_market_time(now).date())
+        return session is not None and session[0] <= now < session[1]
+
+    def is_live(self, timestamp: Optional[float] = None) -> bool:
+        """Session in progress or closed less than the settle period ago; data should be kept fresh"""
+        now = time.time() if timestamp is None else timestamp
+        session = self.session(self.to_market_time(now).date())
+        return session is not None and session[0] <= now < session[1] + self.settle.total_seconds()
+
+    def next_open(self, timestamp: Optional[float] = None) -> float:
+        """Unix timestamp of the next session open strictly after now"""
+        now = time.time() if timestamp is None else timestamp
+        day = self.to_market_time(now).date()
+        for offset in range(15):
+            session = self.session(day + timedelta(days=offset))
+            if session is not None and session[0] > now:
+                return session[0]
+        raise RuntimeError(f'No NYSE session within 15 days of {day}')
+
+    def last_close(self, timestamp: Optional[float] = None) -> float:
+        """Unix timestamp of the most recent session close at or before now"""
+        now = time.time() if timestamp is None else timestamp
+        day = self.to_market_time(now).date()
+        for offset in range(15):
+            session = self.session(day - timedelta(days=offset))
+            if session is not None and session[1] <= now:
+                return session[1]
+        raise RuntimeError(f'No NYSE session within 15 days before {day}')
+
+    def cache_ttl(self, kind: str, ttl: float, timestamp: Optional[float] = None) -> float:
+        """TTL for a cache entry written now: the normal TTL while the market is live;
+        while it is closed, until the next open (or the kind's closed-market TTL if shorter)"""
+        if kind not in self.closed_ttls:
+            return ttl
+        now = time.time() if timestamp is None else timestamp
+        if self.is_live(now):
+            return ttl
+        closed_ttl = self.next_open(now) - now
+        if self.closed_ttls[kind] is not None:
+            closed_ttl = min(closed_ttl, self.closed_ttls[kind])
+        return max(ttl, closed_ttl)
+
+    def poll_interval(self, interval: float, timestamp: Optional[float] = None) -> float:
+        """Seconds until a live poller should fetch again: its interval while the market is live,
+        otherwise until the next open (at most CLOSED_POLL_INTERVAL)"""
+        now = time.time() if timestamp is None else timestamp
+        if self.is_live(now):
+            return interval
+        return max(interval, min(CLOSED_POLL_INTERVAL, self.next_open(now) - now))
+
+    def status(self, timestamp: Optional[float] = None) -> Dict:
+        now = time.time() if timestamp is None else timestamp
+        today = self.to_market_time(now).date()
+        session = self.session(today)
+        return {
+            'open': self.is_open(now),
+            'holiday': self.holiday(today) if today.weekday() < 5 else None,
+            'earlyClose': session is not None and today in nyse_early_closes(today.year),
+            'nextOpen': self.to_market_time(self.next_open(now)).isoformat(),
+        }
+
+
+market_calendar = MarketCalendar.from_env()
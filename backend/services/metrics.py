@@ -0,0 +1,319 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from services import tracing
+
+# Latency buckets (seconds) shared by request, stage and provider histograms.
+# Upstream calls range from a few ms (cached) to 10s+ (LLM / slow scrapers).
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(label_names: Tuple[str, ...], label_values: Tuple[str, ...], extra: Dict = None) -> str:
+    """Render a Prometheus label set like {provider="finnhub",status="ok"}"""
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.extend(extra.items())
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally split by labels"""
+    metric_type = 'counter'
+
+    def __init__(self, name, documentation, label_names=()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}' for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (queue depth, in-flight work)"""
+    metric_type = 'gauge'
+
+    def __init__(self, name, documentation, label_names=()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}' for key, value in items]
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed distribution of observed values (latencies)"""
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = [0] * (len(self.buckets) + 1) + [0.0]
+                self._values[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the enclosed block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return int(series[len(self.buckets)]) if series else 0
+
+    def _render_samples(self):
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+        lines = []
+        for key, series in items:
+            for i, bound in enumerate(self.buckets):
+                labels = _format_labels(self.label_names, key, {'le': _format_value(bound)})
+                lines.append(f'{self.name}_bucket{labels} {_format_value(series[i])}')
+            labels = _format_labels(self.label_names, key, {'le': '+Inf'})
+            lines.append(f'{self.name}_bucket{labels} {_format_value(series[len(self.buckets)])}')
+            plain = _format_labels(self.label_names, key)
+            lines.append(f'{self.name}_sum{plain} {_format_value(series[-1])}')
+            lines.append(f'{self.name}_count{plain} {_format_value(series[len(self.buckets)])}')
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names=()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names=()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# HTTP layer
+REQUEST_LATENCY = registry.histogram(
+    'stocksense_request_duration_seconds',
+    'Latency of API requests by endpoint',
+    ('endpoint', 'method', 'status'))
+
+# Analysis pipeline stages (company overview, news, sentiment, analyst, ai)
+STAGE_LATENCY = registry.histogram(
+    'stocksense_stage_duration_seconds',
+    'Latency of individual analysis stages',
+    ('stage',))
+
+# Upstream providers
+PROVIDER_LATENCY = registry.histogram(
+    'stocksense_provider_request_duration_seconds',
+    'Latency of outbound provider calls',
+    ('provider', 'operation'))
+PROVIDER_ERRORS = registry.counter(
+    'stocksense_provider_errors_total',
+    'Outbound provider calls that failed or returned a non-2xx status',
+    ('provider', 'operation'))
+PROVIDER_RATE_LIMITED = registry.counter(
+    'stocksense_provider_rate_limited_total',
+    'Outbound provider calls answered with HTTP 429',
+    ('provider',))
+
+# Caches
+CACHE_REQUESTS = registry.counter(
+    'stocksense_cache_requests_total',
+    'Cache lookups by cache name and result (hit/miss)',
+    ('cache', 'result'))
+
+# LLM usage
+LLM_TOKENS = registry.counter(
+    'stocksense_llm_tokens_total',
+    'LLM tokens by kind: input (uncached prompt), cache_read, cache_write and output',
+    ('provider', 'operation', 'kind'))
+
+# Executors
+EXECUTOR_QUEUE_DEPTH = registry.gauge(
+    'stocksense_executor_queue_depth',
+    'Tasks submitted to an executor that have not finished yet',
+    ('executor',))
+
+
+def record_cache(cache: str, hit: bool):
+    """Count a cache lookup; hit ratio = hit / (hit + miss)"""
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def _usage_field(usage, name: str) -> int:
+    value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+    return value if isinstance(value, int) else 0
+
+
+def record_llm_usage(provider: str, operation: str, usage) -> Dict[str, int]:
+    """Count tokens from an Anthropic or OpenAI usage object and tag the current span.
+
+    Anthropic reports uncached input, cache reads and cache writes separately;
+    OpenAI's prompt_tokens includes the cached prefix, which is split out here.
+    """
+    if usage is None:
+        return {}
+    if _usage_field(usage, 'prompt_tokens') or _usage_field(usage, 'completion_tokens'):
+        details = usage.get('prompt_tokens_details') if isinstance(usage, dict) else getattr(usage, 'prompt_tokens_details', None)
+        cached = _usage_field(details, 'cached_tokens') if details is not None else 0
+        tokens = {
+            'input': _usage_field(usage, 'prompt_tokens') - cached,
+            'cache_read': cached,
+            'cache_write': 0,
+            'output': _usage_field(usage, 'completion_tokens'),
+        }
+    else:
+        tokens = {
+            'input': _usage_field(usage, 'input_tokens'),
+            'cache_read': _usage_field(usage, 'cache_read_input_tokens'),
+            'cache_write': _usage_field(usage, 'cache_creation_input_tokens'),
+            'output': _usage_field(usage, 'output_tokens'),
+        }
+    for kind, count in tokens.items():
+        if count:
+            LLM_TOKENS.inc(count, provider=provider, operation=operation, kind=kind)
+    tracing.annotate(**{f'tokens_{kind}': count for kind, count in tokens.items()})
+    return tokens
+
+
+def _status_of(exc: BaseException) -> Optional[int]:
+    response = getattr(exc, 'response', None)
+    return getattr(response, 'status_code', None) if response is not None else None
+
+
+@contextmanager
+def provider_call(provider: str, operation: str = 'request'):
+    """Time an outbound provider call and count failures / 429s.
+
+    Exceptions propagate unchanged; an HTTPError carrying a 429 response is
+    additionally counted as a rate-limit event.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        PROVIDER_ERRORS.inc(provider=provider, operation=operation)
+        if _status_of(e) == 429:
+            PROVIDER_RATE_LIMITED.inc(provider=provider)
+        raise
+    finally:
+        PROVIDER_LATENCY.observe(time.perf_counter() - start, provider=provider, operation=operation)
+
+
+def record_provider_status(provider: str, operation: str, status_code: int):
+    """Count non-2xx HTTP responses that did not raise"""
+    if status_code == 429:
+        PROVIDER_RATE_LIMITED.inc(provider=provider)
+    if status_code >= 400:
+        PROVIDER_ERRORS.inc(provider=provider, operation=operation)
+
+
+def track_submit(executor_name: str, future):
+    """Increment the executor queue gauge until the future completes"""
+    EXECUTOR_QUEUE_DEPTH.inc(executor=executor_name)
+    future.add_done_callback(lambda _: EXECUTOR_QUEUE_DEPTH.dec(executor=executor_name))
+    return future
@@ -0,0 +1,59 @@
+import os
+import time
+from typing import Dict, List, Optional
+
+from services.dedup import dedupe_articles
+from services.metrics import registry
+from database.db import get_news_cursor, store_news_articles, get_stored_news, purge_news
+
+# Days of company news kept; a provider with no cursor yet is asked for this much history
+NEWS_RETENTION_DAYS = float(os.getenv('NEWS_RETENTION_DAYS', '30'))
+PURGE_EVERY = 500
+
+NEWS_ARTICLES = registry.counter(
+    'stocksense_news_articles_total',
+    'Articles returned by news providers: new ones stored, or already seen (at or before the cursor, or duplicates)',
+    ('provider', 'result'))
+
+
+class NewsStore:
+    """Company news accumulated in SQLite, with a high-water mark per symbol and provider.
+
+    Fetchers ask each provider only for articles published after its cursor;
+    what comes back is deduplicated against everything stored (by headline or
+    URL) and reads take the newest rows by publish date, minus near-duplicate
+    syndicated copies. Articles older than the retention window are purged
+    periodically.
+    """
+
+    def __init__(self, retention_days: float = NEWS_RETENTION_DAYS):
+        self.retention = retention_days * 86400
+        self._writes = 0
+
+    def since(self, symbol: str, provider: str) -> Optional[int]:
+        """Publish time of the newest article seen from this provider, or None for a full fetch"""
+        return get_news_cursor(symbol, provider)
+
+    def add(self, symbol: str, provider: str, articles: List[Dict], since: Optional[int] = None) -> int:
+        """Store what a provider returned and advance its cursor; returns the number of new articles"""
+        fresh = [article for article in articles
+                 if article.get('headline') and (since is None or (article.get('date') or 0) > since)]
+        newest = max([article.get('date') or 0 for article in fresh] + [since or 0])
+        added = store_news_articles(symbol, provider, fresh, time.time(), newest)
+        NEWS_ARTICLES.inc(added, provider=provider, result='new')
+        NEWS_ARTICLES.inc(len(articles) - added, provider=provider, result='seen')
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            purge_news(time.time() - self.retention)
+        return added
+
+    def latest(self, symbol: str, limit: int) -> List[Dict]:
+        """Newest distinct stored articles, most recent first, in the provider fetchers' article shape"""
+        # Read extra rows so near-duplicates don't leave the list short
+        articles = [dict(article, summary=article['summary'] or 'No summary available',
+                         source=article['source'] or 'Unknown')
+                    for article in get_stored_news(symbol, limit * 3)]
+        return dedupe_articles(articles)[:limit]
+
+
+news_store = NewsStore()
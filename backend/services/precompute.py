@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+
+from services.analysis import DATA_SECTIONS, build_analysis, symbol_executor
+from services.content_hash import content_hash
+from services.metrics import record_cache, track_submit
+from database.db import is_starred, get_saved_recommendation, save_recommendation
+
+# Analysis sections the recommendation is built from
+INPUT_SECTIONS = ('company', 'news', 'sentiment', 'analyst', 'technicals')
+
+
+def input_hash(data: Dict) -> str:
+    return content_hash({section: data.get(section) for section in INPUT_SECTIONS})
+
+
+class RecommendationPrecomputer:
+    """Keeps an up-to-date AI recommendation for every starred symbol, generated off the request path.
+
+    Requests for a starred symbol are answered with the stored recommendation;
+    when the data they fetched differs from what it was built from, a
+    regeneration is queued. Jobs are coalesced per symbol (the newest data
+    wins) and run on a small pool, so LLM concurrency stays bounded.
+    """
+
+    def __init__(self, ai_service, workers: Optional[int] = None, min_interval: Optional[float] = None):
+        self.ai_service = ai_service
+        self.executor = ThreadPoolExecutor(max_workers=workers or int(os.getenv('PRECOMPUTE_CONCURRENCY', '2')),
+                                           thread_name_prefix='precompute')
+        # Prices move every request; don't regenerate more often than this even if the inputs changed
+        self.min_interval = float(os.getenv('PRECOMPUTE_MIN_INTERVAL', '900')) if min_interval is None else min_interval
+        self._pending: Dict[str, Dict] = {}
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def tracks(self, symbol: str) -> bool:
+        return is_starred(symbol)
+
+    def latest(self, symbol: str) -> Optional[Dict]:
+        """Stored {recommendation, input_hash, generated_at} for a starred symbol, or None"""
+        saved = get_saved_recommendation(symbol)
+        record_cache('precomputed_recommendation', saved is not None)
+        return saved
+
+    @staticmethod
+    def payload(saved: Dict) -> Dict:
+        """The stored recommendation as served in an analysis"""
+        return dict(saved['recommendation'], generatedAt=saved['generated_at'], precomputed=True)
+
+    def save(self, symbol: str, data: Dict, recommendation: Dict):
+        save_recommendation(symbol, input_hash(data), recommendation)
+
+    def submit(self, symbol: str, data: Dict, saved: Optional[Dict] = None) -> bool:
+        """Queue a regeneration if the inputs changed and the stored one is old enough; True if queued"""
+        if saved is not None:
+            if saved['input_hash'] == input_hash(data):
+                return False
+            generated = datetime.fromisoformat(str(saved['generated_at']))
+            if (datetime.now() - generated).total_seconds() < self.min_interval:
+                return False
+        with self._lock:
+            queued = symbol in self._pending or symbol in self._running
+            self._pending[symbol] = data
+        if not queued:
+            track_submit('precompute', self.executor.submit(self._run, symbol))
+        return True
+
+    def prime(self, symbol: str, stock_service):
+        """Fetch fresh data for a newly starred symbol in the background and queue its recommendation"""
+        def fetch():
+            data = build_analysis(symbol, stock_service, self.ai_service, fields=list(DATA_SECTIONS))
+            self.submit(symbol, data, get_saved_recommendation(symbol))
+        track_submit('refresh', symbol_executor.submit(fetch))
+
+    def _run(self, symbol: str):
+        with self._lock:
+            data = self._pending.pop(symbol, None)
+            if data is None:
+                return
+            self._running.add(symbol)
+        started = time.perf_counter()
+        try:
+            recommendation = self.ai_service.generate_recommendation(
+                symbol=symbol,
+                company_data=data.get('company') or {},
+                news_data=data.get('news') or [],
+                sentiment_data=data.get('sentiment') or {},
+                analyst_data=data.get('analyst') or {},
+                technical_data=data.get('technicals') or {},
+                fallback=False
+            )
+            self.save(symbol, data, recommendation)
+            print(f"Precomputed recommendation for {symbol} in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            print(f"Recommendation precompute error for {symbol}: {e}")
+        finally:
+            with self._lock:
+                self._running.discard(symbol)
+                # Newer data arrived while this one ran
+                rerun = symbol in self._pending
+            if rerun:
+                track_submit('precompute', self.executor.submit(self._run, symbol))
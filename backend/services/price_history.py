@@ -0,0 +1,198 @@
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from services.market_calendar import market_calendar
+
+DEFAULT_HISTORY_DIR = Path(__file__).parent.parent / 'database' / 'price_history'
+
+# One raw little-endian binary file per column, appended to in place
+COLUMNS = {
+    'date': np.dtype('<M8[D]'),
+    'open': np.dtype('<f8'),
+    'high': np.dtype('<f8'),
+    'low': np.dtype('<f8'),
+    'close': np.dtype('<f8'),
+    'volume': np.dtype('<i8'),
+}
+FRAME_COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+
+
+def last_completed_session(today: Optional[date] = None) -> date:
+    """Most recent trading day strictly before today; its bar is final"""
+    day = (today or market_calendar.today()) - timedelta(days=1)
+    while not market_calendar.is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+class PriceHistory:
+    """Read-only column view of one symbol's daily bars (memory-mapped, no copies)"""
+
+    def __init__(self, symbol: str, columns: Dict[str, np.ndarray]):
+        self.symbol = symbol
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns['date'])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def tail(self, rows: int) -> 'PriceHistory':
+        return PriceHistory(self.symbol, {name: values[-rows:] for name, values in self.columns.items()})
+
+    def to_dict(self) -> Dict:
+        return {
+            'symbol': self.symbol,
+            'dates': [str(d) for d in self.columns['date']],
+            **{name: self.columns[name].tolist() for name in FRAME_COLUMNS}
+        }
+
+
+class PriceHistoryStore:
+    """Per-symbol daily OHLCV stored column-wise on disk.
+
+    Layout: <root>/<SYMBOL>/<column>.bin plus meta.json holding the committed row
+    count. Appends write the column files first and then swap meta.json, so a
+    crash mid-append leaves trailing bytes that the next append truncates away.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or os.getenv('PRICE_HISTORY_DIR') or DEFAULT_HISTORY_DIR)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._views: Dict[str, tuple] = {}
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _dir(self, symbol: str) -> Path:
+        return self.root / symbol.upper().replace('/', '_')
+
+    def meta(self, symbol: str) -> Dict:
+        try:
+            with open(self._dir(symbol) / 'meta.json') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'rows': 0, 'last_date': None, 'checked': 0}
+
+    def _write_meta(self, symbol: str, meta: Dict):
+        path = self._dir(symbol) / 'meta.json'
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+
+    def read(self, symbol: str) -> Optional[PriceHistory]:
+        """Memory-map the stored bars; None if nothing is stored yet"""
+        symbol = symbol.upper()
+        rows = self.meta(symbol)['rows']
+        if not rows:
+            return None
+        cached = self._views.get(symbol)
+        if cached and cached[0] == rows:
+            return cached[1]
+        directory = self._dir(symbol)
+        try:
+            columns = {name: np.memmap(directory / f'{name}.bin', dtype=dtype, mode='r', shape=(rows,))
+                       for name, dtype in COLUMNS.items()}
+        except (OSError, ValueError) as e:
+            # Files shorter than meta.json says: a rewrite is in progress or the store is damaged
+            print(f"Price history read error for {symbol}: {e}")
+            return None
+        history = PriceHistory(symbol, columns)
+        self._views[symbol] = (rows, history)
+        return history
+
+    def append(self, symbol: str, frame) -> int:
+        """Append bars from a yfinance history DataFrame newer than the last stored date.
+
+        Returns the number of rows added.
+        """
+        symbol = symbol.upper()
+        with self._lock(symbol):
+            meta = self.meta(symbol)
+            meta['checked'] = time.time()
+            directory = self._dir(symbol)
+            directory.mkdir(parents=True, exist_ok=True)
+
+            added = 0
+            if frame is not None and not frame.empty:
+                index = frame.index
+                if getattr(index, 'tz', None) is not None:
+                    index = index.tz_localize(None)
+                dates = np.asarray(index.values).astype('datetime64[D]')
+                # Only completed sessions are stored; today's bar is still moving
+                keep = dates < np.datetime64(market_calendar.today())
+                if meta['last_date']:
+                    keep &= dates > np.datetime64(meta['last_date'])
+                if keep.any():
+                    new = {'date': dates[keep]}
+                    for name, source in FRAME_COLUMNS.items():
+                        values = frame[source].to_numpy()[keep]
+                        new[name] = np.nan_to_num(values).astype(COLUMNS[name]) if name == 'volume' else values.astype(COLUMNS[name])
+                    for name, dtype in COLUMNS.items():
+                        with open(directory / f'{name}.bin', 'ab') as f:
+                            # Drop bytes from an append that never committed
+                            f.truncate(meta['rows'] * dtype.itemsize)
+                            f.write(new[name].tobytes())
+                    added = len(new['date'])
+                    meta['rows'] += added
+                    meta['last_date'] = str(new['date'][-1])
+            self._write_meta(symbol, meta)
+            return added
+
+    def overlap_matches(self, symbol: str, frame) -> bool:
+        """True if the frame's bar for the last stored date agrees with the stored close"""
+        history = self.read(symbol)
+        if history is None or frame is None or frame.empty:
+            return True
+        index = frame.index.tz_localize(None) if getattr(frame.index, 'tz', None) is not None else frame.index
+        dates = np.asarray(index.values).astype('datetime64[D]')
+        overlap = np.nonzero(dates == history['date'][-1])[0]
+        if not len(overlap):
+            return True
+        stored = history['close'][-1]
+        fetched = float(frame['Close'].iloc[overlap[0]])
+        return abs(fetched - stored) <= 1e-4 * max(abs(stored), 1.0)
+
+    def rewrite(self, symbol: str, frame) -> int:
+        """Replace everything stored for a symbol with the given frame"""
+        symbol = symbol.upper()
+        with self._lock(symbol):
+            directory = self._dir(symbol)
+            directory.mkdir(parents=True, exist_ok=True)
+            meta = self.meta(symbol)
+            meta.update(rows=0, last_date=None)
+            self._write_meta(symbol, meta)
+            # Swap in fresh empty files rather than truncating: views already handed out
+            # keep mapping the old files, and truncating a mapped file would crash them
+            for name in COLUMNS:
+                tmp = directory / f'{name}.bin.tmp'
+                open(tmp, 'wb').close()
+                os.replace(tmp, directory / f'{name}.bin')
+            self._views.pop(symbol, None)
+        return self.append(symbol, frame)
+
+    def needs_update(self, symbol: str, recheck_seconds: float) -> bool:
+        meta = self.meta(symbol)
+        if meta['last_date'] and meta['last_date'] >= last_completed_session().isoformat():
+            return False
+        # Holidays and delisted symbols never produce the expected bar; don't ask every call
+        return time.time() - meta.get('checked', 0) >= recheck_seconds
+
+    def symbols(self):
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / 'meta.json').exists())
+
+
+price_history = PriceHistoryStore()
@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from services.market_calendar import market_calendar
+from services.metrics import registry
+
+PRICE_STREAM_INTERVAL = float(os.getenv('PRICE_STREAM_INTERVAL', '15'))
+PRICE_STREAM_WORKERS = int(os.getenv('PRICE_STREAM_WORKERS', '4'))
+
+STREAM_SUBSCRIBERS = registry.gauge(
+    'stocksense_price_stream_subscribers',
+    'Open price stream subscriptions')
+STREAM_SYMBOLS = registry.gauge(
+    'stocksense_price_stream_symbols',
+    'Distinct symbols polled by the price stream')
+STREAM_QUOTE_FETCHES = registry.counter(
+    'stocksense_price_stream_quote_fetches_total',
+    'Upstream quote fetches made by the price stream poller')
+
+
+class Subscription:
+    """One client's view of the stream; pending updates are coalesced per symbol"""
+
+    def __init__(self, symbols: Set[str]):
+        self.symbols = symbols
+        self._pending: Dict[str, Dict] = {}
+        self._condition = threading.Condition()
+
+    def push(self, quotes: Dict[str, Dict]):
+        with self._condition:
+            self._pending.update(quotes)
+            self._condition.notify()
+
+    def next(self, timeout: float) -> Dict[str, Dict]:
+        """Wait up to timeout for updates; a slow reader only ever sees the latest quote"""
+        with self._condition:
+            if not self._pending:
+                self._condition.wait(timeout)
+            updates, self._pending = self._pending, {}
+            return updates
+
+
+class QuotePoller:
+    """Shared background poller: each subscribed symbol is fetched once per tick,
+    however many clients watch it, and only changed quotes are pushed"""
+
+    def __init__(self, fetch_quote: Callable[[str], Optional[Dict]], interval: float = PRICE_STREAM_INTERVAL,
+                 workers: int = PRICE_STREAM_WORKERS):
+        self.fetch_quote = fetch_quote
+        self.interval = interval
+        self.workers = workers
+        self._subscriptions: Set[Subscription] = set()
+        self._refcounts: Dict[str, int] = {}
+        self._latest: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def subscribe(self, symbols: Iterable[str]) -> Subscription:
+        subscription = Subscription(set(symbols))
+        with self._lock:
+            self._subscriptions.add(subscription)
+            new_symbols = False
+            for symbol in subscription.symbols:
+                new_symbols = new_symbols or symbol not in self._refcounts
+                self._refcounts[symbol] = self._refcounts.get(symbol, 0) + 1
+            snapshot = {s: self._latest[s] for s in subscription.symbols if s in self._latest}
+            self._update_gauges()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='quote-poller', daemon=True)
+                self._thread.start()
+        # New clients get the last known prices straight away
+        if snapshot:
+            subscription.push(snapshot)
+        if new_symbols:
+            self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.discard(subscription)
+            for symbol in subscription.symbols:
+                self._refcounts[symbol] -= 1
+                if self._refcounts[symbol] <= 0:
+                    del self._refcounts[symbol]
+                    self._latest.pop(symbol, None)
+            self._update_gauges()
+
+    def _update_gauges(self):
+        STREAM_SUBSCRIBERS.set(len(self._subscriptions))
+        STREAM_SYMBOLS.set(len(self._refcounts))
+
+    def _fetch(self, symbol: str) -> Optional[Dict]:
+        STREAM_QUOTE_FETCHES.inc()
+        try:
+            return self.fetch_quote(symbol)
+        except Exception as e:
+            print(f"Price stream quote error for {symbol}: {e}")
+            return None
+
+    def poll_once(self, only_new: bool = False):
+        """Fetch every subscribed symbol once and fan changed quotes out to subscribers"""
+        with self._lock:
+            symbols = sorted(s for s in self._refcounts if not only_new or s not in self._latest)
+        if not symbols:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(symbols)), thread_name_prefix='quote') as pool:
+            quotes = dict(zip(symbols, pool.map(self._fetch, symbols)))
+
+        with self._lock:
+            changed = {}
+            for symbol, quote in quotes.items():
+                if quote is None or symbol not in self._refcounts:
+                    continue
+                previous = self._latest.get(symbol)
+                if previous is None or (previous['currentPrice'], previous['changePercent']) != (quote['currentPrice'], quote['changePercent']):
+                    changed[symbol] = quote
+                self._latest[symbol] = quote
+            subscriptions = list(self._subscriptions)
+        if not changed:
+            return
+        for subscription in subscriptions:
+            updates = {s: q for s, q in changed.items() if s in subscription.symbols}
+            if updates:
+                subscription.push(updates)
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while True:
+            self._wake.clear()
+            if time.monotonic() >= next_tick:
+                # Outside market hours quotes don't move; poll again at the next open
+                next_tick = time.monotonic() + market_calendar.poll_interval(self.interval)
+                self.poll_once()
+            else:
+                # Woken early by a new subscription: fetch just the symbols nobody has a price for yet
+                self.poll_once(only_new=True)
+            self._wake.wait(max(0.0, next_tick - time.monotonic()))
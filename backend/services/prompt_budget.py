@@ -0,0 +1,117 @@
+import math
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+from services.metrics import registry
+
+# Letter runs, digit runs and single symbols: roughly where BPE tokenizers split English text
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(])')
+# Words that mark the sentences of a business summary worth keeping
+_BUSINESS_TERMS = re.compile(
+    r'\b(products?|services?|customers?|segments?|revenue|market|platform|brands?|leading|largest|'
+    r'operates|provides|designs|develops|manufactures|sells|offers)\b', re.IGNORECASE)
+_CORPORATE_SUFFIX = re.compile(
+    r'\s+(inc|corp|corporation|co|company|ltd|limited|plc|holdings?|group|sa|ag|nv)\.?$', re.IGNORECASE)
+
+# Token budget for the per-symbol part of the recommendation prompt (the static system block
+# is not counted). PROMPT_TOKEN_BUDGETS overrides it per model: "claude-3-haiku-20240307=600,gpt-4o=900"
+DEFAULT_PROMPT_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '700'))
+MIN_DESCRIPTION_TOKENS = 40
+# News keeps at least this much however long the fixed fields and summary are
+MIN_NEWS_TOKENS = 40
+
+PROMPT_TOKENS = registry.histogram(
+    'stocksense_llm_prompt_tokens',
+    'Estimated tokens in the per-symbol prompt after compaction',
+    ('operation',),
+    buckets=(100, 200, 300, 400, 500, 600, 800, 1000, 1500, 2000, 4000))
+
+
+def _parse_budgets(value: str) -> Dict[str, int]:
+    budgets = {}
+    for item in value.split(','):
+        model, _, budget = item.partition('=')
+        if model.strip() and budget.strip().isdigit():
+            budgets[model.strip()] = int(budget)
+    return budgets
+
+
+MODEL_PROMPT_BUDGETS = _parse_budgets(os.getenv('PROMPT_TOKEN_BUDGETS', ''))
+
+
+def budget_for(model: Optional[str]) -> int:
+    return MODEL_PROMPT_BUDGETS.get(model or '', DEFAULT_PROMPT_BUDGET)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate tokenizer count: words cost about one token per 6 letters, numbers one per 3 digits"""
+    count = 0
+    for piece in _PIECES.findall(text or ''):
+        if piece[0].isalpha():
+            count += math.ceil(len(piece) / 6)
+        elif piece[0].isdigit():
+            count += math.ceil(len(piece) / 3)
+        else:
+            count += 1
+    return count
+
+
+def compact_description(text: str, budget: int) -> str:
+    """Keep the most informative sentences of a business summary that fit the budget, in original order.
+
+    Earlier sentences score higher (summaries lead with what the company does),
+    as do sentences naming products, customers, segments or market position.
+    """
+    text = (text or '').strip()
+    if estimate_tokens(text) <= budget:
+        return text
+    # Repeated sentences (common in scraped summaries) are only worth their first copy
+    sentences = list(dict.fromkeys(s.strip() for s in _SENTENCE_END.split(text) if s.strip()))
+    scored = sorted(range(len(sentences)),
+                    key=lambda i: 1.0 / (1 + i) + 0.2 * len(_BUSINESS_TERMS.findall(sentences[i])),
+                    reverse=True)
+    kept, used = set(), 0
+    for i in scored:
+        cost = estimate_tokens(sentences[i])
+        if used + cost <= budget:
+            kept.add(i)
+            used += cost
+    if not kept:
+        # Even the best sentence is too long: cut it at a word boundary
+        words = sentences[scored[0]].split()
+        while words and estimate_tokens(' '.join(words)) > budget - 1:
+            words.pop()
+        return ' '.join(words) + '...'
+    return ' '.join(sentences[i] for i in sorted(kept))
+
+
+def rank_news(news: List[Dict], symbol: str, company_name: str = '', now: Optional[float] = None) -> List[Dict]:
+    """Articles ordered by recency (half-weight after two days) plus a bonus when the headline names the company"""
+    now = now or time.time()
+    # "Apple Inc." should match headlines that just say "Apple"
+    short_name = _CORPORATE_SUFFIX.sub('', (company_name or '').split(',')[0]).strip()
+    names = [n.lower() for n in (symbol, short_name) if n and len(n) > 1]
+
+    def score(article):
+        age_hours = max(0.0, (now - (article.get('date') or 0)) / 3600)
+        recency = 0.5 ** (age_hours / 48)
+        headline = (article.get('headline') or '').lower()
+        relevance = 1.0 if any(name in headline for name in names) else 0.0
+        return recency + relevance
+
+    return sorted(news, key=score, reverse=True)
+
+
+def fit_lines(lines: List[str], budget: int) -> List[str]:
+    """Leading lines of an already ranked list that fit the budget"""
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return kept
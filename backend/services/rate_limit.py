@@ -0,0 +1,394 @@
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from services.cache import RedisCache, RespError
+from services.content_hash import content_hash
+from services.metrics import registry
+
+DEFAULT_SQLITE_PATH = Path(__file__).parent.parent / 'database' / 'ratelimit.db'
+KEY_PREFIX = 'stocksense:ratelimit:'
+
+# Tokens a client can spend in a burst, and tokens per second it gets back (RATE_LIMIT_BURST, RATE_LIMIT_CLIENT_RATE)
+DEFAULT_BURST = 120.0
+DEFAULT_CLIENT_RATE = 2.0
+# Tokens per second shared by every active client (RATE_LIMIT_BUDGET; 0 = no shared budget, each client gets
+# CLIENT_RATE). With a budget, each client refills at min(CLIENT_RATE, BUDGET / clients seen in the last
+# RATE_LIMIT_ACTIVE_WINDOW seconds).
+DEFAULT_BUDGET = 0.0
+DEFAULT_ACTIVE_WINDOW = 60.0
+# Reverse proxies in front of the app that append to X-Forwarded-For (RATE_LIMIT_PROXY_HOPS, 1 on Render);
+# 0 trusts only the socket address
+DEFAULT_PROXY_HOPS = 0
+
+# Tokens per request by Flask endpoint; override with RATE_LIMIT_COSTS="analyze_stock=10,chatbot=8".
+# Endpoints that call an LLM cost the most; unlisted endpoints cost DEFAULT_COST.
+DEFAULT_COSTS = {
+    'analyze_stock': 10,
+    'analyze_section': 4,
+    'refresh_stock': 10,
+    'refresh_stocks': 5,
+    'chatbot': 8,
+    'refresh_screener': 20,
+    'get_market_news': 2,
+    'screen_stocks': 2,
+    'get_price_history': 2,
+    'get_technical_metrics': 2,
+    'get_stock_price': 1,
+    'get_multiple_prices': 0.5,
+    'get_batch_technical_metrics': 0.2,
+    'get_starred': 1,
+    'star_stock': 1,
+    'unstar_stock': 1,
+}
+DEFAULT_COST = 1
+# Batch endpoints charge their cost per symbol in the body, capped at a full bucket
+PER_SYMBOL_ENDPOINTS = {'refresh_stocks', 'get_multiple_prices', 'get_batch_technical_metrics'}
+# Never limited: health checks, Prometheus scrapes
+EXEMPT_ENDPOINTS = {'health', 'metrics', 'static'}
+
+RATE_LIMIT_DECISIONS = registry.counter(
+    'stocksense_rate_limit_decisions_total',
+    'Rate limiter decisions by endpoint (allowed, limited, or error when the backend failed and the request was let through)',
+    ('endpoint', 'outcome'))
+
+# Token bucket plus fair-share refill, run atomically on the Redis server.
+# KEYS: bucket hash, active-client sorted set. ARGV: now, cost, burst, client rate, budget, active window, client.
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local rate = tonumber(ARGV[4])
+local budget = tonumber(ARGV[5])
+local window = tonumber(ARGV[6])
+if budget > 0 then
+  redis.call('ZADD', KEYS[2], now, ARGV[7])
+  redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - window)
+  redis.call('PEXPIRE', KEYS[2], math.ceil(window * 1000))
+  rate = math.min(rate, budget / redis.call('ZCARD', KEYS[2]))
+end
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens), tostring(rate)}
+"""
+TOKEN_BUCKET_SHA = hashlib.sha1(TOKEN_BUCKET_SCRIPT.encode('utf-8')).hexdigest()
+
+
+def fair_rate(client_rate: float, budget: float, active_clients: int) -> float:
+    """Refill rate for one client: an equal share of the budget, never above the per-client rate"""
+    if budget <= 0:
+        return client_rate
+    return min(client_rate, budget / max(1, active_clients))
+
+
+def spend(tokens: Optional[float], updated: Optional[float], now: float, cost: float,
+          burst: float, rate: float) -> Tuple[bool, float]:
+    """(allowed, tokens left) after refilling a bucket to now and trying to take cost from it.
+
+    A missing bucket starts full. Shared by every backend so they agree exactly.
+    """
+    if tokens is None:
+        tokens, updated = burst, now
+    tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+    if tokens >= cost:
+        return True, tokens - cost
+    return False, tokens
+
+
+class Decision:
+    """Outcome of one rate-limit check, with what the RateLimit-* headers need"""
+    __slots__ = ('allowed', 'cost', 'remaining', 'burst', 'rate')
+
+    def __init__(self, allowed: bool, cost: float, remaining: float, burst: float, rate: float):
+        self.allowed = allowed
+        self.cost = cost
+        self.remaining = remaining
+        self.burst = burst
+        self.rate = rate
+
+    @property
+    def retry_after(self) -> int:
+        """Whole seconds until the bucket holds enough tokens for this request"""
+        if self.allowed:
+            return 0
+        return max(1, math.ceil((self.cost - self.remaining) / self.rate))
+
+    @property
+    def reset(self) -> int:
+        """Seconds until the bucket is full again"""
+        return math.ceil((self.burst - self.remaining) / self.rate)
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            'RateLimit-Limit': str(int(self.burst)),
+            'RateLimit-Remaining': str(int(self.remaining)),
+            'RateLimit-Reset': str(self.reset),
+            # IETF draft syntax: quota per window (seconds to refill an empty bucket)
+            'RateLimit-Policy': f'{int(self.burst)};w={math.ceil(self.burst / self.rate)}',
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(self.retry_after)
+        return headers
+
+    def to_dict(self) -> Dict:
+        return {
+            'retryAfter': self.retry_after,
+            'cost': self.cost,
+            'remaining': round(self.remaining, 2),
+            'limit': self.burst,
+            'refillPerSecond': round(self.rate, 4),
+        }
+
+
+class BucketStore:
+    """Keeps token buckets. take() must be atomic per client across everyone sharing the store."""
+    name = 'base'
+
+    def take(self, client: str, cost: float, burst: float, client_rate: float, budget: float,
+             window: float, now: float) -> Tuple[bool, float, float]:
+        """(allowed, tokens left, refill rate used)"""
+        raise NotImplementedError
+
+
+class MemoryBuckets(BucketStore):
+    """Buckets in this process only; each gunicorn worker limits separately"""
+    name = 'memory'
+
+    def __init__(self, max_clients: int = 100000):
+        self.max_clients = max_clients
+        # client -> (tokens, updated), least recently seen first
+        self._buckets: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _active(self, since: float) -> int:
+        count = 0
+        for tokens, updated in reversed(self._buckets.values()):
+            if updated < since:
+                break
+            count += 1
+        return count
+
+    def take(self, client, cost, burst, client_rate, budget, window, now):
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (None, None))
+            # Mark the client seen before counting, as the shared stores do
+            self._buckets[client] = (tokens, now)
+            rate = fair_rate(client_rate, budget, self._active(now - window) if budget > 0 else 1)
+            allowed, tokens = spend(tokens, updated, now, cost, burst, rate)
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return allowed, tokens, rate
+
+
+class SQLiteBuckets(BucketStore):
+    """Buckets in a local SQLite file, shared by every worker process on the host.
+
+    Each check is one BEGIN IMMEDIATE transaction, so two workers cannot both
+    spend the same tokens.
+    """
+    name = 'sqlite'
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = str(path or DEFAULT_SQLITE_PATH)
+        self._local = threading.local()
+        self._writes = 0
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute('CREATE TABLE IF NOT EXISTS rate_buckets (client TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_rate_buckets_updated ON rate_buckets (updated)')
+
+    def _conn(self) -> sqlite3.Connection:
+        conn, pid = getattr(self._local, 'conn', (None, None))
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = (conn, os.getpid())
+        return conn
+
+    def take(self, client, cost, burst, client_rate, budget, window, now):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE client = ?', (client,)).fetchone()
+            tokens, updated = row if row else (None, None)
+            active = 1
+            if budget > 0:
+                active = conn.execute('SELECT COUNT(*) FROM rate_buckets WHERE updated >= ? AND client != ?',
+                                      (now - window, client)).fetchone()[0] + 1
+            rate = fair_rate(client_rate, budget, active)
+            allowed, tokens = spend(tokens, updated, now, cost, burst, rate)
+            conn.execute('INSERT OR REPLACE INTO rate_buckets (client, tokens, updated) VALUES (?, ?, ?)',
+                         (client, tokens, now))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            # A bucket untouched long enough to refill completely is the same as no bucket
+            conn.execute('DELETE FROM rate_buckets WHERE updated < ?', (now - burst / client_rate - window,))
+        return allowed, tokens, rate
+
+
+class RedisBuckets(BucketStore):
+    """Buckets in Redis (or any server that runs Lua scripts), shared across hosts"""
+    name = 'redis'
+
+    def __init__(self, url: str = 'redis://127.0.0.1:6379/0'):
+        self.client = RedisCache(url)
+
+    def take(self, client, cost, burst, client_rate, budget, window, now):
+        args = (2, KEY_PREFIX + client, KEY_PREFIX + 'active', repr(now), repr(cost), repr(burst),
+                repr(client_rate), repr(budget), repr(window), client)
+        try:
+            reply = self.client.command('EVALSHA', TOKEN_BUCKET_SHA, *args)
+        except RespError as e:
+            if 'NOSCRIPT' not in str(e):
+                raise
+            # First call on this server (or after a restart): send the script itself
+            reply = self.client.command('EVAL', TOKEN_BUCKET_SCRIPT, *args)
+        allowed, tokens, rate = reply
+        return bool(int(allowed)), float(tokens), float(rate)
+
+
+def create_store(kind: Optional[str] = None) -> Optional[BucketStore]:
+    """Store chosen by RATE_LIMIT_BACKEND: memory (default), sqlite, redis, or none to disable limiting"""
+    kind = (kind or os.getenv('RATE_LIMIT_BACKEND', 'memory')).strip().lower()
+    if kind == 'none':
+        return None
+    if kind == 'memory':
+        return MemoryBuckets()
+    if kind == 'sqlite':
+        return SQLiteBuckets(os.getenv('RATE_LIMIT_SQLITE_PATH') or None)
+    if kind == 'redis':
+        return RedisBuckets(os.getenv('RATE_LIMIT_REDIS_URL') or os.getenv('CACHE_REDIS_URL')
+                            or os.getenv('REDIS_URL') or 'redis://127.0.0.1:6379/0')
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{kind}'. Use memory, sqlite, redis or none")
+
+
+def _parse_costs(value: str) -> Dict[str, float]:
+    costs = {}
+    for pair in filter(None, (p.strip() for p in value.split(','))):
+        name, _, number = pair.partition('=')
+        try:
+            costs[name.strip()] = max(0.0, float(number))
+        except ValueError:
+            print(f"Ignoring invalid RATE_LIMIT_COSTS entry: {pair}")
+    return costs
+
+
+def _parse_api_keys(value: str) -> Set[str]:
+    """Digests of the comma-separated keys in RATE_LIMIT_API_KEYS"""
+    return {content_hash(key) for key in filter(None, (k.strip() for k in value.split(',')))}
+
+
+def client_id(api_key: Optional[str], remote_addr: Optional[str], forwarded_for: Optional[str],
+              proxy_hops: int = DEFAULT_PROXY_HOPS, api_keys: Optional[Set[str]] = None) -> str:
+    """Who a request is charged to: its API key if that key is configured, else its IP address.
+
+    api_keys holds digests of the accepted keys. Unknown keys are ignored, so a
+    client cannot get a fresh bucket by sending a new key on every request.
+    Behind N proxies the client address is the Nth entry from the right of
+    X-Forwarded-For; entries further left are client-supplied and not trusted.
+    """
+    if api_key and api_keys:
+        digest = content_hash(api_key)
+        if digest in api_keys:
+            return 'key:' + digest[:16]
+    address = remote_addr
+    if proxy_hops > 0 and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+        if hops:
+            address = hops[-min(proxy_hops, len(hops))]
+    return 'ip:' + (address or 'unknown')
+
+
+class RateLimiter:
+    """Per-client token buckets over the API, charged by endpoint cost.
+
+    Every client (configured API key or IP) gets a bucket of `burst` tokens that refills
+    at `client_rate` per second. With a shared `budget`, the refill rate is
+    the budget split evenly between the clients active in the last
+    `window` seconds, so one busy client cannot crowd the others out of the
+    provider quota behind the API. If the store fails, requests are let through.
+    """
+
+    def __init__(self, store: Optional[BucketStore], burst: float = DEFAULT_BURST,
+                 client_rate: float = DEFAULT_CLIENT_RATE, budget: float = DEFAULT_BUDGET,
+                 window: float = DEFAULT_ACTIVE_WINDOW, costs: Optional[Dict[str, float]] = None,
+                 proxy_hops: int = DEFAULT_PROXY_HOPS, api_keys: Optional[Set[str]] = None):
+        self.store = store
+        self.proxy_hops = max(0, proxy_hops)
+        self.api_keys = set(api_keys or ())
+        self.burst = max(1.0, burst)
+        self.client_rate = max(0.001, client_rate)
+        self.budget = budget
+        self.window = window
+        self.costs = dict(DEFAULT_COSTS)
+        self.costs.update(costs or {})
+
+    @classmethod
+    def from_env(cls) -> 'RateLimiter':
+        """Limiter configured from the environment as it is when called (after .env is loaded)"""
+        return cls(create_store(),
+                   burst=float(os.getenv('RATE_LIMIT_BURST', DEFAULT_BURST)),
+                   client_rate=float(os.getenv('RATE_LIMIT_CLIENT_RATE', DEFAULT_CLIENT_RATE)),
+                   budget=float(os.getenv('RATE_LIMIT_BUDGET', DEFAULT_BUDGET)),
+                   window=float(os.getenv('RATE_LIMIT_ACTIVE_WINDOW', DEFAULT_ACTIVE_WINDOW)),
+                   costs=_parse_costs(os.getenv('RATE_LIMIT_COSTS', '')),
+                   proxy_hops=int(os.getenv('RATE_LIMIT_PROXY_HOPS', DEFAULT_PROXY_HOPS)),
+                   api_keys=_parse_api_keys(os.getenv('RATE_LIMIT_API_KEYS', '')))
+
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None
+
+    def client(self, api_key: Optional[str], remote_addr: Optional[str], forwarded_for: Optional[str]) -> str:
+        """client_id with this limiter's proxy hop count and accepted API keys"""
+        return client_id(api_key, remote_addr, forwarded_for, self.proxy_hops, self.api_keys)
+
+    def cost(self, endpoint: Optional[str], symbols: int = 0) -> float:
+        """Tokens a request costs; 0 for exempt endpoints"""
+        if endpoint is None or endpoint in EXEMPT_ENDPOINTS:
+            return 0
+        cost = self.costs.get(endpoint, DEFAULT_COST)
+        if endpoint in PER_SYMBOL_ENDPOINTS:
+            cost *= max(1, symbols)
+        # A request costing more than the bucket holds could never pass
+        return min(cost, self.burst)
+
+    def check(self, client: str, endpoint: Optional[str], symbols: int = 0) -> Optional[Decision]:
+        """Charge a request to its client; None when it is not limited at all"""
+        cost = self.cost(endpoint, symbols)
+        if not self.enabled or cost <= 0:
+            return None
+        try:
+            allowed, remaining, rate = self.store.take(client, cost, self.burst, self.client_rate,
+                                                       self.budget, self.window, time.time())
+        except Exception as e:
+            print(f"Rate limiter {self.store.name} error: {e}")
+            RATE_LIMIT_DECISIONS.inc(endpoint=endpoint, outcome='error')
+            return None
+        RATE_LIMIT_DECISIONS.inc(endpoint=endpoint, outcome='allowed' if allowed else 'limited')
+        return Decision(allowed, cost, remaining, self.burst, rate)
+
+
+rate_limiter = RateLimiter.from_env()
@@ -0,0 +1,227 @@
+import operator
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.market_calendar import market_calendar
+from services.metrics import registry
+
+BACKEND_DIR = Path(__file__).parent.parent
+DEFAULT_UNIVERSE_FILE = BACKEND_DIR / 'data' / 'screener_universe.txt'
+DEFAULT_TABLE_PATH = BACKEND_DIR / 'database' / 'fundamentals.npz'
+
+# Numeric fundamentals copied from get_company_overview into the table, one column each
+NUMERIC_FIELDS = (
+    'marketCap', 'currentPrice', 'changePercent', 'peRatio', 'pbRatio', 'currentRatio', 'quickRatio',
+    'totalDebt', 'debtToAssetsRatio', 'debtToCurrentAssetsRatio', 'trailingEps', 'forwardEps',
+    'earningsGrowth', 'dividendRate', 'dividendYield', 'payoutRatio', 'profitMargins',
+    'operatingMargins', 'returnOnEquity', 'returnOnAssets', 'yearsPublic',
+)
+TEXT_FIELDS = ('symbol', 'name', 'sector', 'industry')
+
+OPERATORS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+}
+PREDICATE_PATTERN = re.compile(r'^\s*(\w+)\s*(<=|>=|!=|==|=|<|>)\s*(.+?)\s*$')
+
+SCREENER_ROWS = registry.gauge(
+    'stocksense_screener_rows',
+    'Symbols in the materialized fundamentals table')
+SCREENER_REFRESH_SECONDS = registry.gauge(
+    'stocksense_screener_refresh_duration_seconds',
+    'Duration of the last fundamentals table refresh')
+
+
+class ScreenError(ValueError):
+    """Invalid screen query (unknown field, bad operator or value)"""
+
+
+def load_universe(path: Optional[str] = None) -> List[str]:
+    """Symbols from SCREENER_UNIVERSE (comma-separated) or a one-per-line file"""
+    inline = os.getenv('SCREENER_UNIVERSE', '')
+    if inline.strip():
+        symbols = inline.split(',')
+    else:
+        with open(path or os.getenv('SCREENER_UNIVERSE_FILE') or DEFAULT_UNIVERSE_FILE) as f:
+            symbols = [line.split('#')[0] for line in f]
+    return list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+
+
+def parse_predicate(text: str):
+    """'peRatio<20' -> ('peRatio', '<', 20.0); text fields keep the value as a string"""
+    match = PREDICATE_PATTERN.match(text)
+    if not match:
+        raise ScreenError(f"Invalid filter '{text}'. Use e.g. peRatio<20 or sector=Technology")
+    field, op, value = match.groups()
+    if field in NUMERIC_FIELDS:
+        try:
+            return field, op, float(value)
+        except ValueError:
+            raise ScreenError(f"Filter '{text}' needs a number")
+    if field in TEXT_FIELDS:
+        if op not in ('=', '==', '!='):
+            raise ScreenError(f"Text field '{field}' only supports = and !=")
+        return field, op, value
+    raise ScreenError(f"Unknown field '{field}'")
+
+
+class FundamentalsTable:
+    """Column-wise fundamentals for a universe: one NumPy array per field"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], as_of: float):
+        self.columns = columns
+        self.as_of = as_of
+
+    def __len__(self):
+        return len(self.columns['symbol'])
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict]) -> 'FundamentalsTable':
+        columns = {field: np.array([str(row.get(field) or '') for row in rows], dtype=str) for field in TEXT_FIELDS}
+        for field in NUMERIC_FIELDS:
+            values = [row.get(field) for row in rows]
+            columns[field] = np.array([v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+                                       for v in values], dtype=np.float64)
+        return cls(columns, time.time())
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['FundamentalsTable']:
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                columns = {name: data[name] for name in data.files if name != '_as_of'}
+                return cls(columns, float(data['_as_of']))
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            np.savez(f, _as_of=np.float64(self.as_of), **self.columns)
+        os.replace(tmp, path)
+
+    def screen(self, predicates: List[tuple], sort: Optional[str] = None, limit: int = 50,
+               fields: Optional[List[str]] = None) -> Dict:
+        """Filter with vectorized predicates, sort, and return the top rows"""
+        mask = np.ones(len(self), dtype=bool)
+        for field, op, value in predicates:
+            column = self.columns[field]
+            if field in TEXT_FIELDS:
+                matches = np.char.lower(column) == value.lower()
+                mask &= ~matches if op == '!=' else matches
+            else:
+                # NaN compares False, so symbols missing the metric drop out of numeric filters
+                with np.errstate(invalid='ignore'):
+                    mask &= OPERATORS[op](column, value)
+        indices = np.nonzero(mask)[0]
+
+        if sort:
+            descending = sort.startswith('-')
+            key = sort.lstrip('+-')
+            if key not in self.columns:
+                raise ScreenError(f"Unknown sort field '{key}'")
+            column = self.columns[key][indices]
+            if key in TEXT_FIELDS:
+                order = np.argsort(np.char.lower(column), kind='stable')
+                order = order[::-1] if descending else order
+            else:
+                # Missing values always sort last
+                values = -column if descending else column
+                order = np.lexsort((values, np.isnan(column)))
+            indices = indices[order]
+
+        selected = [f for f in (fields or NUMERIC_FIELDS) if f in NUMERIC_FIELDS]
+        results = []
+        for i in indices[:limit]:
+            row = {field: str(self.columns[field][i]) for field in TEXT_FIELDS}
+            for field in selected:
+                value = self.columns[field][i]
+                row[field] = None if np.isnan(value) else float(value)
+            results.append(row)
+        return {'matched': int(len(indices)), 'results': results}
+
+
+class FundamentalsScreener:
+    """Keeps a materialized fundamentals table for the universe and screens it locally.
+
+    The table is rebuilt by a background job (get_company_overview per symbol)
+    when it is older than SCREENER_MAX_AGE_HOURS; queries never call upstream.
+    """
+
+    def __init__(self, stock_service, path: Optional[str] = None):
+        self.stock_service = stock_service
+        self.path = Path(path or os.getenv('SCREENER_TABLE_PATH') or DEFAULT_TABLE_PATH)
+        self.max_age = float(os.getenv('SCREENER_MAX_AGE_HOURS', '24')) * 3600
+        self.workers = int(os.getenv('SCREENER_WORKERS', '2'))
+        self._table = FundamentalsTable.load(self.path)
+        self._lock = threading.Lock()
+        self._refreshing = None
+        self.progress = {'done': 0, 'total': 0}
+        if self._table is not None:
+            SCREENER_ROWS.set(len(self._table))
+
+    @property
+    def table(self) -> Optional[FundamentalsTable]:
+        return self._table
+
+    def is_stale(self) -> bool:
+        """Missing, or older than max_age with a session closed since it was built (fundamentals
+        don't change over a weekend or holiday)"""
+        if self._table is None:
+            return True
+        return (time.time() - self._table.as_of > self.max_age
+                and self._table.as_of < market_calendar.last_close())
+
+    def refresh_in_background(self) -> bool:
+        """Start a rebuild unless one is running; returns True if one was started"""
+        with self._lock:
+            if self._refreshing is not None and self._refreshing.is_alive():
+                return False
+            self._refreshing = threading.Thread(target=self.refresh, name='screener-refresh', daemon=True)
+            self._refreshing.start()
+            return True
+
+    def refresh(self):
+        """Fetch fundamentals for the whole universe and swap in the new table"""
+        started = time.perf_counter()
+        universe = load_universe()
+        self.progress = {'done': 0, 'total': len(universe)}
+
+        def fetch(symbol):
+            try:
+                overview = self.stock_service.get_company_overview(symbol)
+            except Exception as e:
+                print(f"Screener refresh error for {symbol}: {e}")
+                overview = None
+            self.progress['done'] += 1
+            if not overview or overview.get('error'):
+                return None
+            return dict(overview, symbol=symbol)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='screener') as pool:
+            rows = [row for row in pool.map(fetch, universe) if row]
+        if not rows:
+            print("Screener refresh produced no rows; keeping the previous table")
+            return
+        table = FundamentalsTable.from_rows(rows)
+        table.save(self.path)
+        self._table = table
+        SCREENER_ROWS.set(len(table))
+        SCREENER_REFRESH_SECONDS.set(time.perf_counter() - started)
+        print(f"Screener table refreshed: {len(rows)}/{len(universe)} symbols in {time.perf_counter() - started:.1f}s")
+
+    def status(self) -> Dict:
+        refreshing = self._refreshing is not None and self._refreshing.is_alive()
+        return {
+            'asOf': self._table.as_of if self._table else None,
+            'universeSize': len(self._table) if self._table else 0,
+            'refreshing': refreshing,
+            'progress': self.progress if refreshing else None,
+        }
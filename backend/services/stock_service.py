@@ -2,25 +2,124 @@ import requests
 import os
 import re
 import time
-from datetime import datetime, timedelta
-import yfinance as yf
+import threading
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
+from services.metrics import provider_call, record_provider_status
+from services.tracing import span
+from services.cassette import cassette
+from services.content_hash import stable_hash
+from services.limits import provider_limits
+from services.price_history import price_history, PriceHistory
+from services.technicals import compute_metrics, BENCHMARK_SYMBOL
+from services.cache import get_cache
+from services.news_store import news_store, NEWS_RETENTION_DAYS
+from services.dedup import dedupe_articles
+
+def _usable(value) -> bool:
+    """Worth caching: non-empty and not an error placeholder"""
+    return bool(value) and not (isinstance(value, dict) and value.get('error'))
+
+def _real_sentiment(value) -> bool:
+    # The all-sources-failed fallback is a fixed placeholder; don't pin it for the TTL
+    return _usable(value) and 'being calculated' not in str(value.get('stocktwits', {}).get('sample', ''))
+
+def yfinance_ticker(symbol: str):
+    """yf.Ticker, importing yfinance (and pandas) on first use rather than at startup"""
+    import yfinance as yf
+    return yf.Ticker(symbol)
 
 class StockService:
     def __init__(self):
         self.alpha_vantage_key = os.getenv('ALPHA_VANTAGE_KEY', '')
         self.news_api_key = os.getenv('NEWS_API_KEY', '')
         self.finnhub_key = os.getenv('FINNHUB_API_KEY', '')
+        # Record/replay of provider traffic (CASSETTE_MODE); replay runs without real keys
+        self.cassette = cassette
+        if self.cassette.replaying:
+            self.alpha_vantage_key = self.alpha_vantage_key or self.cassette.placeholder_key('alpha_vantage')
+            self.news_api_key = self.news_api_key or self.cassette.placeholder_key('newsapi')
+            self.finnhub_key = self.finnhub_key or self.cassette.placeholder_key('finnhub')
+        # Provider base URLs can be overridden to point at local stubs (see benchmarks/)
+        self.finnhub_base_url = os.getenv('FINNHUB_BASE_URL', 'https://finnhub.io/api/v1').rstrip('/')
+        self.alpha_vantage_base_url = os.getenv('ALPHA_VANTAGE_BASE_URL', 'https://www.alphavantage.co').rstrip('/')
+        self.news_api_base_url = os.getenv('NEWS_API_BASE_URL', 'https://newsapi.org/v2').rstrip('/')
+        self.stocktwits_base_url = os.getenv('STOCKTWITS_BASE_URL', 'https://api.stocktwits.com/api/2').rstrip('/')
+        self.reddit_base_url = os.getenv('REDDIT_BASE_URL', 'https://www.reddit.com').rstrip('/')
+        self.google_news_base_url = os.getenv('GOOGLE_NEWS_BASE_URL', 'https://news.google.com').rstrip('/')
+        self._base_urls = {
+            'finnhub': self.finnhub_base_url,
+            'alpha_vantage': self.alpha_vantage_base_url,
+            'newsapi': self.news_api_base_url,
+            'stocktwits': self.stocktwits_base_url,
+            'reddit': self.reddit_base_url,
+            'google_news': self.google_news_base_url
+        }
+        # yfinance has no base URL setting; swap the Ticker factory instead
+        self.ticker_factory = yfinance_ticker
         self._last_yfinance_request = 0
-        self._yfinance_delay = 0.5  # Minimum 0.5 seconds between Yahoo Finance requests
+        self._yfinance_lock = threading.Lock()
+        self._yfinance_delay = float(os.getenv('YFINANCE_MIN_INTERVAL', '0.5'))  # Minimum seconds between Yahoo Finance requests
+        # Local daily OHLCV store; each symbol's past is downloaded once, then only missing days
+        self.price_history = price_history
+        self._history_period = os.getenv('PRICE_HISTORY_PERIOD', '5y')
+        self._history_recheck = float(os.getenv('PRICE_HISTORY_RECHECK_SECONDS', '3600'))
+        # Shared response cache (CACHE_BACKEND), so gunicorn workers don't each call upstream
+        self.cache = get_cache()
     
     def _throttle_yfinance(self):
         """Add delay between Yahoo Finance requests to avoid rate limiting"""
-        current_time = time.time()
-        time_since_last = current_time - self._last_yfinance_request
-        if time_since_last < self._yfinance_delay:
-            time.sleep(self._yfinance_delay - time_since_last)
-        self._last_yfinance_request = time.time()
+        # Reserve the next request slot under the lock, sleep outside it, so concurrent
+        # refreshes stay spaced by _yfinance_delay instead of racing past the check
+        with self._yfinance_lock:
+            current_time = time.time()
+            slot = max(current_time, self._last_yfinance_request + self._yfinance_delay)
+            self._last_yfinance_request = slot
+        if slot > current_time:
+            time.sleep(slot - current_time)
+    
+    def _http_get(self, provider: str, operation: str, url: str, **kwargs) -> requests.Response:
+        """GET an upstream provider URL, recording latency, errors and 429s"""
+        params = kwargs.get('params')
+        # Cassette entries are keyed by path relative to the provider base URL, so a
+        # recording made against local stubs replays against the default endpoints
+        base_url = self._base_urls.get(provider, '')
+        path = url[len(base_url):] if base_url and url.startswith(base_url) else url
+        with provider_limits.slot(provider), provider_call(provider, operation):
+            if self.cassette.replaying:
+                response = self.cassette.replay_http(provider, path, params)
+            else:
+                start = time.perf_counter()
+                try:
+                    response = requests.get(url, **kwargs)
+                except Exception as e:
+                    if self.cassette.recording:
+                        self.cassette.record_http_error(provider, path, params, e, time.perf_counter() - start)
+                    raise
+                if self.cassette.recording:
+                    self.cassette.record_http(provider, path, params, response, time.perf_counter() - start)
+        record_provider_status(provider, operation, response.status_code)
+        return response
+    
+    def _yf_get(self, ticker, attribute: str, **kwargs):
+        """Read a yfinance Ticker attribute (info, news, history, ...) with provider metrics"""
+        symbol = getattr(ticker, 'ticker', '')
+        with provider_limits.slot('yfinance'), provider_call('yfinance', attribute):
+            if self.cassette.replaying:
+                return self.cassette.replay_yf(symbol, attribute, kwargs)
+            start = time.perf_counter()
+            try:
+                if attribute == 'history':
+                    value = ticker.history(**kwargs)
+                else:
+                    value = getattr(ticker, attribute)
+            except Exception as e:
+                if self.cassette.recording:
+                    self.cassette.record_yf(symbol, attribute, kwargs, None, time.perf_counter() - start, error=e)
+                raise
+            if self.cassette.recording:
+                self.cassette.record_yf(symbol, attribute, kwargs, value, time.perf_counter() - start)
+            return value
     
     def _get_finnhub_quote(self, symbol: str) -> Optional[Dict]:
         """Get stock quote (price and change) from Finnhub"""
@@ -28,12 +127,12 @@ class StockService:
             return None
         
         try:
-            url = 'https://finnhub.io/api/v1/quote'
+            url = f'{self.finnhub_base_url}/quote'
             params = {
                 'symbol': symbol,
                 'token': self.finnhub_key
             }
-            response = requests.get(url, params=params, timeout=5)
+            response = self._http_get('finnhub', 'quote', url, params=params, timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 if 'c' in data and data['c']:  # Current price exists
@@ -58,13 +157,13 @@ class StockService:
             return None
         
         try:
-            url = 'https://www.alphavantage.co/query'
+            url = f'{self.alpha_vantage_base_url}/query'
             params = {
                 'function': 'GLOBAL_QUOTE',
                 'symbol': symbol,
                 'apikey': self.alpha_vantage_key
             }
-            response = requests.get(url, params=params, timeout=5)
+            response = self._http_get('alpha_vantage', 'quote', url, params=params, timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 quote = data.get('Global Quote', {})
@@ -87,12 +186,12 @@ class StockService:
             return None
         
         try:
-            url = 'https://finnhub.io/api/v1/stock/recommendation'
+            url = f'{self.finnhub_base_url}/stock/recommendation'
             params = {
                 'symbol': symbol,
                 'token': self.finnhub_key
             }
-            response = requests.get(url, params=params, timeout=5)
+            response = self._http_get('finnhub', 'recommendation', url, params=params, timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 if data and isinstance(data, list) and len(data) > 0:
@@ -122,7 +221,7 @@ class StockService:
             return None
         
         try:
-            url = 'https://www.alphavantage.co/query'
+            url = f'{self.alpha_vantage_base_url}/query'
             params = {
                 'function': 'TIME_SERIES_INTRADAY',  # Alpha Vantage doesn't have direct recommendations
                 'symbol': symbol,
@@ -143,13 +242,13 @@ class StockService:
         
         try:
             # Alpha Vantage Overview endpoint
-            url = 'https://www.alphavantage.co/query'
+            url = f'{self.alpha_vantage_base_url}/query'
             params = {
                 'function': 'OVERVIEW',
                 'symbol': symbol,
                 'apikey': self.alpha_vantage_key
             }
-            response = requests.get(url, params=params, timeout=5)
+            response = self._http_get('alpha_vantage', 'overview', url, params=params, timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 if 'Symbol' in data and data['Symbol']:  # Valid response
@@ -167,8 +266,84 @@ class StockService:
             print(f"Alpha Vantage overview error: {e}")
         return None
     
+    def get_quote(self, symbol: str) -> Optional[Dict]:
+        """Get just price and change, using the cheapest quote source available"""
+        return self.cache.get_or_load('quote', symbol, lambda: self._fetch_quote(symbol))
+    
+    def _fetch_quote(self, symbol: str) -> Optional[Dict]:
+        quote = self._get_finnhub_quote(symbol) or self._get_alpha_vantage_quote(symbol)
+        if not quote:
+            try:
+                self._throttle_yfinance()
+                ticker = self.ticker_factory(symbol)
+                history = self._yf_get(ticker, 'history', period='5d')
+                if not history.empty:
+                    current_price = history['Close'].iloc[-1]
+                    prev_close = history['Close'].iloc[-2] if len(history) > 1 else current_price
+                    quote = {
+                        'currentPrice': round(current_price, 2),
+                        'previousClose': round(prev_close, 2),
+                        'changePercent': round((current_price - prev_close) / prev_close * 100, 2) if prev_close else 0
+                    }
+            except Exception as e:
+                print(f"yfinance quote error for {symbol}: {e}")
+        if not quote:
+            return None
+        return {
+            'symbol': symbol,
+            'currentPrice': quote['currentPrice'],
+            'previousClose': quote.get('previousClose'),
+            'changePercent': quote['changePercent']
+        }
+
+    def get_price_history(self, symbol: str) -> Optional[PriceHistory]:
+        """Daily bars from the local store, downloading only the sessions it is missing"""
+        symbol = symbol.upper()
+        if self.price_history.needs_update(symbol, self._history_recheck):
+            try:
+                self._sync_price_history(symbol)
+            except Exception as e:
+                print(f"Price history update error for {symbol}: {e}")
+        return self.price_history.read(symbol)
+    
+    def _sync_price_history(self, symbol: str):
+        last_date = self.price_history.meta(symbol)['last_date']
+        ticker = self.ticker_factory(symbol)
+        self._throttle_yfinance()
+        if last_date:
+            # Overlap the last stored bar: prices are split/dividend adjusted, so if that
+            # bar no longer matches, history was re-adjusted and is downloaded again
+            frame = self._yf_get(ticker, 'history', start=last_date)
+            if self.price_history.overlap_matches(symbol, frame):
+                self.price_history.append(symbol, frame)
+                return
+            print(f"Price history for {symbol} was re-adjusted; downloading it again")
+            self._throttle_yfinance()
+        frame = self._yf_get(ticker, 'history', period=self._history_period)
+        self.price_history.rewrite(symbol, frame)
+    
+    def history_needs_update(self, symbol: str) -> bool:
+        """True when get_price_history would download bars for this symbol"""
+        return self.price_history.needs_update(symbol.upper(), self._history_recheck)
+    
+    def get_technical_metrics(self, symbols: List[str], sync: bool = True) -> Dict[str, Dict]:
+        """Volatility, beta vs SPY, drawdown, moving averages, RSI and 52-week range, keyed by symbol
+        
+        With sync=False only bars already in the local store are used (nothing is downloaded except SPY's).
+        """
+        load = self.get_price_history if sync else self.price_history.read
+        histories = {symbol.upper(): load(symbol.upper()) for symbol in symbols}
+        return compute_metrics(histories, self.get_price_history(BENCHMARK_SYMBOL))
+    
+    def get_technicals(self, symbol: str) -> Dict:
+        """Technical metrics for one symbol ({} when it has no stored history)"""
+        return self.get_technical_metrics([symbol]).get(symbol.upper(), {})
+    
     def get_company_overview(self, symbol: str) -> Dict:
         """Get company overview using yfinance with Alpha Vantage and Finnhub fallbacks"""
+        return self.cache.get_or_load('overview', symbol, lambda: self._fetch_company_overview(symbol), _usable)
+    
+    def _fetch_company_overview(self, symbol: str) -> Dict:
         # Try to get price/quote from Finnhub first (best rate limits)
         quote_data = None
         if self.finnhub_key and 'your_' not in self.finnhub_key:
@@ -191,8 +366,8 @@ class StockService:
                         # Last resort: try yfinance for price only
                         try:
                             self._throttle_yfinance()
-                            ticker = yf.Ticker(symbol)
-                            current_data = ticker.history(period='1d')
+                            ticker = self.ticker_factory(symbol)
+                            current_data = self._yf_get(ticker, 'history', period='1d')
                             if not current_data.empty:
                                 alpha_data['currentPrice'] = round(current_data['Close'].iloc[-1], 2)
                                 if len(current_data) > 1:
@@ -205,17 +380,17 @@ class StockService:
         # Fallback to yfinance
         try:
             self._throttle_yfinance()  # Add delay to avoid rate limiting
-            ticker = yf.Ticker(symbol)
+            ticker = self.ticker_factory(symbol)
             info = None
             try:
-                info = ticker.info
+                info = self._yf_get(ticker, 'info')
             except requests.exceptions.HTTPError as e:
                 # Handle rate limiting gracefully
                 if hasattr(e, 'response') and e.response and e.response.status_code == 429:
                     print(f"yfinance info rate limited (429) for {symbol}")
                     # Try to get price from history as fallback
                     try:
-                        current_data = ticker.history(period='1d')
+                        current_data = self._yf_get(ticker, 'history', period='1d')
                         if not current_data.empty:
                             current_price = current_data['Close'].iloc[-1]
                             return {
@@ -246,7 +421,7 @@ class StockService:
             # Get current price - handle rate limiting here too
             try:
                 self._throttle_yfinance()  # Add delay before history request
-                current_data = ticker.history(period='1d')
+                current_data = self._yf_get(ticker, 'history', period='1d')
                 current_price = current_data['Close'].iloc[-1] if not current_data.empty else (info.get('currentPrice', 0) if info else 0)
             except requests.exceptions.HTTPError as e:
                 if hasattr(e, 'response') and e.response and e.response.status_code == 429:
@@ -382,99 +557,45 @@ class StockService:
     
     def get_recent_news(self, symbol: str, limit: int = 10) -> List[Dict]:
         """Get recent news articles from multiple sources (News API, Finnhub, Yahoo Finance)"""
-        all_news = []
-        seen_urls = set()
-        seen_headlines = set()
-        
-        try:
-            # 1. Fetch from News API
-            if self.news_api_key:
-                try:
-                    news_api_articles = self._get_news_api_news(symbol, limit)
-                    for article in news_api_articles:
-                        url = article.get('url', '')
-                        headline = article.get('headline', '').strip().lower()
-                        # Avoid duplicates - add if URL is unique OR headline is unique
-                        is_duplicate = False
-                        if url and url in seen_urls:
-                            is_duplicate = True
-                        if headline and headline in seen_headlines:
-                            is_duplicate = True
-                        
-                        if not is_duplicate and headline:  # Must have at least a headline
-                            all_news.append(article)
-                            if url:
-                                seen_urls.add(url)
-                            if headline:
-                                seen_headlines.add(headline)
-                except Exception as e:
-                    print(f"News API error: {e}")
-            
-            # 2. Fetch from Finnhub
-            if self.finnhub_key:
-                try:
-                    finnhub_articles = self._get_finnhub_news(symbol, limit)
-                    for article in finnhub_articles:
-                        url = article.get('url', '')
-                        headline = article.get('headline', '').strip().lower()
-                        # Avoid duplicates - add if URL is unique OR headline is unique
-                        is_duplicate = False
-                        if url and url in seen_urls:
-                            is_duplicate = True
-                        if headline and headline in seen_headlines:
-                            is_duplicate = True
-                        
-                        if not is_duplicate and headline:  # Must have at least a headline
-                            all_news.append(article)
-                            if url:
-                                seen_urls.add(url)
-                            if headline:
-                                seen_headlines.add(headline)
-                except Exception as e:
-                    print(f"Finnhub news error: {e}")
-            
-            # 3. Fetch from Yahoo Finance (yfinance) - always try this as fallback
+        return self.cache.get_or_load('news', f'{symbol}:{limit}', lambda: self._fetch_recent_news(symbol, limit))
+    
+    def _fetch_recent_news(self, symbol: str, limit: int) -> List[Dict]:
+        symbol = symbol.upper()
+        # Priority order: when two providers report the same story (same URL or headline), the first one's copy is kept
+        providers = [
+            ('newsapi', self.news_api_key, self._get_news_api_news),
+            ('finnhub', self.finnhub_key, self._get_finnhub_news),
+            # Yahoo Finance needs no key - always try this as fallback
+            ('yfinance', True, self._get_yfinance_news),
+        ]
+        for provider, enabled, fetch in providers:
+            if not enabled:
+                continue
             try:
-                yfinance_articles = self._get_yfinance_news(symbol, limit)
-                for article in yfinance_articles:
-                    url = article.get('url', '')
-                    headline = article.get('headline', '').strip().lower()
-                    # Avoid duplicates - add if URL is unique OR headline is unique
-                    is_duplicate = False
-                    if url and url in seen_urls:
-                        is_duplicate = True
-                    if headline and headline in seen_headlines:
-                        is_duplicate = True
-                    
-                    if not is_duplicate and headline:  # Must have at least a headline
-                        all_news.append(article)
-                        if url:
-                            seen_urls.add(url)
-                        if headline:
-                            seen_headlines.add(headline)
+                # Ask only for articles newer than the last one this provider gave us
+                since = news_store.since(symbol, provider)
+                with span(f'news.{provider}'):
+                    articles = fetch(symbol, limit, since)
+                news_store.add(symbol, provider, articles, since)
             except Exception as e:
-                print(f"yfinance news error: {e}")
-                import traceback
-                traceback.print_exc()
-            
-            # Sort by date (most recent first) and return
-            all_news.sort(key=lambda x: x.get('date', 0), reverse=True)
-            return all_news[:limit]
-            
+                print(f"{provider} news error for {symbol}: {e}")
+        
+        try:
+            return news_store.latest(symbol, limit)
         except Exception as e:
             print(f"News fetch error: {e}")
             return []
     
-    def _get_news_api_news(self, symbol: str, limit: int) -> List[Dict]:
-        """Get news from News API"""
+    def _get_news_api_news(self, symbol: str, limit: int, since: Optional[int] = None) -> List[Dict]:
+        """Get news from News API (only articles published after since, if given)"""
         try:
             # Get company name for better search
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            ticker = self.ticker_factory(symbol)
+            info = self._yf_get(ticker, 'info')
             company_name = info.get('longName', symbol)
             
             # News API endpoint
-            url = 'https://newsapi.org/v2/everything'
+            url = f'{self.news_api_base_url}/everything'
             params = {
                 'q': f'{symbol} OR {company_name}',
                 'language': 'en',
@@ -482,8 +603,10 @@ class StockService:
                 'pageSize': min(limit * 2, 20),  # Get more to account for filtering
                 'apiKey': self.news_api_key
             }
+            if since:
+                params['from'] = datetime.fromtimestamp(since + 1, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._http_get('newsapi', 'company_news', url, params=params, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 articles = data.get('articles', [])
@@ -515,19 +638,20 @@ class StockService:
             print(f"News API fetch error: {e}")
         return []
     
-    def _get_finnhub_news(self, symbol: str, limit: int) -> List[Dict]:
-        """Get news from Finnhub API"""
+    def _get_finnhub_news(self, symbol: str, limit: int, since: Optional[int] = None) -> List[Dict]:
+        """Get news from Finnhub API (from the day of since if given, else the retention window)"""
         try:
-            to_date = datetime.now()
-            from_date = to_date - timedelta(days=30)
-            url = f'https://finnhub.io/api/v1/company-news'
+            to_date = datetime.now(timezone.utc)
+            # Finnhub filters by whole UTC days; the store drops what it has already seen
+            from_date = datetime.fromtimestamp(since, timezone.utc) if since else to_date - timedelta(days=NEWS_RETENTION_DAYS)
+            url = f'{self.finnhub_base_url}/company-news'
             params = {
                 'symbol': symbol,
                 'from': from_date.strftime('%Y-%m-%d'),
                 'to': to_date.strftime('%Y-%m-%d'),
                 'token': self.finnhub_key
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = self._http_get('finnhub', 'company_news', url, params=params, timeout=10)
             if response.status_code == 200:
                 news = response.json()
                 if news and isinstance(news, list):
@@ -546,13 +670,13 @@ class StockService:
             print(f"Finnhub fetch error: {e}")
         return []
     
-    def _get_yfinance_news(self, symbol: str, limit: int) -> List[Dict]:
-        """Get news from Yahoo Finance via yfinance"""
+    def _get_yfinance_news(self, symbol: str, limit: int, since: Optional[int] = None) -> List[Dict]:
+        """Get news from Yahoo Finance via yfinance (items published at or before since are skipped unparsed)"""
         try:
             self._throttle_yfinance()  # Add delay to avoid rate limiting
-            ticker = yf.Ticker(symbol)
+            ticker = self.ticker_factory(symbol)
             try:
-                news = ticker.news
+                news = self._yf_get(ticker, 'news')
             except (requests.exceptions.JSONDecodeError, ValueError) as e:
                 # Yahoo Finance sometimes returns invalid JSON when rate-limited
                 print(f"yfinance news JSON decode error (likely rate limited): {e}")
@@ -572,6 +696,22 @@ class StockService:
                         content = item.get('content', {}) if isinstance(item, dict) else {}
                         provider = item.get('provider', {}) if isinstance(item, dict) else {}
                         
+                        # Extract date (convert pubDate to timestamp if string)
+                        pub_date = content.get('pubDate', '') or item.get('pubDate', '') or item.get('providerPublishTime', 0)
+                        date = 0
+                        if pub_date:
+                            try:
+                                if isinstance(pub_date, str):
+                                    dt = datetime.fromisoformat(pub_date.replace('Z', '+00:00'))
+                                    date = int(dt.timestamp())
+                                elif isinstance(pub_date, (int, float)):
+                                    date = int(pub_date)
+                            except:
+                                date = 0
+                        # Already stored; Yahoo has no "since" parameter, so at least skip the parsing
+                        if since and date and date <= since:
+                            continue
+                        
                         # Extract headline from content
                         headline = content.get('title', '') or item.get('title', '')
                         
@@ -603,20 +743,6 @@ class StockService:
                         if not url:
                             url = item.get('link', '') or item.get('url', '') or content.get('previewUrl', '')
                         
-                        # Extract date (convert pubDate to timestamp if string)
-                        pub_date = content.get('pubDate', '') or item.get('pubDate', '') or item.get('providerPublishTime', 0)
-                        date = 0
-                        if pub_date:
-                            try:
-                                if isinstance(pub_date, str):
-                                    from datetime import datetime
-                                    dt = datetime.fromisoformat(pub_date.replace('Z', '+00:00'))
-                                    date = int(dt.timestamp())
-                                elif isinstance(pub_date, (int, float)):
-                                    date = int(pub_date)
-                            except:
-                                date = 0
-                        
                         if headline:
                             result.append({
                                 'headline': headline.strip(),
@@ -648,23 +774,31 @@ class StockService:
     
     def get_social_sentiment(self, symbol: str) -> Dict:
         """Get social media sentiment from StockTwits, Reddit (scraped), and Twitter"""
+        return self.cache.get_or_load('sentiment', symbol, lambda: self._fetch_social_sentiment(symbol),
+                                      _real_sentiment)
+    
+    def _fetch_social_sentiment(self, symbol: str) -> Dict:
         try:
             # Get stock price change from Finnhub (better than Yahoo Finance)
             change_percent = 0
-            if self.finnhub_key and 'your_' not in self.finnhub_key:
-                quote = self._get_finnhub_quote(symbol)
-                if quote:
-                    change_percent = quote.get('changePercent', 0)
-            # If Finnhub fails, try Alpha Vantage
-            elif self.alpha_vantage_key and 'your_' not in self.alpha_vantage_key:
-                quote = self._get_alpha_vantage_quote(symbol)
-                if quote:
-                    change_percent = quote.get('changePercent', 0)
+            with span('sentiment.quote'):
+                if self.finnhub_key and 'your_' not in self.finnhub_key:
+                    quote = self._get_finnhub_quote(symbol)
+                    if quote:
+                        change_percent = quote.get('changePercent', 0)
+                # If Finnhub fails, try Alpha Vantage
+                elif self.alpha_vantage_key and 'your_' not in self.alpha_vantage_key:
+                    quote = self._get_alpha_vantage_quote(symbol)
+                    if quote:
+                        change_percent = quote.get('changePercent', 0)
             
             # Try to get real sentiment data
-            stocktwits_data = self._get_stocktwits_sentiment(symbol)
-            reddit_data = self._get_reddit_sentiment_scraped(symbol)
-            google_news_data = self._get_google_trends_sentiment(symbol)
+            with span('sentiment.stocktwits'):
+                stocktwits_data = self._get_stocktwits_sentiment(symbol)
+            with span('sentiment.reddit'):
+                reddit_data = self._get_reddit_sentiment_scraped(symbol)
+            with span('sentiment.google_news'):
+                google_news_data = self._get_google_trends_sentiment(symbol)
             
             # Use real data if available, otherwise fall back to calculated sentiment
             result = {}
@@ -681,7 +815,7 @@ class StockService:
                     'positive': round(base_positive, 1),
                     'neutral': round(remaining * 0.6, 1),
                     'negative': round(remaining * 0.4, 1),
-                    'totalMentions': 500 + (abs(hash(symbol)) % 2000),
+                    'totalMentions': 500 + (stable_hash(symbol) % 2000),
                     'sample': f'StockTwits sentiment for {symbol} based on recent discussions.'
                 }
             
@@ -689,8 +823,8 @@ class StockService:
             if reddit_data:
                 result['reddit'] = reddit_data
             else:
-                # Fallback calculated sentiment
-                symbol_hash = hash(symbol) % 20
+                # Fallback calculated sentiment (stable across processes so content hashes/ETags are too)
+                symbol_hash = stable_hash(symbol) % 20
                 reddit_positive = 50 + (change_percent * 2) + (symbol_hash - 10)
                 reddit_positive = max(25, min(80, reddit_positive))
                 reddit_remaining = 100 - reddit_positive
@@ -698,17 +832,17 @@ class StockService:
                     'positive': round(reddit_positive, 1),
                     'neutral': round(reddit_remaining * 0.55, 1),
                     'negative': round(reddit_remaining * 0.45, 1),
-                    'totalMentions': 500 + (hash(symbol + 'reddit') % 500),
+                    'totalMentions': 500 + (stable_hash(symbol + 'reddit') % 500),
                     'sample': f'Reddit discussions about {symbol} show mixed opinions.'
                 }
             
-            # Google Trends / Search Interest
-            google_trends_data = self._get_google_trends_sentiment(symbol)
+            # Google Trends / Search Interest (reuses the Google News fetch above)
+            google_trends_data = google_news_data
             if google_trends_data:
                 result['searchInterest'] = google_trends_data
             else:
                 # Fallback - use calculated based on stock performance
-                symbol_hash = hash(symbol) % 20
+                symbol_hash = stable_hash(symbol) % 20
                 # Higher search interest when stock is performing well
                 interest_positive = 50 + (change_percent * 1.5) + (symbol_hash - 10)
                 interest_positive = max(30, min(85, interest_positive))
@@ -717,7 +851,7 @@ class StockService:
                     'positive': round(interest_positive, 1),
                     'neutral': round(interest_remaining * 0.6, 1),
                     'negative': round(interest_remaining * 0.4, 1),
-                    'totalMentions': 2000 + (hash(symbol + 'search') % 3000),
+                    'totalMentions': 2000 + (stable_hash(symbol + 'search') % 3000),
                     'sample': f'Search interest for {symbol} based on market activity.'
                 }
             
@@ -761,8 +895,8 @@ class StockService:
         """Get sentiment from StockTwits API (free, no auth required)"""
         try:
             # StockTwits API endpoint (free, no authentication needed for basic usage)
-            url = f'https://api.stocktwits.com/api/2/streams/symbol/{symbol}.json'
-            response = requests.get(url, timeout=10, headers={'User-Agent': 'StockAnalysisTool/1.0'})
+            url = f'{self.stocktwits_base_url}/streams/symbol/{symbol}.json'
+            response = self._http_get('stocktwits', 'stream', url, timeout=10, headers={'User-Agent': 'StockAnalysisTool/1.0'})
             
             if response.status_code == 200:
                 data = response.json()
@@ -820,7 +954,7 @@ class StockService:
             for subreddit in subreddits:
                 try:
                     # Use Reddit's JSON API (no auth needed for read-only)
-                    url = f'https://www.reddit.com/r/{subreddit}/search.json'
+                    url = f'{self.reddit_base_url}/r/{subreddit}/search.json'
                     params = {
                         'q': symbol,
                         'limit': 10,
@@ -829,7 +963,7 @@ class StockService:
                     }
                     headers = {'User-Agent': 'StockAnalysisTool/1.0 (Educational Purpose)'}
                     
-                    response = requests.get(url, params=params, headers=headers, timeout=10)
+                    response = self._http_get('reddit', 'search', url, params=params, headers=headers, timeout=10)
                     
                     if response.status_code == 200:
                         data = response.json()
@@ -889,7 +1023,7 @@ class StockService:
             
             # Alternative: Use Google News API (free, no key needed for basic)
             # Search for recent news and analyze sentiment
-            url = 'https://news.google.com/rss/search'
+            url = f'{self.google_news_base_url}/rss/search'
             params = {
                 'q': f'{symbol} stock',
                 'hl': 'en',
@@ -898,7 +1032,7 @@ class StockService:
             }
             headers = {'User-Agent': 'Mozilla/5.0 (StockAnalysisTool/1.0)'}
             
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = self._http_get('google_news', 'rss', url, params=params, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 # Parse RSS feed
@@ -950,6 +1084,9 @@ class StockService:
     
     def get_market_news(self, limit: int = 10) -> List[Dict]:
         """Get major market-moving news from the past 24 hours"""
+        return self.cache.get_or_load('market_news', str(limit), lambda: self._fetch_market_news(limit))
+    
+    def _fetch_market_news(self, limit: int) -> List[Dict]:
         all_news = []
         seen_urls = set()
         seen_headlines = set()
@@ -1016,7 +1153,8 @@ class StockService:
             except Exception as e:
                 print(f"yfinance market news error: {e}")
             
-            # Sort by date (most recent first) and return
+            # Drop syndicated copies (the first provider's wins), then sort by date (most recent first) and return
+            all_news = dedupe_articles(all_news)
             all_news.sort(key=lambda x: x.get('date', 0), reverse=True)
             return all_news[:limit]
             
@@ -1042,7 +1180,7 @@ class StockService:
                 'FOMC OR monetary policy OR fiscal policy OR trade war OR tariffs'
             )
             
-            url = 'https://newsapi.org/v2/everything'
+            url = f'{self.news_api_base_url}/everything'
             params = {
                 'q': market_keywords,
                 'language': 'en',
@@ -1053,7 +1191,7 @@ class StockService:
                 'apiKey': self.news_api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._http_get('newsapi', 'market_news', url, params=params, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 articles = data.get('articles', [])
@@ -1093,13 +1231,13 @@ class StockService:
             yesterday = now - timedelta(hours=24)
             from_timestamp = int(yesterday.timestamp())
             
-            url = 'https://finnhub.io/api/v1/news'
+            url = f'{self.finnhub_base_url}/news'
             params = {
                 'category': 'general',
                 'token': self.finnhub_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._http_get('finnhub', 'market_news', url, params=params, timeout=10)
             if response.status_code == 200:
                 news = response.json()
                 if news and isinstance(news, list):
@@ -1150,9 +1288,9 @@ class StockService:
             for ticker_symbol in tickers:
                 try:
                     self._throttle_yfinance()  # Add delay between each ticker request
-                    ticker = yf.Ticker(ticker_symbol)
+                    ticker = self.ticker_factory(ticker_symbol)
                     try:
-                        news = ticker.news
+                        news = self._yf_get(ticker, 'news')
                         if news and len(news) > 0:
                             all_news_items.extend(news[:limit * 2])
                     except (requests.exceptions.JSONDecodeError, ValueError, requests.exceptions.HTTPError) as e:
@@ -1259,6 +1397,9 @@ class StockService:
     
     def get_analyst_ratings(self, symbol: str) -> Dict:
         """Get analyst ratings and price targets - try Finnhub first, then Yahoo Finance"""
+        return self.cache.get_or_load('analyst', symbol, lambda: self._fetch_analyst_ratings(symbol), _usable)
+    
+    def _fetch_analyst_ratings(self, symbol: str) -> Dict:
         # Try Finnhub first (better rate limits)
         if self.finnhub_key and 'your_' not in self.finnhub_key:
             finnhub_recs = self._get_finnhub_recommendations(symbol)
@@ -1267,8 +1408,8 @@ class StockService:
                 target_price = None
                 try:
                     self._throttle_yfinance()
-                    ticker = yf.Ticker(symbol)
-                    info = ticker.info
+                    ticker = self.ticker_factory(symbol)
+                    info = self._yf_get(ticker, 'info')
                     target_price = info.get('targetMeanPrice') or info.get('targetHighPrice') or info.get('targetLowPrice')
                 except:
                     pass
@@ -1283,9 +1424,9 @@ class StockService:
         # Fallback to Yahoo Finance
         try:
             self._throttle_yfinance()  # Add delay to avoid rate limiting
-            ticker = yf.Ticker(symbol)
+            ticker = self.ticker_factory(symbol)
             try:
-                info = ticker.info
+                info = self._yf_get(ticker, 'info')
             except requests.exceptions.HTTPError as e:
                 # Handle rate limiting gracefully
                 if hasattr(e, 'response') and e.response and e.response.status_code == 429:
@@ -1299,7 +1440,7 @@ class StockService:
             
             # Try to get recommendations summary first (most reliable)
             try:
-                rec_summary = ticker.recommendations_summary
+                rec_summary = self._yf_get(ticker, 'recommendations_summary')
                 if rec_summary is not None and not rec_summary.empty:
                     # recommendations_summary has columns like 'strongBuy', 'buy', 'hold', etc.
                     for idx, row in rec_summary.iterrows():
@@ -1315,7 +1456,7 @@ class StockService:
             # If no counts from summary, try parsing recommendations DataFrame
             if buy_count == 0 and hold_count == 0 and sell_count == 0:
                 try:
-                    recommendations = ticker.recommendations
+                    recommendations = self._yf_get(ticker, 'recommendations')
                     if recommendations is not None and not recommendations.empty:
                         # Get most recent recommendations by firm
                         latest = recommendations.groupby('Firm').last() if 'Firm' in recommendations.columns else recommendations.iloc[-10:]
@@ -1347,7 +1488,7 @@ class StockService:
             # If no price targets, try recommendations summary
             if not target_mean:
                 try:
-                    rec_summary = ticker.recommendations_summary
+                    rec_summary = self._yf_get(ticker, 'recommendations_summary')
                     if rec_summary is not None and not rec_summary.empty:
                         latest_row = rec_summary.iloc[-1]
                         target_mean = latest_row.get('targetMeanPrice', 0) or latest_row.get('targetPrice', 0) or 0
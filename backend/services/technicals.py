@@ -0,0 +1,166 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+from services.price_history import PriceHistory
+
+BENCHMARK_SYMBOL = 'SPY'
+TRADING_DAYS = 252
+# One year of returns needs one extra close
+WINDOW = TRADING_DAYS + 1
+RSI_PERIOD = 14
+MOVING_AVERAGES = (20, 50, 200)
+
+
+def _date_axis(histories: Dict[str, PriceHistory], benchmark: Optional[PriceHistory]) -> np.ndarray:
+    """Shared trading-day axis: the benchmark's last WINDOW sessions, else the union of recent dates"""
+    if benchmark is not None and len(benchmark):
+        return np.asarray(benchmark['date'][-WINDOW:])
+    recent = [np.asarray(h['date'][-WINDOW:]) for h in histories.values()]
+    return np.unique(np.concatenate(recent))[-WINDOW:] if recent else np.array([], dtype='datetime64[D]')
+
+
+def _align(history: PriceHistory, axis: np.ndarray, columns=('close', 'high', 'low')) -> Dict[str, np.ndarray]:
+    """Place a symbol's bars on the shared axis; sessions it has no bar for stay NaN"""
+    aligned = {name: np.full(len(axis), np.nan) for name in columns}
+    dates = np.asarray(history['date'][-WINDOW:])
+    positions = np.searchsorted(axis, dates)
+    found = positions < len(axis)
+    found[found] &= axis[positions[found]] == dates[found]
+    for name in columns:
+        aligned[name][positions[found]] = np.asarray(history[name][-WINDOW:])[found]
+    return aligned
+
+
+def _ffill(matrix: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs along each row"""
+    index = np.where(np.isnan(matrix), 0, np.arange(matrix.shape[1]))
+    np.maximum.accumulate(index, axis=1, out=index)
+    filled = matrix[np.arange(matrix.shape[0])[:, None], index]
+    return filled
+
+
+def _last_valid(matrix: np.ndarray) -> np.ndarray:
+    filled = _ffill(matrix)
+    return filled[:, -1]
+
+
+def _window_mean(matrix: np.ndarray, length: int) -> np.ndarray:
+    tail = matrix[:, -length:]
+    counts = np.sum(~np.isnan(tail), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.nansum(tail, axis=1) / counts
+    # Require most of the window so a new listing doesn't report a 200-day average of 30 days
+    return np.where(counts >= length * 0.9, means, np.nan)
+
+
+def _annualized_volatility(returns: np.ndarray, length: int) -> np.ndarray:
+    tail = returns[:, -length:]
+    counts = np.sum(~np.isnan(tail), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nansum(tail, axis=1) / counts
+        variance = np.nansum((tail - mean[:, None]) ** 2, axis=1) / (counts - 1)
+    return np.where(counts >= max(2, length // 2), np.sqrt(variance * TRADING_DAYS), np.nan)
+
+
+def _beta(returns: np.ndarray, benchmark_returns: np.ndarray) -> np.ndarray:
+    """Beta per row over the sessions where both the symbol and the benchmark traded"""
+    valid = ~np.isnan(returns) & ~np.isnan(benchmark_returns)[None, :]
+    counts = valid.sum(axis=1)
+    r = np.where(valid, returns, 0.0)
+    b = np.where(valid, benchmark_returns[None, :], 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r_mean = r.sum(axis=1) / counts
+        b_mean = b.sum(axis=1) / counts
+        covariance = (np.where(valid, (r - r_mean[:, None]) * (b - b_mean[:, None]), 0.0)).sum(axis=1)
+        variance = (np.where(valid, (b - b_mean[:, None]) ** 2, 0.0)).sum(axis=1)
+        beta = covariance / variance
+    return np.where(counts >= 30, beta, np.nan)
+
+
+def _rsi(closes: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    """Wilder RSI at the last bar, with the recursive smoothing unrolled into fixed weights"""
+    changes = np.diff(_ffill(closes), axis=1)
+    gains = np.nan_to_num(np.clip(changes, 0, None))
+    losses = np.nan_to_num(np.clip(-changes, 0, None))
+    # Wilder smoothing is an EMA with alpha = 1/period; weight k bars back is alpha * (1 - alpha)^k
+    alpha = 1.0 / period
+    weights = alpha * (1 - alpha) ** np.arange(changes.shape[1])[::-1]
+    weights /= weights.sum()
+    avg_gain = gains @ weights
+    avg_loss = losses @ weights
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    observed = np.sum(~np.isnan(changes), axis=1)
+    return np.where(observed > period, rsi, np.nan)
+
+
+def _round(value, digits: int = 2):
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def compute_metrics(histories: Dict[str, PriceHistory], benchmark: Optional[PriceHistory] = None) -> Dict[str, Dict]:
+    """Technical metrics for many symbols in one vectorized pass.
+
+    Every symbol is aligned onto one (symbols x sessions) matrix, so each metric
+    is a handful of NumPy reductions whatever the number of symbols.
+    """
+    histories = {symbol: h for symbol, h in histories.items() if h is not None and len(h)}
+    if not histories:
+        return {}
+    symbols = list(histories)
+    axis = _date_axis(histories, benchmark)
+    aligned = [_align(histories[s], axis) for s in symbols]
+    closes = np.vstack([a['close'] for a in aligned])
+    highs = np.vstack([a['high'] for a in aligned])
+    lows = np.vstack([a['low'] for a in aligned])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = np.diff(np.log(closes), axis=1)
+    last_close = _last_valid(closes)
+
+    volatility_20d = _annualized_volatility(returns, 20)
+    volatility_1y = _annualized_volatility(returns, TRADING_DAYS)
+
+    filled = _ffill(closes)
+    running_peak = np.fmax.accumulate(filled, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        max_drawdown = np.nanmin(np.where(np.isnan(running_peak), np.nan, filled / running_peak - 1), axis=1)
+
+    moving_averages = {length: _window_mean(closes, length) for length in MOVING_AVERAGES}
+    rsi = _rsi(closes)
+
+    year = slice(-TRADING_DAYS, None)
+    with np.errstate(invalid='ignore'):
+        high_52w = np.nanmax(np.where(np.isnan(highs[:, year]), -np.inf, highs[:, year]), axis=1)
+        low_52w = np.nanmin(np.where(np.isnan(lows[:, year]), np.inf, lows[:, year]), axis=1)
+        range_position = (last_close - low_52w) / (high_52w - low_52w)
+
+    beta = np.full(len(symbols), np.nan)
+    if benchmark is not None and len(benchmark):
+        benchmark_closes = _align(benchmark, axis, columns=('close',))['close']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            benchmark_returns = np.diff(np.log(benchmark_closes))
+        beta = _beta(returns, benchmark_returns)
+
+    observations = np.sum(~np.isnan(closes), axis=1)
+    results = {}
+    for i, symbol in enumerate(symbols):
+        results[symbol] = {
+            'symbol': symbol,
+            'asOf': str(histories[symbol]['date'][-1]),
+            'observations': int(observations[i]),
+            'lastClose': _round(last_close[i]),
+            'volatility20d': _round(volatility_20d[i] * 100),
+            'volatility1y': _round(volatility_1y[i] * 100),
+            'beta': _round(beta[i]),
+            'maxDrawdown1y': _round(max_drawdown[i] * 100),
+            'sma20': _round(moving_averages[20][i]),
+            'sma50': _round(moving_averages[50][i]),
+            'sma200': _round(moving_averages[200][i]),
+            'rsi14': _round(rsi[i], 1),
+            'high52w': _round(high_52w[i]),
+            'low52w': _round(low_52w[i]),
+            'rangePosition52w': _round(range_position[i] * 100, 1),
+        }
+    return results
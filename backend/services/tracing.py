@@ -0,0 +1,185 @@
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Set TRACE_EXPORT_PATH to append every finished trace as one JSON line
+TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', '')
+
+# Shape a caller-supplied X-Trace-Id must have to be reused; it is echoed in headers and exported
+_TRACE_ID = re.compile(r'[A-Za-z0-9._-]{1,64}')
+
+_current_trace = contextvars.ContextVar('stocksense_trace', default=None)
+_current_span = contextvars.ContextVar('stocksense_span', default=None)
+_export_lock = threading.Lock()
+
+
+class Span:
+    def __init__(self, name: str, span_id: str, parent_id: Optional[str], attributes: Dict = None):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.attributes = attributes or {}
+        self.start = time.perf_counter()
+        self.end = None
+        self.error = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+
+class Trace:
+    """Span tree for one API request; spans may be added from worker threads"""
+
+    def __init__(self, name: str, trace_id: str = None):
+        self.name = name
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.end = None
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def new_span(self, name: str, parent_id: Optional[str], attributes: Dict = None) -> Span:
+        with self._lock:
+            self._next_id += 1
+            span = Span(name, f'{self._next_id:x}', parent_id, attributes)
+            self.spans.append(span)
+        return span
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def span_tree(self) -> List[Dict]:
+        """Nested span dicts (children under their parent) with offsets relative to the trace start"""
+        with self._lock:
+            spans = list(self.spans)
+        nodes = {}
+        roots = []
+        for span in spans:
+            nodes[span.span_id] = {
+                'name': span.name,
+                'startMs': round((span.start - self.start) * 1000, 2),
+                'durationMs': round(span.duration_ms, 2),
+                'children': []
+            }
+            if span.attributes:
+                nodes[span.span_id]['attributes'] = span.attributes
+            if span.error:
+                nodes[span.span_id]['error'] = span.error
+        for span in spans:
+            parent = nodes.get(span.parent_id)
+            (parent['children'] if parent else roots).append(nodes[span.span_id])
+        return roots
+
+    def to_dict(self) -> Dict:
+        return {
+            'traceId': self.trace_id,
+            'name': self.name,
+            'startedAt': self.started_at,
+            'totalMs': round(self.duration_ms, 2),
+            'spans': self.span_tree()
+        }
+
+    def server_timing(self) -> str:
+        """Render spans as a Server-Timing header value (one metric per span plus total)"""
+        with self._lock:
+            spans = list(self.spans)
+        entries = []
+        for span in spans:
+            metric = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in span.name)
+            entries.append(f'{metric};dur={span.duration_ms:.1f}')
+        entries.append(f'total;dur={self.duration_ms:.1f}')
+        return ', '.join(entries)
+
+
+def start_trace(name: str, trace_id: str = None) -> Trace:
+    """Begin a trace and make it current for this request context.
+
+    trace_id may come from the client (X-Trace-Id); it is used only if it is
+    1-64 letters, digits, '.', '_' or '-', otherwise a new id is generated.
+    """
+    if trace_id and not _TRACE_ID.fullmatch(trace_id):
+        trace_id = None
+    trace = Trace(name, trace_id)
+    _current_trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def end_trace() -> Optional[Trace]:
+    """Finish the current trace, export it if configured, and clear it"""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    trace.finish()
+    _current_trace.set(None)
+    _current_span.set(None)
+    if TRACE_EXPORT_PATH:
+        export_trace(trace, TRACE_EXPORT_PATH)
+    return trace
+
+
+def export_trace(trace: Trace, path: str):
+    """Append a finished trace to a JSONL file"""
+    line = json.dumps(trace.to_dict(), separators=(',', ':'))
+    try:
+        with _export_lock:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+    except OSError as e:
+        print(f"Trace export error: {e}")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a child span of the current span; a no-op outside a trace"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    current = trace.new_span(name, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = str(e)[:200]
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def annotate(**attributes):
+    """Add attributes to the innermost open span; a no-op outside a trace"""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+def propagate(func):
+    """Bind func to the caller's trace context so spans opened in a worker thread nest correctly"""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+    return run
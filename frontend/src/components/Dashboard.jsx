@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useStock } from '../context/StockContext'
-import { refreshStock } from '../services/api'
+import { refreshStocks, subscribePrices } from '../services/api'
 import StockCard from './StockCard'
 
 export default function Dashboard({ onStockSelect }) {
@@ -8,6 +8,16 @@ export default function Dashboard({ onStockSelect }) {
   const [refreshing, setRefreshing] = useState(false)
   const [autoRefresh, setAutoRefresh] = useState(true)
   const [refreshInterval, setRefreshInterval] = useState(5) // minutes
+  const [livePrices, setLivePrices] = useState({})
+  const symbolsKey = starredStocks.map((stock) => stock.symbol).join(',')
+
+  // One price stream for the whole dashboard; the server only sends changes
+  useEffect(() => {
+    if (!symbolsKey) return
+    return subscribePrices(symbolsKey.split(','), (prices) => {
+      setLivePrices((current) => ({ ...current, ...prices }))
+    })
+  }, [symbolsKey])
 
   useEffect(() => {
     if (autoRefresh && starredStocks.length > 0) {
@@ -22,14 +32,12 @@ export default function Dashboard({ onStockSelect }) {
   const refreshAllStocks = async () => {
     setRefreshing(true)
     try {
-      // Refresh each starred stock
-      for (const stock of starredStocks) {
-        try {
-          await refreshStock(stock.symbol)
-        } catch (err) {
-          console.error(`Failed to refresh ${stock.symbol}:`, err)
+      // Refresh all starred stocks in one batch; the backend runs them concurrently
+      await refreshStocks(starredStocks.map((stock) => stock.symbol), (result) => {
+        if (result.error) {
+          console.error(`Failed to refresh ${result.symbol}:`, result.error)
         }
-      }
+      })
       await refreshStarredStocks()
     } finally {
       setRefreshing(false)
@@ -105,6 +113,7 @@ export default function Dashboard({ onStockSelect }) {
             <StockCard
               key={stock.symbol}
               symbol={stock.symbol}
+              livePrice={livePrices[stock.symbol]}
               onSelect={onStockSelect}
             />
           ))}
@@ -1,5 +1,5 @@
 import { useState } from 'react'
-import { analyzeStock } from '../services/api'
+import { getAnalysisSection } from '../services/api'
 
 export default function SearchBar({ onAnalysisComplete }) {
   const [symbol, setSymbol] = useState('')
@@ -18,7 +18,9 @@ export default function SearchBar({ onAnalysisComplete }) {
     setError(null)
 
     try {
-      await analyzeStock(symbol.trim().toUpperCase())
+      // Only the company section is needed to validate the symbol; the full
+      // analysis is loaded by the analysis view
+      await getAnalysisSection(symbol.trim().toUpperCase(), 'company')
       onAnalysisComplete(symbol.trim().toUpperCase())
     } catch (err) {
       setError(err.message || 'Failed to analyze stock. Please try again.')
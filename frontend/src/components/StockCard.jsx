@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import { analyzeStock } from '../services/api'
 
-export default function StockCard({ symbol, onSelect }) {
+export default function StockCard({ symbol, livePrice, onSelect }) {
   const [data, setData] = useState(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
@@ -45,6 +45,8 @@ export default function StockCard({ symbol, onSelect }) {
   const company = data?.company
   const sentiment = data?.sentiment
   const aiRec = data?.ai_recommendation
+  const currentPrice = livePrice?.currentPrice ?? company?.currentPrice
+  const changePercent = livePrice?.changePercent ?? company?.changePercent ?? 0
 
   // Calculate overall sentiment
   const redditPos = sentiment?.reddit?.positive || 0
@@ -86,14 +88,14 @@ export default function StockCard({ symbol, onSelect }) {
       <div className="mb-4">
         <div className="flex items-baseline gap-2 mb-1">
           <span className="text-2xl font-bold text-gray-900">
-            ${company?.currentPrice?.toFixed(2) || '0.00'}
+            ${currentPrice?.toFixed(2) || '0.00'}
           </span>
           <span
             className={`text-sm font-semibold ${
-              (company?.changePercent || 0) >= 0 ? 'text-green-600' : 'text-red-600'
+              changePercent >= 0 ? 'text-green-600' : 'text-red-600'
             }`}
           >
-            {(company?.changePercent || 0) >= 0 ? '↑' : '↓'} {Math.abs(company?.changePercent || 0).toFixed(2)}%
+            {changePercent >= 0 ? '↑' : '↓'} {Math.abs(changePercent).toFixed(2)}%
           </span>
         </div>
         <p className="text-xs text-gray-500">
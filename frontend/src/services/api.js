@@ -18,6 +18,17 @@ export const analyzeStock = async (symbol) => {
   }
 }
 
+// Fetch one analysis section ('company', 'news', 'sentiment', 'analyst' or 'ai');
+// only that section's upstream data is fetched
+export const getAnalysisSection = async (symbol, section) => {
+  try {
+    const response = await api.get(`/analyze/${symbol}/${section}`)
+    return response.data
+  } catch (error) {
+    throw new Error(error.response?.data?.error || `Failed to load ${section} data`)
+  }
+}
+
 export const getStarredStocks = async () => {
   try {
     const response = await api.get('/starred')
@@ -54,3 +65,50 @@ export const refreshStock = async (symbol) => {
   }
 }
 
+
+// Refresh several stocks in one request; onResult is called with each symbol's
+// result as soon as the backend streams it (newline-delimited JSON)
+export const refreshStocks = async (symbols, onResult, etags = {}) => {
+  const response = await fetch(`${API_BASE_URL}/refresh`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ symbols, etags })
+  })
+  if (!response.ok || !response.body) {
+    const data = await response.json().catch(() => ({}))
+    throw new Error(data.error || 'Failed to refresh stock data')
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  const results = []
+  let buffer = ''
+  const handleLine = (line) => {
+    if (!line.trim()) return
+    const result = JSON.parse(line)
+    results.push(result)
+    if (onResult) onResult(result)
+  }
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    const lines = buffer.split('\n')
+    buffer = lines.pop()
+    lines.forEach(handleLine)
+  }
+  handleLine(buffer + decoder.decode())
+  return results
+}
+
+// Subscribe to live price changes over Server-Sent Events. onPrices receives
+// { SYMBOL: { currentPrice, changePercent, ... } } for symbols that changed.
+// Returns a function that closes the stream.
+export const subscribePrices = (symbols, onPrices) => {
+  const query = encodeURIComponent(symbols.join(','))
+  const source = new EventSource(`${API_BASE_URL}/stream/prices?symbols=${query}`)
+  source.addEventListener('prices', (event) => {
+    onPrices(JSON.parse(event.data))
+  })
+  return () => source.close()
+}